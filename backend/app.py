@@ -1,33 +1,82 @@
-from flask import Flask
-from flask_cors import CORS
-from routes.auth_routes import auth_bp  
-from routes.session_routes import session_bp
-from config.firebase_config import init_firebase
 import os
 from datetime import timedelta
 
-app = Flask(__name__)
+from flask import Flask
+from flask_cors import CORS
+
+
+def create_app():
+    """
+    Build the Flask app (`flask --app app run` finds this factory).
+
+    Startup side effects live here, not at import time: the inference
+    process pool and the index builder use spawn, which re-imports the main
+    module in every worker, and a worker must not reconnect to Mongo,
+    initialise Firebase or start loading models.
+    """
+    from utils.logger import setup_logging, init_request_logging
+    setup_logging()  # before the imports below, which log while connecting to Mongo
+
+    from routes.auth_routes import auth_bp
+    from routes.session_routes import session_bp
+    from config.firebase_config import init_firebase
+    from ml_model.classifier import get_inference_stats, start_background_loading, resources
+    from utils.http_client import http_client
+    from utils.metrics import init_request_metrics
+
+    app = Flask(__name__)
+    init_request_logging(app)
+    init_request_metrics(app)  # GET /metrics; per-request timing only when METRICS_ENABLED
+
+    # ✅ Apply CORS to the entire app
+    CORS(app,
+         origins=["http://localhost:5173"],
+         supports_credentials=True,
+         allow_headers=["Content-Type", "Authorization"],
+         methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+         expose_headers=["Content-Type", "Authorization"],
+         max_age=timedelta(hours=1))  # Optional: helps with caching preflight
+
+    # Initialize Firebase
+    if not os.environ.get("FLASK_RUN_FROM_CLI"):
+        init_firebase()
+
+    # Warm TensorFlow, embeddings and the FAISS index without blocking startup
+    if os.getenv("MODEL_PRELOAD", "true").lower() in ("1", "true", "yes"):
+        start_background_loading()
+
+    # Register Blueprints
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(session_bp, url_prefix='/session')
+
+    @app.route("/", methods=["GET"])
+    def home():
+        return {"message": "Flask Server Running!"}
+
+    @app.route("/health", methods=["GET"])
+    def health():
+        # Liveness: the process is up, whatever the model loading state
+        return {"status": "ok", "loader": resources.status()}, 200
+
+    @app.route("/ready", methods=["GET"])
+    def ready():
+        # Readiness: classify routes can serve without waiting on the loader
+        is_ready = resources.is_ready()
+        return {"ready": is_ready, "loader": resources.status()}, 200 if is_ready else 503
 
-# ✅ Apply CORS to the entire app
-CORS(app,
-     origins=["http://localhost:5173"],  
-     supports_credentials=True,
-     allow_headers=["Content-Type", "Authorization"],
-     methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-     expose_headers=["Content-Type", "Authorization"],
-     max_age=timedelta(hours=1))  # Optional: helps with caching preflight
+    @app.route("/inference-stats", methods=["GET"])
+    def inference_stats():
+        # Queue depth + batch-size histograms for tuning INFERENCE_MAX_BATCH_SIZE / INFERENCE_MAX_WAIT_MS
+        return get_inference_stats()
 
-# Initialize Firebase
-if not os.environ.get("FLASK_RUN_FROM_CLI"):
-    init_firebase()
+    @app.route("/upstream-stats", methods=["GET"])
+    def upstream_stats():
+        # Per-upstream latency histograms, error counts and circuit state for outbound HTTP
+        return http_client.stats()
 
-# Register Blueprints
-app.register_blueprint(auth_bp, url_prefix='/auth')  
-app.register_blueprint(session_bp, url_prefix='/session')
+    return app
 
-@app.route("/", methods=["GET"])
-def home():
-    return {"message": "Flask Server Running!"}
 
 if __name__ == "__main__":
-    app.run(debug=True, use_reloader=False)
\ No newline at end of file
+    app = create_app()
+    app.run(debug=os.getenv("FLASK_DEBUG", "false").lower() in ("1", "true", "yes"), use_reloader=False)
@@ -0,0 +1,95 @@
+"""
+Async serving mode: the same /auth and /session API as app.py, on Quart.
+
+Mongo goes through Motor, image downloads and Ollama through httpx, and
+inference through the shared batcher, so one process holds many in-flight
+LLM-bound requests without a thread each.
+
+    uvicorn --factory asgi:create_app --host 0.0.0.0 --port 5000
+    hypercorn "asgi:create_app()" --bind 0.0.0.0:5000
+
+As in app.py, startup side effects stay inside create_app() so spawned
+inference workers can re-import this module safely.
+"""
+import os
+from datetime import timedelta
+
+from quart import Quart
+from quart_cors import cors
+
+
+def create_app():
+    from utils.logger import setup_logging, init_async_request_logging
+    setup_logging()  # before the imports below, which log while connecting to Mongo
+
+    from config.database import init_db
+    from config.async_database import close_async_db
+    from config.firebase_config import init_firebase
+
+    # Background classification jobs, the Mongo cache tier and index bootstrap still use the sync driver
+    init_db()
+
+    from routes.async_auth_routes import auth_bp
+    from routes.async_session_routes import session_bp
+    from ml_model.classifier import get_inference_stats, start_background_loading, resources
+    from ml_model.async_inference import shutdown_executor
+    from utils.async_http_client import async_http_client
+    from utils.http_client import http_client
+    from utils.metrics import init_async_request_metrics
+
+    app = Quart(__name__)
+    init_async_request_logging(app)
+    init_async_request_metrics(app)
+
+    app = cors(app,
+               allow_origin=["http://localhost:5173"],
+               allow_credentials=True,
+               allow_headers=["Content-Type", "Authorization"],
+               allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+               expose_headers=["Content-Type", "Authorization"],
+               max_age=timedelta(hours=1))
+
+    init_firebase()
+
+    app.register_blueprint(auth_bp, url_prefix='/auth')
+    app.register_blueprint(session_bp, url_prefix='/session')
+
+    @app.before_serving
+    async def startup():
+        if os.getenv("MODEL_PRELOAD", "true").lower() in ("1", "true", "yes"):
+            start_background_loading()
+
+    @app.after_serving
+    async def shutdown():
+        await async_http_client.aclose()
+        close_async_db()
+        shutdown_executor()
+
+    @app.route("/", methods=["GET"])
+    async def home():
+        return {"message": "Quart Server Running!"}
+
+    @app.route("/health", methods=["GET"])
+    async def health():
+        return {"status": "ok", "loader": resources.status()}, 200
+
+    @app.route("/ready", methods=["GET"])
+    async def ready():
+        is_ready = resources.is_ready()
+        return {"ready": is_ready, "loader": resources.status()}, 200 if is_ready else 503
+
+    @app.route("/inference-stats", methods=["GET"])
+    async def inference_stats():
+        return get_inference_stats()
+
+    @app.route("/upstream-stats", methods=["GET"])
+    async def upstream_stats():
+        # The async client serves request paths; the sync one still backs background jobs
+        return {"async": async_http_client.stats(), "sync": http_client.stats()}
+
+    return app
+
+
+if __name__ == "__main__":
+    app = create_app()
+    app.run(debug=os.getenv("FLASK_DEBUG", "false").lower() in ("1", "true", "yes"), use_reloader=False)
@@ -0,0 +1,107 @@
+"""
+Local stand-ins for the services the backend talks to, so benchmarks run
+without network access: a stub Ollama /api/generate and a static image host.
+"""
+import io
+import json
+import time
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from PIL import Image
+
+STUB_ANSWER = (
+    "Use a gentle cleanser twice daily, a non-comedogenic moisturiser and "
+    "sunscreen. Ingredients such as salicylic acid or niacinamide can help. "
+    "See a dermatologist if the condition persists."
+)
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(handler_class, host, port):
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name=f"fake-{handler_class.__name__}", daemon=True).start()
+    return server
+
+
+# === Ollama ===
+def start_ollama_stub(host="127.0.0.1", port=11434, latency_ms=200, tokens_per_second=50):
+    """
+    Mimics POST /api/generate. Non-streaming requests sleep `latency_ms` then
+    answer; streaming requests emit one JSON line per word at `tokens_per_second`.
+    """
+    words = STUB_ANSWER.split(" ")
+
+    class OllamaHandler(_QuietHandler):
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            time.sleep(latency_ms / 1000.0)
+
+            if not body.get("stream", True):
+                payload = json.dumps({"model": body.get("model"), "response": STUB_ANSWER, "done": True}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i, word in enumerate(words):
+                token = word if i == 0 else " " + word
+                self._chunk(json.dumps({"response": token, "done": False}).encode() + b"\n")
+                time.sleep(1.0 / tokens_per_second)
+            self._chunk(json.dumps({"response": "", "done": True}).encode() + b"\n")
+            self._chunk(b"")
+
+        def _chunk(self, data):
+            self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+    return _serve(OllamaHandler, host, port)
+
+
+# === Image host ===
+def make_jpeg(width=1024, height=768, seed=0):
+    """A deterministic RGB JPEG, different per seed so content-hash caches can be exercised or bypassed."""
+    image = Image.new("RGB", (width, height), ((seed * 37) % 256, (seed * 91) % 256, (seed * 53) % 256))
+    for y in range(0, height, 64):
+        image.paste(((y + seed) % 256, 128, (255 - y) % 256), (0, y, width, min(y + 32, height)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def start_image_server(host="127.0.0.1", port=8901, images=16, width=1024, height=768):
+    """Serves GET /img/<n>.jpg for n in [0, images)."""
+    payloads = {f"/img/{i}.jpg": make_jpeg(width, height, seed=i) for i in range(images)}
+
+    class ImageHandler(_QuietHandler):
+        def do_GET(self):
+            payload = payloads.get(self.path)
+            if payload is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    server = _serve(ImageHandler, host, port)
+    server.image_urls = [f"http://{host}:{port}{path}" for path in payloads]
+    return server
@@ -0,0 +1,125 @@
+"""
+Per-image cost of turning encoded bytes into a model input row.
+
+    cd backend
+    python -m benchmarks.preprocess_bench
+    python -m benchmarks.preprocess_bench --images samples/ --repeat 50
+
+Compares three paths over the same JPEGs (real photos from --images, or
+synthetic ones at a few camera resolutions):
+
+  original     full decode, convert, resize, img_to_array-style float32 copy,
+               expand_dims, float64 `/ 255.0`
+  full_decode  full decode, then ml_model.preprocessing into a preallocated row
+  draft        draft-mode decode (utils.image_fetch) + ml_model.preprocessing
+
+For each it reports median / p95 milliseconds per image, PIL image buffers
+allocated per image, peak NumPy/Python heap per image (tracemalloc) and the
+largest pixel difference from the original path.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from io import BytesIO
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.fakes import make_jpeg
+from ml_model.preprocessing import INPUT_SIZE, new_batch, preprocess_into
+from utils.image_fetch import decode_image_bytes
+
+SYNTHETIC_SIZES = [(4032, 3024), (1920, 1080), (1024, 768), (640, 480)]
+
+
+def original(data, out_row):
+    """The pre-refactor path, kept here as the baseline."""
+    img = Image.open(BytesIO(data)).convert("RGB").resize(INPUT_SIZE)
+    img_array = np.asarray(img, dtype=np.float32)  # keras img_to_array
+    img_array = np.expand_dims(img_array, axis=0) / 255.0
+    out_row[...] = img_array[0]
+
+
+def full_decode(data, out_row):
+    preprocess_into(decode_image_bytes(data).image, out_row)
+
+
+def draft(data, out_row):
+    preprocess_into(decode_image_bytes(data, draft_size=INPUT_SIZE).image, out_row)
+
+
+PATHS = {"original": original, "full_decode": full_decode, "draft": draft}
+
+
+def load_samples(images_dir):
+    if images_dir:
+        names = sorted(n for n in os.listdir(images_dir) if n.lower().endswith((".jpg", ".jpeg")))
+        if not names:
+            sys.exit(f"No JPEGs found in {images_dir}")
+        samples = []
+        for name in names:
+            with open(os.path.join(images_dir, name), "rb") as f:
+                samples.append((name, f.read()))
+        return samples
+    return [(f"synthetic_{w}x{h}", make_jpeg(w, h, seed=i)) for i, (w, h) in enumerate(SYNTHETIC_SIZES)]
+
+
+def measure(fn, data, repeat):
+    row = new_batch(1)[0]
+    fn(data, row)  # warm-up
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(data, row)
+        timings.append((time.perf_counter() - started) * 1000.0)
+    timings.sort()
+
+    pil_before = Image.core.get_stats()["new_count"]
+    tracemalloc.start()
+    fn(data, row)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    pil_allocs = Image.core.get_stats()["new_count"] - pil_before
+
+    return row.copy(), {
+        "median_ms": round(timings[len(timings) // 2], 3),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        "pil_image_allocs": pil_allocs,
+        "peak_heap_kib": round(peak / 1024.0, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="directory of JPEGs (default: synthetic images)")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="also write the JSON report here")
+    args = parser.parse_args()
+
+    report = {}
+    for name, data in load_samples(args.images):
+        with Image.open(BytesIO(data)) as probe:
+            entry = {"size": list(probe.size), "bytes": len(data), "paths": {}}
+        baseline = None
+        for path_name, fn in PATHS.items():
+            row, stats = measure(fn, data, args.repeat)
+            if baseline is None:
+                baseline = row
+            stats["max_abs_diff"] = round(float(np.abs(row - baseline).max()), 4)
+            stats["mean_abs_diff"] = round(float(np.abs(row - baseline).mean()), 5)
+            entry["paths"][path_name] = stats
+        report[name] = entry
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+End-to-end throughput benchmark for the Flask blueprints.
+
+Boots the auth and session blueprints on a local port against local fakes
+(mongomock or a local mongod, a stub Ollama on :11434, a static image host)
+and drives the hot endpoints at a fixed concurrency. Results go to a JSON
+file that can be diffed between releases.
+
+    cd backend
+    python -m benchmarks.run_bench --mongo mongomock --stub-model --concurrency 16 --requests 500
+    python -m benchmarks.run_bench --mongo mongodb://localhost:27017 --output bench/v1.2.json
+
+--stub-model swaps the TensorFlow model and FAISS index for numpy stand-ins
+(useful when do7.keras is not available); without it the real resources load.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import platform
+import logging
+import argparse
+import threading
+import subprocess
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import requests
+
+from benchmarks.fakes import start_ollama_stub, start_image_server
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mongo", default="mongomock", help="'mongomock' or a MongoDB URI (default: mongomock)")
+    parser.add_argument("--db-name", default="skincare_bench")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--endpoints", default="verify-token,start-session,get-sessions,upload-image")
+    parser.add_argument("--port", type=int, default=5055, help="port for the app under test")
+    parser.add_argument("--ollama-port", type=int, default=11434)
+    parser.add_argument("--ollama-latency-ms", type=int, default=200)
+    parser.add_argument("--image-port", type=int, default=8901)
+    parser.add_argument("--images", type=int, default=16, help="distinct images served (lower = more cache hits)")
+    parser.add_argument("--stub-model", action="store_true", help="replace TensorFlow/FAISS with numpy stubs")
+    parser.add_argument("--stub-model-ms", type=float, default=20.0, help="simulated predict latency per batch")
+    parser.add_argument("--wait-jobs", type=float, default=120.0, help="seconds to wait for queued upload jobs")
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args()
+
+
+# === Environment ===
+def configure_environment(args):
+    """Everything here must happen before the app modules are imported."""
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    os.environ["DB_NAME"] = args.db_name
+    os.environ["OLLAMA_URL"] = f"http://127.0.0.1:{args.ollama_port}/api/generate"
+    os.environ["MODEL_PRELOAD"] = "false"
+
+    import config.database as database
+
+    database.DB_NAME = args.db_name
+    if args.mongo == "mongomock":
+        import mongomock
+
+        database.MongoClient = mongomock.MongoClient
+        # mongomock has no query planner to explain
+        database.VERIFY_QUERY_PLANS = False
+    else:
+        database.MONGO_URI = args.mongo
+
+
+def install_stub_model(predict_ms):
+    import ml_model.classifier as classifier
+
+    class StubModel:
+        def predict(self, batch, verbose=0):
+            time.sleep(predict_ms / 1000.0)
+            logits = batch.reshape(len(batch), -1)[:, :3].astype(np.float64) + 1e-3
+            return logits / logits.sum(axis=1, keepdims=True)
+
+    class StubVectorStore:
+        def similarity_search(self, query, k=4):
+            return [SimpleNamespace(page_content=f"Reference passage {i} for: {query}") for i in range(k)]
+
+    def load_stub():
+        # As classifier._load_resources does, so results are cached under the stub's id
+        classifier.result_cache.model_id = "stub-model"
+        return SimpleNamespace(
+            model=StubModel(), model_id="stub-model", embedding_model=None, vector_store=StubVectorStore()
+        )
+
+    classifier.resources.load_fn = load_stub
+
+
+def build_app():
+    from flask import Flask
+    from utils.logger import setup_logging, init_request_logging
+    from utils.metrics import init_request_metrics
+
+    setup_logging()
+    from routes.auth_routes import auth_bp
+    from routes.session_routes import session_bp
+
+    app = Flask("benchmark")
+    init_request_logging(app)
+    init_request_metrics(app)
+    app.register_blueprint(auth_bp, url_prefix="/auth")
+    app.register_blueprint(session_bp, url_prefix="/session")
+    return app
+
+
+def serve(app, port):
+    from werkzeug.serving import make_server
+
+    # werkzeug forces its access log to INFO unless a level is already set
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", port, app, threaded=True)
+    threading.Thread(target=server.serve_forever, name="app-under-test", daemon=True).start()
+    return server
+
+
+# === Load generation ===
+_local = threading.local()
+
+
+def http():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def run_phase(name, make_request, total, concurrency):
+    """Fire `total` requests from `concurrency` threads; returns the latency summary for one endpoint."""
+    def one(i):
+        started = time.perf_counter()
+        try:
+            response = make_request(i)
+            ok = response.status_code < 400
+        except Exception:
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000.0 for latency, _ in results)
+    errors = sum(1 for _, ok in results if not ok)
+    summary = {
+        "requests": total,
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "req_per_s": round(total / elapsed, 2) if elapsed else None,
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else None,
+        "p50_ms": round(percentile(latencies, 50), 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 2) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99), 2) if latencies else None,
+        "max_ms": round(latencies[-1], 2) if latencies else None,
+    }
+    print(f"{name:>16}: {summary['req_per_s']} req/s  p50={summary['p50_ms']}ms  "
+          f"p95={summary['p95_ms']}ms  p99={summary['p99_ms']}ms  errors={errors}")
+    return summary
+
+
+def wait_for_jobs(base_url, jobs, timeout):
+    """Poll upload jobs until they finish; reports how long the pipeline took to drain."""
+    started = time.perf_counter()
+    pending = dict(jobs)
+    outcome = {"done": 0, "failed": 0}
+    while pending and time.perf_counter() - started < timeout:
+        for job_id, session_id in list(pending.items()):
+            status = http().get(f"{base_url}/session/{session_id}/job/{job_id}").json().get("status")
+            if status in ("done", "failed"):
+                outcome[status] += 1
+                del pending[job_id]
+        time.sleep(0.05)
+    outcome["timed_out"] = len(pending)
+    outcome["drain_s"] = round(time.perf_counter() - started, 3)
+    return outcome
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def main():
+    args = parse_args()
+    configure_environment(args)
+    if args.stub_model:
+        install_stub_model(args.stub_model_ms)
+
+    ollama = start_ollama_stub(port=args.ollama_port, latency_ms=args.ollama_latency_ms)
+    images = start_image_server(port=args.image_port, images=args.images)
+    app = build_app()
+    server = serve(app, args.port)
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    from ml_model.classifier import start_background_loading, wait_until_ready
+    start_background_loading()
+    wait_until_ready(timeout=None)
+
+    endpoints = [name.strip() for name in args.endpoints.split(",") if name.strip()]
+    uid = f"bench-{uuid.uuid4().hex[:8]}"
+    http().post(f"{base_url}/auth/verify-token", json={"uid": uid, "email": f"{uid}@example.com", "name": "Bench"})
+
+    session_ids = []
+    session_lock = threading.Lock()
+
+    def start_session(i):
+        response = http().post(f"{base_url}/session/start-session", json={"uid": uid, "session_name": f"bench {i}"})
+        if response.status_code == 201:
+            with session_lock:
+                session_ids.append(response.json()["session_id"])
+        return response
+
+    upload_jobs = {}
+    jobs_lock = threading.Lock()
+
+    def upload_image(i):
+        session_id = session_ids[i % len(session_ids)]
+        image_url = images.image_urls[i % len(images.image_urls)]
+        response = http().post(
+            f"{base_url}/session/{session_id}/upload-image",
+            json={"uid": uid, "image_urls": [{"url": image_url, "delete_url": image_url}]}
+        )
+        if response.status_code == 202:
+            with jobs_lock:
+                upload_jobs[response.json()["job_id"]] = session_id
+        return response
+
+    requests_by_endpoint = {
+        "verify-token": lambda i: http().post(
+            f"{base_url}/auth/verify-token",
+            json={"uid": f"{uid}-{i}", "email": f"{uid}-{i}@example.com", "name": "Bench"}
+        ),
+        "start-session": start_session,
+        "get-sessions": lambda i: http().get(f"{base_url}/session/get-sessions", params={"uid": uid}),
+        "upload-image": upload_image,
+    }
+
+    results = {}
+    for name in endpoints:
+        if name not in requests_by_endpoint:
+            sys.exit(f"Unknown endpoint '{name}'; choose from {sorted(requests_by_endpoint)}")
+        if name in ("get-sessions", "upload-image") and not session_ids:
+            run_phase("start-session (setup)", start_session, min(args.requests, 50), args.concurrency)
+        results[name] = run_phase(name, requests_by_endpoint[name], args.requests, args.concurrency)
+
+    if upload_jobs:
+        results["upload-image"]["jobs"] = wait_for_jobs(base_url, upload_jobs, args.wait_jobs)
+        print(f"{'upload jobs':>16}: {results['upload-image']['jobs']}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "mongo": "mongomock" if args.mongo == "mongomock" else "mongod",
+            "stub_model": args.stub_model,
+            "ollama_latency_ms": args.ollama_latency_ms,
+            "images": args.images,
+        },
+        "endpoints": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+    server.shutdown()
+    ollama.shutdown()
+    images.shutdown()
+
+
+if __name__ == "__main__":
+    main()
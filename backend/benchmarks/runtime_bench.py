@@ -0,0 +1,109 @@
+"""
+Compare classifier runtimes on this machine: cold start, resident memory and
+predict latency.
+
+    cd backend
+    python -m benchmarks.runtime_bench --output bench/runtimes.json
+    python -m benchmarks.runtime_bench --runtimes keras,onnx --threads 2 --iterations 200
+
+Each runtime is measured in a fresh interpreter, so cold start covers the
+framework import plus model load plus the first predict, and peak RSS is not
+polluted by the other runtimes.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+
+START = time.perf_counter()
+
+
+def measure(model_path, runtime, threads, batch_sizes, iterations):
+    """Runs inside the child process; returns one runtime's numbers."""
+    import numpy as np
+    from ml_model.runtime import load_predictor
+
+    predictor = load_predictor(model_path, runtime, intra_op_threads=threads, inter_op_threads=1 if threads else 0)
+    loaded_at = time.perf_counter()
+    predictor.predict(np.random.rand(1, 224, 224, 3).astype(np.float32))
+    first_predict_at = time.perf_counter()
+
+    latency = {}
+    for batch_size in batch_sizes:
+        batch = np.random.rand(batch_size, 224, 224, 3).astype(np.float32)
+        predictor.predict(batch)  # warm-up for this shape
+        samples = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            predictor.predict(batch)
+            samples.append((time.perf_counter() - started) * 1000.0)
+        samples.sort()
+        latency[str(batch_size)] = {
+            "p50_ms": round(samples[len(samples) // 2], 3),
+            "p95_ms": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)], 3),
+            "per_image_p50_ms": round(samples[len(samples) // 2] / batch_size, 3),
+        }
+
+    return {
+        "artifact": os.path.basename(predictor.path),
+        "artifact_mb": round(os.path.getsize(predictor.path) / (1024 * 1024), 2),
+        "load_s": round(loaded_at - START, 3),
+        "cold_start_s": round(first_predict_at - START, 3),
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1),
+        "latency": latency,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=os.path.join(os.path.dirname(__file__), "..", "ml_model", "do7.keras"))
+    parser.add_argument("--runtimes", default="keras,onnx,tflite")
+    parser.add_argument("--threads", type=int, default=0, help="intra-op threads (0 = runtime default)")
+    parser.add_argument("--batch-sizes", default="1,8")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output", default="runtime_bench.json")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    model_path = os.path.abspath(args.model)
+
+    if args.child:
+        print(json.dumps(measure(model_path, args.child, args.threads, batch_sizes, args.iterations)))
+        return
+
+    results = {}
+    for runtime in [name.strip() for name in args.runtimes.split(",") if name.strip()]:
+        command = [sys.executable, "-m", "benchmarks.runtime_bench", "--child", runtime, "--model", model_path,
+                   "--threads", str(args.threads), "--batch-sizes", args.batch_sizes,
+                   "--iterations", str(args.iterations)]
+        env = {**os.environ, "LOG_LEVEL": "WARNING"}
+        proc = subprocess.run(command, capture_output=True, text=True, env=env,
+                              cwd=os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+        if proc.returncode != 0:
+            results[runtime] = {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+        else:
+            results[runtime] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"{runtime:>7}: {results[runtime]}")
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "threads": args.threads,
+        },
+        "runtimes": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
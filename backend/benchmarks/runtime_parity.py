@@ -0,0 +1,75 @@
+"""
+Check an exported classifier against the Keras original before deploying it.
+
+    cd backend
+    python -m benchmarks.runtime_parity --runtime onnx --images samples/
+    python -m benchmarks.runtime_parity --runtime tflite --atol 0.05 --min-agreement 0.97   # int8
+
+Runs both models over the same preprocessed images (a directory of real
+photos, or synthetic JPEGs when --images is omitted) and exits non-zero if
+the top-1 label agreement or the largest probability difference is out of
+tolerance.
+"""
+import os
+import sys
+import argparse
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.fakes import make_jpeg
+from ml_model.classifier import MODEL_PATH, class_labels, preprocess_image, preprocess_image_bytes
+from ml_model.runtime import KerasPredictor, load_predictor, resolve_runtime
+
+
+def load_inputs(images_dir, synthetic):
+    if images_dir:
+        names = sorted(n for n in os.listdir(images_dir) if n.lower().endswith((".jpg", ".jpeg", ".png", ".webp")))
+        if not names:
+            sys.exit(f"No images found in {images_dir}")
+        batch = np.empty((len(names), 224, 224, 3), dtype=np.float32)
+        for i, name in enumerate(names):
+            with Image.open(os.path.join(images_dir, name)) as img:
+                preprocess_image(img, out=batch[i:i + 1])
+        return names, batch
+
+    batch = np.empty((synthetic, 224, 224, 3), dtype=np.float32)
+    for i in range(synthetic):
+        preprocess_image_bytes(make_jpeg(640, 480, seed=i), out=batch[i:i + 1])
+    return [f"synthetic-{i}" for i in range(synthetic)], batch
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--runtime", choices=["onnx", "tflite"], required=True)
+    parser.add_argument("--images", help="directory of sample images (default: synthetic)")
+    parser.add_argument("--synthetic", type=int, default=32)
+    parser.add_argument("--atol", type=float, default=1e-3, help="max allowed |p_keras - p_runtime|")
+    parser.add_argument("--min-agreement", type=float, default=1.0, help="min fraction of identical top-1 labels")
+    args = parser.parse_args()
+
+    names, batch = load_inputs(args.images, args.synthetic)
+    reference = np.asarray(KerasPredictor(args.model).predict(batch), dtype=np.float32)
+    _, path = resolve_runtime(args.model, args.runtime)
+    candidate = np.asarray(load_predictor(args.model, args.runtime).predict(batch), dtype=np.float32)
+
+    diff = np.abs(reference - candidate)
+    agree = reference.argmax(axis=1) == candidate.argmax(axis=1)
+    agreement = float(agree.mean())
+    max_diff = float(diff.max())
+
+    for i in np.flatnonzero(~agree):
+        print(f"  mismatch {names[i]}: keras={class_labels[reference[i].argmax()]} "
+              f"{args.runtime}={class_labels[candidate[i].argmax()]} max|dp|={diff[i].max():.4f}")
+    print(f"{os.path.basename(path)} vs {os.path.basename(args.model)} on {len(names)} images: "
+          f"top-1 agreement {agreement:.2%}, max |dp| {max_diff:.5f}, mean |dp| {float(diff.mean()):.5f}")
+
+    if agreement < args.min_agreement or max_diff > args.atol:
+        print("PARITY FAILED")
+        sys.exit(1)
+    print("PARITY OK")
+
+
+if __name__ == "__main__":
+    main()
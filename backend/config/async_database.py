@@ -0,0 +1,25 @@
+from motor.motor_asyncio import AsyncIOMotorClient
+
+import config.database as database
+from utils.metrics import mongo_event_listeners
+
+async_db = None
+
+
+def init_async_db():
+    """
+    Motor handle for the ASGI app. Created lazily so it binds to the serving
+    event loop; indexes are still bootstrapped by the sync init_db at startup.
+    """
+    global async_db
+    if async_db is None:
+        client = AsyncIOMotorClient(database.MONGO_URI, event_listeners=mongo_event_listeners())
+        async_db = client[database.DB_NAME]
+    return async_db
+
+
+def close_async_db():
+    global async_db
+    if async_db is not None:
+        async_db.client.close()
+        async_db = None
@@ -1,17 +1,103 @@
 import os
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, DESCENDING
 from dotenv import load_dotenv
+from utils.logger import get_logger
+from utils.metrics import mongo_event_listeners
 
 load_dotenv()
 
+logger = get_logger(__name__)
+
 MONGO_URI = os.getenv("MONGO_URI")
 DB_NAME = os.getenv("DB_NAME")
+ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() in ("1", "true", "yes")
+VERIFY_QUERY_PLANS = os.getenv("MONGO_VERIFY_QUERY_PLANS", "true").lower() in ("1", "true", "yes")
 
 db = None
 
+# === Indexes ===
+# collection -> [(keys, options)]; every hot query in models/ must be covered here
+INDEXES = {
+    "sessions": [
+        ([("session_id", ASCENDING)], {"name": "session_id_unique", "unique": True}),
+        # session_id breaks created_at ties so the paginated listing never needs an in-memory sort
+        ([("uid", ASCENDING), ("created_at", DESCENDING), ("session_id", DESCENDING)], {"name": "uid_created_at_session_id"}),
+    ],
+    "users": [
+        ([("uid", ASCENDING)], {"name": "uid_unique", "unique": True}),
+        # Users created without an email share "" / null, so only real addresses must be unique
+        ([("email", ASCENDING)], {"name": "email_unique", "unique": True, "partialFilterExpression": {"email": {"$gt": ""}}}),
+    ],
+}
+
+# (collection, filter, sort, index the planner must pick)
+HOT_QUERIES = [
+    ("sessions", {"session_id": "__plan_probe__"}, None, "session_id_unique"),
+    ("sessions", {"uid": "__plan_probe__"}, [("created_at", DESCENDING), ("session_id", DESCENDING)], "uid_created_at_session_id"),
+    ("users", {"uid": "__plan_probe__"}, None, "uid_unique"),
+    ("users", {"email": "plan-probe@example.com"}, None, "email_unique"),
+]
+
+
+class QueryPlanError(RuntimeError):
+    """A hot query is no longer served by its index."""
+
+
+def ensure_indexes(database):
+    """Create the indexes in INDEXES (no-op for ones that already exist)."""
+    for collection_name, specs in INDEXES.items():
+        for keys, options in specs:
+            database[collection_name].create_index(keys, **options)
+    logger.info("MongoDB indexes ensured.")
+
+
+def _plan_stages(plan):
+    """Yield (stage, indexName) for every node of an explain() plan tree."""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"], plan.get("indexName")
+        for value in plan.values():
+            yield from _plan_stages(value)
+    elif isinstance(plan, list):
+        for value in plan:
+            yield from _plan_stages(value)
+
+
+def verify_query_plans(database):
+    """
+    Explain each hot query and raise QueryPlanError if its winning plan
+    does a collection scan or uses a different index than expected.
+    """
+    problems = []
+    for collection_name, query, sort, expected_index in HOT_QUERIES:
+        cursor = database[collection_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        winning_plan = cursor.explain().get("queryPlanner", {}).get("winningPlan", {})
+        stages = list(_plan_stages(winning_plan))
+
+        used_indexes = {index_name for stage, index_name in stages if index_name}
+        if any(stage == "COLLSCAN" for stage, _ in stages) or expected_index not in used_indexes:
+            problems.append(
+                f"{collection_name}.find({query}) expected index '{expected_index}', "
+                f"got stages {[stage for stage, _ in stages]} using {sorted(used_indexes) or 'no index'}"
+            )
+
+    if problems:
+        raise QueryPlanError("Hot queries are not using their indexes:\n  " + "\n  ".join(problems))
+    logger.info("MongoDB query plans verified.")
+
+
 def init_db():
     global db
-    client = MongoClient(MONGO_URI)
+    if db is not None:
+        return db
+    client = MongoClient(MONGO_URI, event_listeners=mongo_event_listeners())
     db = client[DB_NAME]
-    print("MongoDB connected successfully!")
+    logger.info("MongoDB connected successfully!")
+
+    if ENSURE_INDEXES:
+        ensure_indexes(db)
+    if VERIFY_QUERY_PLANS:
+        verify_query_plans(db)
     return db  # Ensure it returns a valid reference
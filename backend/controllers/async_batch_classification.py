@@ -0,0 +1,66 @@
+import asyncio
+
+from models.async_session_model import AsyncSession
+from ml_model.async_inference import (
+    run_blocking, wait_until_ready_async, fetch_image_async, get_recommendation_async
+)
+from controllers.batch_classification import (
+    BATCH_FETCH_WORKERS, items_for_sessions, check_options, classify_downloaded,
+    attach_results, results_to_store, batch_summary
+)
+from utils.metrics import span
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+async def items_for_sessions_async(session_ids):
+    return items_for_sessions(session_ids, await AsyncSession.get_image_urls_by_session_ids(session_ids))
+
+
+async def _fetch(item, semaphore):
+    async with semaphore:
+        try:
+            item.image = await fetch_image_async(item.image_url)
+        except Exception as e:
+            logger.warning("Batch image download failed for %s: %s", item.session_id or item.image_url, e)
+            item.error = f"Failed to download image: {e}"
+
+
+async def _recommendation(acne_type):
+    try:
+        return await get_recommendation_async(acne_type)
+    except Exception as e:
+        logger.exception("Recommendation failed for %s", acne_type)
+        return e
+
+
+async def classify_batch_async(items, recommend=True, save=True):
+    """
+    classify_batch for the ASGI app: downloads and recommendations run on the
+    event loop, only preprocessing and the model batch go to the CPU pool.
+    """
+    check_options(recommend, save)
+    await wait_until_ready_async()
+
+    semaphore = asyncio.Semaphore(BATCH_FETCH_WORKERS)
+    with span("batch_download"):
+        await asyncio.gather(*(_fetch(item, semaphore) for item in items if item.error is None))
+
+    classified = await run_blocking(classify_downloaded, items)
+
+    recommendations = None
+    if recommend:
+        acne_types = list({classification["acne_type"] for _, classification in classified})
+        recommendations = dict(zip(acne_types, await asyncio.gather(*map(_recommendation, acne_types))))
+    attach_results(classified, recommendations)
+
+    stored = 0
+    if save:
+        with span("save_results"):
+            success, outcome = await AsyncSession.bulk_update_classification_results(results_to_store(items))
+        if not success:
+            raise RuntimeError(outcome)
+        stored = outcome
+
+    return batch_summary(items, stored)
@@ -1,51 +1,184 @@
-import firebase_admin
-from firebase_admin import auth, credentials
-from flask import request, jsonify
-from config.database import users_collection
+"""
+Firebase ID-token checks, request validation and response bodies shared by
+routes/auth_routes.py and routes/async_auth_routes.py.
+
+With FIREBASE_VERIFY_TOKENS=true, /verify-token requires an ID token (JSON
+"token" or `Authorization: Bearer ...`) and takes uid/email/name from its
+verified claims. Otherwise it keeps trusting the uid sent by the frontend,
+which is only acceptable for local development.
+"""
+import os
+import json
+import asyncio
+import threading
 import traceback
 
-# Initialize Firebase
-cred = credentials.Certificate("config/firebase_credentials.json")
-firebase_admin.initialize_app(cred)
- 
-def verify_firebase_token():
-    """
-    Verifies the Firebase ID token sent from the frontend.
-    If the user does not exist in MongoDB, it creates a new entry.
-    """
-    try:
-        # Get token from request
-        data = request.json
-        firebase_token = data.get("token")
+from config.firebase_config import FIREBASE_CRED_PATH
+from controllers.request_errors import RequestError
+from models.user_model import UserNotFound, EmailInUse
+from utils.token_verifier import FirebaseTokenVerifier, TokenVerificationError, KeyFetchError
+from utils.logger import get_logger, log_payload
+
+logger = get_logger(__name__)
+
+# === Config ===
+FIREBASE_VERIFY_TOKENS = os.getenv("FIREBASE_VERIFY_TOKENS", "false").lower() in ("1", "true", "yes")
+FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID")
+
+_verifier = None
+_verifier_lock = threading.Lock()
+
+
+class MissingToken(ValueError):
+    """Verification is enabled and the request carries no ID token."""
+
+
+def firebase_project_id():
+    """FIREBASE_PROJECT_ID, else the project_id of the service-account file."""
+    if FIREBASE_PROJECT_ID:
+        return FIREBASE_PROJECT_ID
+    if FIREBASE_CRED_PATH and os.path.exists(FIREBASE_CRED_PATH):
+        with open(FIREBASE_CRED_PATH) as f:
+            project_id = json.load(f).get("project_id")
+        if project_id:
+            return project_id
+    raise RuntimeError("Set FIREBASE_PROJECT_ID (or FIREBASE_CRED_PATH) to verify Firebase ID tokens")
+
+
+def get_verifier():
+    """Process-wide verifier, so the key set and token cache are shared by all requests."""
+    global _verifier
+    if _verifier is None:
+        with _verifier_lock:
+            if _verifier is None:
+                _verifier = FirebaseTokenVerifier(firebase_project_id())
+    return _verifier
+
+
+def set_verifier(verifier):
+    """Swap in a verifier (e.g. one built with utils.token_verifier.static_keys)."""
+    global _verifier
+    _verifier = verifier
+
 
-        if not firebase_token:
-            return jsonify({"error": "Token is required"}), 400
+def token_from_request(data, headers):
+    header = headers.get("Authorization", "")
+    if header.startswith("Bearer "):
+        return header[len("Bearer "):].strip()
+    token = (data or {}).get("token")
+    if not token:
+        raise MissingToken("Token is required")
+    return token
 
-        # Verify Firebase token
-        decoded_token = auth.verify_id_token(firebase_token)
-        uid = decoded_token["uid"]
-        email = decoded_token.get("email", "")
-        name = decoded_token.get("name", "Unknown")
 
-        # Check if user exists in MongoDB
-        existing_user = users_collection.find_one({"uid": uid})
-        if not existing_user:
-            user_data = {"uid": uid, "email": email, "name": name}
-            users_collection.insert_one(user_data)
+def identity_from_claims(claims, data):
+    """(uid, email, name) for ensure_user; the token wins, the body only fills in a missing name."""
+    name = claims.get("name") or (data or {}).get("name") or "Unknown"
+    return claims["uid"], claims.get("email"), name
 
-        return jsonify({"message": "User verified successfully", "uid": uid}), 200
 
-    except Exception as e:
-        return jsonify({"error": str(e), "traceback": traceback.format_exc()}), 400
+def verify_request_token(data, headers):
+    """Verified claims for a sync request (cache hit, or local signature check)."""
+    return get_verifier().verify(token_from_request(data, headers))
 
 
-def update_name_logic(uid, name):
+async def verify_request_token_async(data, headers):
+    """Like verify_request_token, but a cache miss is verified off the event loop."""
+    verifier = get_verifier()
+    token = token_from_request(data, headers)
+    claims = verifier.cached_claims(token)
+    if claims is None:
+        # A key refresh is blocking I/O; signature checks are CPU work
+        claims = await asyncio.to_thread(verifier.verify, token, False)
+    return claims
+
+
+# === Errors ===
+def as_request_error(error, endpoint):
+    """What the auth blueprints' errorhandler answers for `error` raised by `endpoint`."""
+    if isinstance(error, RequestError):
+        return error
+    if isinstance(error, MissingToken):
+        logger.info("verify-token rejected: token missing")
+        return RequestError("Token is required", 400)
+    if isinstance(error, TokenVerificationError):
+        logger.info("verify-token rejected: %s", error)
+        return RequestError("Invalid token", 401)
+    if isinstance(error, KeyFetchError):
+        logger.error("Firebase signing keys unavailable", exc_info=error)
+        return RequestError("Token verification unavailable", 503)
+    if isinstance(error, EmailInUse):
+        logger.info("verify-token rejected: %s", error)
+        return RequestError("Email is already registered to another account", 409)
+    if isinstance(error, UserNotFound):
+        return RequestError("User not found", 404)
+
+    name = (endpoint or "").rsplit(".", 1)[-1]
+    logger.error("Error in %s", name, exc_info=error)
+    if name == "check_user_info":
+        return RequestError(str(error), 500)
+    if name == "verify_token":
+        return RequestError("Internal Server Error", 500, details=str(error),
+                            traceback="".join(traceback.format_exception(error)))
+    return RequestError("Internal Server Error", 500, details=str(error))
+
+
+# === Requests ===
+def request_identity(data, claims=None):
     """
-    Updates the name of a user in MongoDB.
+    (uid, email, name) for ensure_user: from verified `claims` when tokens are
+    checked, else straight from the body (local development only).
     """
-    user = User.find_by_uid(uid)
+    log_payload(logger, "verify-token payload", data)
+    if claims is not None:
+        uid, email, name = identity_from_claims(claims, data)
+    else:
+        uid, email, name = data.get('uid'), data.get('email'), data.get('name', 'Unknown')
+
+    if not uid:
+        logger.info("verify-token rejected: UID missing")
+        raise RequestError("UID is required")
+    if not email:
+        logger.warning("Email missing for UID %s", uid)
+    return uid, email, name
+
+
+def authenticated(uid, created):
+    if created:
+        logger.info("New user %s, created in MongoDB", uid)
+    logger.debug("User %s authenticated", uid)
+    return {'message': 'User authenticated successfully', 'uid': uid}
+
+
+def user_info_uid(data):
+    log_payload(logger, "check-user-info payload", data)
+    uid = data.get('uid')
+    if not uid:
+        logger.info("check-user-info rejected: UID missing")
+        raise RequestError("UID is required")
+    return uid
+
+
+def user_info(uid, user):
+    """Whether the user's name is still "Unknown" and needs an update."""
     if not user:
-        return {"error": "User not found"}, 404
+        logger.info("User with UID %s not found", uid)
+        raise RequestError("User not found", 404)
+    requires_update = user.get("name", "Unknown") == "Unknown"
+    logger.debug("Name check for %s: requiresUpdate=%s", uid, requires_update)
+    return {'requiresUpdate': requires_update, 'name': user.get("name", "Unknown")}
+
+
+def name_update_params(data):
+    log_payload(logger, "update-name payload", data)
+    uid = data.get('uid')
+    name = data.get('name')
+    if not uid or not name:
+        logger.info("update-name rejected: missing UID or Name")
+        raise RequestError("UID and Name are required")
+    return uid, name
+
 
-    User.update_name(uid, name)
-    return {"message": "Name updated successfully"}, 200
\ No newline at end of file
+def name_updated(uid):
+    logger.info("Updated name for user %s", uid)
+    return {'message': 'User name updated successfully'}
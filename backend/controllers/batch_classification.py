@@ -0,0 +1,197 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from models.session_model import Session
+from ml_model.classifier import fetch_image, classify_images, get_recommendation, wait_until_ready
+from utils.metrics import span
+from utils.logger import get_logger, get_request_id, set_request_id, reset_request_id
+
+logger = get_logger(__name__)
+
+# === Config ===
+# Most images one call accepts; bigger re-runs go through the CLI (controllers.reclassify) in chunks
+MAX_BATCH_ITEMS = int(os.getenv("MAX_BATCH_ITEMS", "256"))
+# Concurrent image downloads per batch
+BATCH_FETCH_WORKERS = int(os.getenv("BATCH_FETCH_WORKERS", "16"))
+
+_fetch_pool = ThreadPoolExecutor(max_workers=BATCH_FETCH_WORKERS, thread_name_prefix="batch-fetch")
+
+
+class BatchItem:
+    """One image of a batch: where it came from and what happened to it."""
+
+    def __init__(self, session_id=None, image_url=None):
+        self.session_id = session_id
+        self.image_url = image_url
+        self.image = None
+        self.result = None
+        self.error = None
+
+    def to_dict(self):
+        item = {"image_url": self.image_url}
+        if self.session_id is not None:
+            item["session_id"] = self.session_id
+        if self.error is not None:
+            item["error"] = self.error
+        else:
+            item["result"] = self.result
+        return item
+
+
+def _fetch(item, request_id):
+    # Pool threads don't inherit the caller's context; keep its request id in their logs
+    _, token = set_request_id(request_id)
+    try:
+        item.image = fetch_image(item.image_url)
+    except Exception as e:
+        logger.warning("Batch image download failed for %s: %s", item.session_id or item.image_url, e)
+        item.error = f"Failed to download image: {e}"
+    finally:
+        reset_request_id(token)
+
+
+def parse_flag(data, name, default):
+    """A JSON boolean option; "true"/"false"-style strings are accepted, anything else is a ValueError."""
+    value = data.get(name, default)
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "1", "yes"):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ("false", "0", "no"):
+        return False
+    raise ValueError(f"{name} must be a boolean")
+
+
+def check_options(recommend, save):
+    """The one save/recommend rule, for the routes (via parse_batch_request), the CLI and classify_batch."""
+    if save and not recommend:
+        # The stored document always carries a recommendation; don't blank it
+        raise ValueError("save requires recommend")
+
+
+def parse_batch_request(data):
+    """
+    Validate a /batch-classify body shared by the sync and async routes.
+    Returns (session_ids, image_urls, recommend, save), exactly one of the
+    first two set; raises ValueError with a client-facing message.
+    """
+    session_ids = data.get("session_ids")
+    image_urls = data.get("image_urls")
+    recommend = parse_flag(data, "recommend", True)
+    save = parse_flag(data, "save", True)
+
+    values = session_ids if session_ids is not None else image_urls
+    if (session_ids is None) == (image_urls is None) or not isinstance(values, list) or not values:
+        raise ValueError("Provide a non-empty list of either session_ids or image_urls")
+    if not all(isinstance(value, str) and value for value in values):
+        raise ValueError("session_ids / image_urls must be strings")
+    if len(values) > MAX_BATCH_ITEMS:
+        raise ValueError(f"At most {MAX_BATCH_ITEMS} items per batch")
+    check_options(recommend, save)
+    return session_ids, image_urls, recommend, save
+
+
+def items_for_sessions(session_ids, urls=None):
+    """BatchItems for `session_ids`; pass `urls` when the caller already looked them up."""
+    if urls is None:
+        urls = Session.get_image_urls_by_session_ids(session_ids)
+    items = []
+    for session_id in session_ids:
+        item = BatchItem(session_id, urls.get(session_id))
+        if item.image_url is None:
+            item.error = "No image found in session"
+        items.append(item)
+    return items
+
+
+def items_for_urls(image_urls):
+    return [BatchItem(image_url=image_url) for image_url in image_urls]
+
+
+# === Batch steps (shared with controllers.async_batch_classification) ===
+def classify_downloaded(items):
+    """
+    Classify every downloaded item as one batch. Returns [(item, classification)];
+    if the model fails, every item gets the error instead.
+    """
+    ready = [item for item in items if item.error is None]
+    try:
+        classifications = classify_images([item.image for item in ready])
+    except Exception as e:
+        logger.exception("Batch classification failed")
+        for item in ready:
+            item.error = f"Model failed to classify the image: {e}"
+        return []
+    for item in ready:
+        item.image = None  # release the decoded image as soon as it is classified
+    return list(zip(ready, classifications))
+
+
+def attach_results(classified, recommendations):
+    """
+    Set each item's result from its classification and `recommendations`
+    ({acne_type: text or the Exception it failed with}; None when not requested).
+    """
+    for item, classification in classified:
+        recommendation = None
+        if recommendations is not None:
+            recommendation = recommendations[classification["acne_type"]]
+            if isinstance(recommendation, Exception):
+                item.error = f"Recommendation failed: {recommendation}"
+                continue
+        item.result = {
+            "classification": classification,
+            "recommendation": recommendation,
+            "image_url": item.image_url
+        }
+
+
+def results_to_store(items):
+    return {item.session_id: item.result for item in items if item.session_id and item.result is not None}
+
+
+def batch_summary(items, stored):
+    return {
+        "results": [item.to_dict() for item in items],
+        "classified": sum(1 for item in items if item.result is not None),
+        "failed": sum(1 for item in items if item.error is not None),
+        "stored": stored
+    }
+
+
+def classify_batch(items, recommend=True, save=True):
+    """
+    Download every item's image concurrently, classify them as one batch,
+    attach the (cached, one per acne type) recommendation and store session
+    results with a single bulk_write. Per-item failures are recorded on the
+    item; the rest of the batch still goes through.
+    """
+    check_options(recommend, save)
+    wait_until_ready()
+
+    request_id = get_request_id()
+    with span("batch_download"):
+        list(_fetch_pool.map(lambda item: _fetch(item, request_id), [item for item in items if item.error is None]))
+
+    classified = classify_downloaded(items)
+
+    recommendations = None
+    if recommend:
+        recommendations = {}
+        for acne_type in {classification["acne_type"] for _, classification in classified}:
+            try:
+                recommendations[acne_type] = get_recommendation(acne_type)
+            except Exception as e:
+                logger.exception("Recommendation failed for %s", acne_type)
+                recommendations[acne_type] = e
+    attach_results(classified, recommendations)
+
+    stored = 0
+    if save:
+        with span("save_results"):
+            success, outcome = Session.bulk_update_classification_results(results_to_store(items))
+        if not success:
+            raise RuntimeError(outcome)
+        stored = outcome
+
+    return batch_summary(items, stored)
@@ -0,0 +1,149 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from models.session_model import Session
+from ml_model.classifier import fetch_image, classify_image, get_recommendation, wait_until_ready
+from utils.logger import get_logger, get_request_id, set_request_id, reset_request_id
+
+logger = get_logger(__name__)
+
+# === Config ===
+CLASSIFY_WORKERS = int(os.getenv("CLASSIFY_WORKERS", "2"))
+RECOMMEND_WORKERS = int(os.getenv("RECOMMEND_WORKERS", "4"))
+JOB_RETENTION_SECONDS = int(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+
+# Job states, in pipeline order
+QUEUED = "queued"
+CLASSIFYING = "classifying"
+RECOMMENDING = "recommending"
+SAVING = "saving"
+DONE = "done"
+FAILED = "failed"
+
+PROGRESS = {QUEUED: 0, CLASSIFYING: 25, RECOMMENDING: 60, SAVING: 90, DONE: 100, FAILED: 100}
+
+
+class ClassificationJob:
+    def __init__(self, session_id, image_url):
+        self.job_id = str(uuid.uuid4())
+        self.session_id = session_id
+        self.image_url = image_url
+        self.state = QUEUED
+        self.classification = None
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.updated_at = self.created_at
+        # Correlation id of the request that queued the job, carried into worker logs
+        self.request_id = get_request_id()
+
+    def set_state(self, state):
+        self.state = state
+        self.updated_at = time.time()
+
+    def is_finished(self):
+        return self.state in (DONE, FAILED)
+
+    def to_dict(self):
+        return {
+            "job_id": self.job_id,
+            "session_id": self.session_id,
+            "status": self.state,
+            "progress": PROGRESS[self.state],
+            "classification": self.classification,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class ClassificationJobQueue:
+    """
+    Two-stage pipeline so a slow LLM call never holds a request thread:
+    the classify pool downloads + runs the CNN, then hands the job to the
+    recommend pool, which calls the LLM and saves via Session.update_classification_results.
+    Jobs live in memory, so status polling must reach the same process that accepted the upload.
+    """
+
+    def __init__(self, classify_workers=CLASSIFY_WORKERS, recommend_workers=RECOMMEND_WORKERS):
+        self._classify_pool = ThreadPoolExecutor(max_workers=classify_workers, thread_name_prefix="classify-job")
+        self._recommend_pool = ThreadPoolExecutor(max_workers=recommend_workers, thread_name_prefix="recommend-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, session_id, image_url):
+        job = ClassificationJob(session_id, image_url)
+        with self._lock:
+            self._prune()
+            self._jobs[job.job_id] = job
+        self._classify_pool.submit(self._classify_stage, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+            return {"jobs": len(self._jobs), "by_status": counts}
+
+    # === Stages ===
+    def _classify_stage(self, job):
+        _, token = set_request_id(job.request_id)
+        try:
+            job.set_state(CLASSIFYING)
+            wait_until_ready(timeout=None)
+
+            image = fetch_image(job.image_url)
+            job.classification = classify_image(image)
+            job.set_state(RECOMMENDING)
+            self._recommend_pool.submit(self._recommend_stage, job)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            reset_request_id(token)
+
+    def _recommend_stage(self, job):
+        _, token = set_request_id(job.request_id)
+        try:
+            recommendation = get_recommendation(job.classification["acne_type"])
+            result = {
+                "classification": job.classification,
+                "recommendation": recommendation,
+                "image_url": job.image_url
+            }
+
+            job.set_state(SAVING)
+            success, message = Session.update_classification_results(job.session_id, result)
+            if not success:
+                raise RuntimeError(message)
+
+            job.result = result
+            job.set_state(DONE)
+            logger.info("Job %s finished for session %s", job.job_id, job.session_id)
+        except Exception as e:
+            self._fail(job, e)
+        finally:
+            reset_request_id(token)
+
+    def _fail(self, job, error):
+        job.error = str(error)
+        job.set_state(FAILED)
+        logger.error("Job %s failed for session %s: %s", job.job_id, job.session_id, error, exc_info=error)
+
+    def _prune(self):
+        # Caller holds self._lock
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        expired = [job_id for job_id, job in self._jobs.items() if job.is_finished() and job.updated_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+job_queue = ClassificationJobQueue()
@@ -0,0 +1,443 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+import numpy as np
+
+from utils.geo import geohash_encode, geohash_bounds, geohash_center, haversine_km
+from utils.http_client import http_client
+from utils.logger import get_logger
+from utils.metrics import span, registry
+
+logger = get_logger(__name__)
+
+PLACES_URL = "https://maps.googleapis.com/maps/api/place/nearbysearch/json"
+USE_MOCK_DATA = False  # Set to True if you want mock data during testing
+
+MOCK_DERMATOLOGISTS = [
+    {
+        "name": "Dr. Sarah Johnson",
+        "vicinity": "123 Health Avenue, Pune",
+        "rating": 4.8,
+        "user_ratings_total": 124,
+        "place_id": "mock-place-1",
+        "distance_km": 2.5
+    },
+    {
+        "name": "Dermatology Specialists",
+        "vicinity": "456 Medical Plaza, Pune",
+        "rating": 4.5,
+        "user_ratings_total": 89,
+        "place_id": "mock-place-2",
+        "distance_km": 4.1
+    },
+]
+
+
+# === Config ===
+# google: live Nearby Search; fixture: places read from PLACES_FIXTURE_PATH (local runs, tests)
+PLACES_PROVIDER = os.getenv("PLACES_PROVIDER", "google").lower()
+PLACES_FIXTURE_PATH = os.getenv("PLACES_FIXTURE_PATH", "")
+# How long one provider answer serves every lookup in its geohash cell (and its places stay indexed)
+PLACES_CACHE_TTL_SECONDS = int(os.getenv("PLACES_CACHE_TTL_SECONDS", str(24 * 3600)))
+# Cell size of the cache key: 5 is ~4.9 x 4.9 km, 6 is ~1.2 x 0.6 km
+PLACES_GEOHASH_PRECISION = int(os.getenv("PLACES_GEOHASH_PRECISION", "5"))
+# A full page from the provider may have dropped places; such cells are split down to this precision (7 is ~150 m)
+PLACES_MAX_GEOHASH_PRECISION = int(os.getenv("PLACES_MAX_GEOHASH_PRECISION", str(PLACES_GEOHASH_PRECISION + 2)))
+# Longest a request waits on another request's provider call for the same cell
+PLACES_WAIT_SECONDS = float(os.getenv("PLACES_WAIT_SECONDS", "30"))
+MAX_RADIUS_M = 50000  # Nearby Search limit
+
+# What the route returns: within 10 km, 4+ stars, nearest 4
+MAX_DISTANCE_KM = 10
+MIN_RATING = 4
+RESULT_LIMIT = 4
+
+
+class PlacesLookupError(RuntimeError):
+    """Bad input or an upstream failure; `status_code` is what the route should return."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def parse_coordinates(lat, lng):
+    """Validate the lat/lng query args; raises PlacesLookupError."""
+    if not lat or not lng:
+        raise PlacesLookupError("Must provide lat & lng parameters", 400)
+    try:
+        lat = float(lat)
+        lng = float(lng)
+    except ValueError:
+        raise PlacesLookupError("Invalid lat/lng format", 400)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise PlacesLookupError("lat/lng out of range", 400)
+    return lat, lng
+
+
+def parse_radius(radius):
+    if radius is None or radius <= 0:
+        raise PlacesLookupError("radius must be a positive number of meters", 400)
+    return min(radius, MAX_RADIUS_M)
+
+
+def place_coordinates(place):
+    location = place.get("geometry", {}).get("location", {})
+    lat, lng = location.get("lat"), location.get("lng")
+    if lat is None or lng is None:
+        return None
+    return float(lat), float(lng)
+
+
+def dermatologist_entry(place, distance_km):
+    return {
+        "name": place.get("name", "Unknown"),
+        "vicinity": place.get("vicinity", "Address not available"),
+        "rating": place.get("rating", 0),
+        "user_ratings_total": place.get("user_ratings_total", 0),
+        "place_id": place.get("place_id", ""),
+        "distance_km": round(float(distance_km), 2)
+    }
+
+
+# === Providers ===
+# nearby(lat, lng, radius_m) / nearby_async(...) -> Nearby Search result dicts
+class GooglePlacesProvider:
+    name = "google"
+    page_size = 20  # Nearby Search returns the 20 most prominent matches per call
+
+    def params(self, lat, lng, radius):
+        api_key = os.getenv("GOOGLE_PLACES_API_KEY")
+        if not api_key:
+            raise PlacesLookupError("Google Places API key not configured", 500)
+        return {
+            "location": f"{lat},{lng}",
+            "radius": radius,
+            "type": "doctor",
+            "keyword": "dermatologist",
+            "key": api_key
+        }
+
+    def nearby(self, lat, lng, radius):
+        params = self.params(lat, lng, radius)
+        with span("places_lookup"):
+            response = http_client.get(PLACES_URL, upstream="google-places", params=params)
+        return self.results(response.status_code, response.json() if response.status_code == 200 else None)
+
+    async def nearby_async(self, lat, lng, radius):
+        # httpx is only installed for the ASGI app
+        from utils.async_http_client import async_http_client
+
+        params = self.params(lat, lng, radius)
+        with span("places_lookup"):
+            response = await async_http_client.get(PLACES_URL, upstream="google-places", params=params)
+        return self.results(response.status_code, response.json() if response.status_code == 200 else None)
+
+    @staticmethod
+    def results(status_code, data):
+        if status_code != 200:
+            raise PlacesLookupError("Failed to fetch from Google Places API", 502)
+        status = data.get("status")
+        if status == "ZERO_RESULTS":
+            return []
+        if status != "OK":
+            raise PlacesLookupError(f"Google Places API error: {data.get('error_message', 'Unknown error')}", 502)
+        return data.get("results", [])
+
+
+class FixturePlacesProvider:
+    """Places from a JSON file (a Nearby Search body or its `results` list); never touches the network."""
+    name = "fixture"
+    page_size = None  # every place within the radius
+
+    def __init__(self, places):
+        self.places = [place for place in places if place_coordinates(place)]
+
+    @classmethod
+    def from_file(cls, path):
+        if not path:
+            raise ValueError("PLACES_PROVIDER=fixture needs PLACES_FIXTURE_PATH")
+        with open(path) as f:
+            data = json.load(f)
+        return cls(data.get("results", []) if isinstance(data, dict) else data)
+
+    def nearby(self, lat, lng, radius):
+        if not self.places:
+            return []
+        lats, lngs = zip(*(place_coordinates(place) for place in self.places))
+        within = haversine_km(lat, lng, lats, lngs) <= radius / 1000.0
+        return [place for place, keep in zip(self.places, within) if keep]
+
+    async def nearby_async(self, lat, lng, radius):
+        return self.nearby(lat, lng, radius)
+
+
+# === Local spatial index ===
+class PlaceIndex:
+    """
+    Every place seen in a provider answer, as flat NumPy arrays, so a lookup
+    is one vectorized haversine + mask over all of them. Entries expire with
+    the cache TTL; a place seen again is refreshed in place, and expired
+    rows are dropped whenever new places are added.
+    """
+
+    def __init__(self, ttl_seconds=PLACES_CACHE_TTL_SECONDS):
+        self.ttl = ttl_seconds
+        self._lock = threading.Lock()
+        self._rows = {}  # place key -> row
+        self._keys = []
+        self._places = []
+        self._lats = np.empty(0)
+        self._lngs = np.empty(0)
+        self._ratings = np.empty(0)
+        self._expires = np.empty(0)
+
+    def add(self, places):
+        now = time.time()
+        expires = now + self.ttl
+        with self._lock:
+            self._compact(now)
+            new_rows = {}  # key -> position in this batch's new_* lists
+            new_keys, new_places, new_values = [], [], []
+            for place in places:
+                coords = place_coordinates(place)
+                if coords is None:
+                    continue
+                key = place.get("place_id") or f"{coords}:{place.get('name')}"
+                rating = float(place.get("rating", 0) or 0)
+                row = self._rows.get(key)
+                if row is not None:
+                    self._places[row] = place
+                    self._lats[row], self._lngs[row] = coords
+                    self._ratings[row], self._expires[row] = rating, expires
+                    continue
+                # The same place can appear twice in one answer; the last copy wins
+                position = new_rows.get(key)
+                if position is not None:
+                    new_places[position] = place
+                    new_values[position] = (coords[0], coords[1], rating, expires)
+                    continue
+                new_rows[key] = len(new_places)
+                new_keys.append(key)
+                new_places.append(place)
+                new_values.append((coords[0], coords[1], rating, expires))
+
+            if new_values:
+                lats, lngs, ratings, expiries = (np.array(column) for column in zip(*new_values))
+                offset = len(self._places)
+                self._keys.extend(new_keys)
+                self._places.extend(new_places)
+                self._lats = np.concatenate([self._lats, lats])
+                self._lngs = np.concatenate([self._lngs, lngs])
+                self._ratings = np.concatenate([self._ratings, ratings])
+                self._expires = np.concatenate([self._expires, expiries])
+                self._rows.update((key, offset + position) for key, position in new_rows.items())
+
+    def _compact(self, now):
+        """Caller holds `_lock`. Drop every expired row and renumber the rest."""
+        keep = self._expires > now
+        if keep.all():
+            return
+        rows = np.flatnonzero(keep)
+        self._keys = [self._keys[row] for row in rows]
+        self._places = [self._places[row] for row in rows]
+        self._rows = {key: row for row, key in enumerate(self._keys)}
+        self._lats, self._lngs = self._lats[rows], self._lngs[rows]
+        self._ratings, self._expires = self._ratings[rows], self._expires[rows]
+
+    def nearest(self, lat, lng, max_km=MAX_DISTANCE_KM, min_rating=MIN_RATING, limit=RESULT_LIMIT):
+        with self._lock:
+            if not self._places:
+                return []
+            distances = haversine_km(lat, lng, self._lats, self._lngs)
+            mask = (distances <= max_km) & (self._ratings >= min_rating) & (self._expires > time.time())
+            rows = np.flatnonzero(mask)
+            rows = rows[np.argsort(distances[rows], kind="stable")][:limit]
+            return [dermatologist_entry(self._places[row], distances[row]) for row in rows]
+
+    def __len__(self):
+        return len(self._places)
+
+
+# === Cached lookup ===
+class DermatologistLocator:
+    """
+    Nearest-dermatologist lookups answered from a PlaceIndex. The provider is
+    only asked when the caller's geohash cell has no fresh answer at that
+    radius. It is queried from the cell centre with the radius widened by
+    the centre-to-corner distance, so one answer covers everyone in the cell.
+
+    That answer is not the one the caller's own location would get: Google
+    returns only the 20 most prominent matches, and the wider circle around
+    another centre can rank in places far from the caller and push out ones
+    next to them. So a cell whose answer fills a whole page is treated as
+    truncated and the lookup moves to the caller's sub-cell (one geohash
+    character finer, down to PLACES_MAX_GEOHASH_PRECISION), whose centre and
+    radius are closer to the caller's own. Every answer stays indexed, so
+    callers get the union of the cell and sub-cell results.
+
+    Concurrent misses on the same cell share one provider call.
+    """
+
+    def __init__(self, provider, ttl_seconds=PLACES_CACHE_TTL_SECONDS, precision=PLACES_GEOHASH_PRECISION,
+                 max_precision=PLACES_MAX_GEOHASH_PRECISION):
+        self.provider = provider
+        self.ttl = ttl_seconds
+        self.precision = precision
+        self.max_precision = max(precision, max_precision)
+        self.index = PlaceIndex(ttl_seconds)
+        self._cells = {}  # (cell, radius) -> (expires_at, answer filled a whole page)
+        self._pending = {}  # (cell, radius) -> Future of the provider call in flight
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def find(self, lat, lng, radius):
+        first = True
+        while True:
+            query, pending = self._provider_query(lat, lng, radius, count_hit=first)
+            first = False
+            if query is None and pending is None:
+                return self._answer(lat, lng, radius)
+            if query is None:
+                # Another request is already asking the provider for this cell
+                try:
+                    pending.result(timeout=PLACES_WAIT_SECONDS)
+                except FutureTimeoutError:
+                    raise PlacesLookupError("Timed out waiting for the Places lookup", 504)
+                continue
+            key, center_lat, center_lng, query_radius = query
+            try:
+                places = self.provider.nearby(center_lat, center_lng, query_radius)
+            except BaseException as e:
+                self._fail(key, pending, e)
+                raise
+            if not self._store(key, places, pending):
+                return self._answer(lat, lng, radius)
+
+    async def find_async(self, lat, lng, radius):
+        first = True
+        while True:
+            query, pending = self._provider_query(lat, lng, radius, count_hit=first)
+            first = False
+            if query is None and pending is None:
+                return self._answer(lat, lng, radius)
+            if query is None:
+                try:
+                    # shield: timing out must not cancel the Future other requests wait on
+                    await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(pending)), PLACES_WAIT_SECONDS)
+                except asyncio.TimeoutError:
+                    raise PlacesLookupError("Timed out waiting for the Places lookup", 504)
+                continue
+            key, center_lat, center_lng, query_radius = query
+            try:
+                places = await self.provider.nearby_async(center_lat, center_lng, query_radius)
+            except BaseException as e:
+                self._fail(key, pending, e)
+                raise
+            if not self._store(key, places, pending):
+                return self._answer(lat, lng, radius)
+
+    def _provider_query(self, lat, lng, radius, count_hit=True):
+        """
+        (None, None) when the caller's cell is fresh, (None, future) when its
+        provider call is already in flight, else ((cache key, centre lat,
+        centre lng, widened radius), future this caller must resolve).
+        """
+        finest = geohash_encode(lat, lng, self.max_precision)
+        now = time.time()
+        with self._lock:
+            for precision in range(self.precision, self.max_precision + 1):
+                key = (finest[:precision], radius)
+                expires, full_page = self._cells.get(key, (0, False))
+                if expires <= now:
+                    break
+                if not full_page or precision == self.max_precision:
+                    # A lookup that waited or refined was already counted as coalesced / miss
+                    self.hits += count_hit
+                    return None, None
+
+            pending = self._pending.get(key)
+            if pending is not None:
+                self.coalesced += 1
+                return None, pending
+            self.misses += 1
+            pending = self._pending[key] = Future()
+
+        cell = key[0]
+        center_lat, center_lng = geohash_center(cell)
+        _, _, max_lat, max_lng = geohash_bounds(cell)
+        half_diagonal_m = float(haversine_km(center_lat, center_lng, max_lat, max_lng)) * 1000.0
+        return (key, center_lat, center_lng, min(int(radius + half_diagonal_m) + 1, MAX_RADIUS_M)), pending
+
+    def _store(self, key, places, pending):
+        try:
+            self.index.add(places)
+            full_page = self.provider.page_size is not None and len(places) >= self.provider.page_size
+            now = time.time()
+            with self._lock:
+                self._cells = {cell: entry for cell, entry in self._cells.items() if entry[0] > now}
+                self._cells[key] = (now + self.ttl, full_page)
+                self._pending.pop(key, None)
+        except BaseException as e:
+            self._fail(key, pending, e)
+            raise
+        if not pending.done():
+            pending.set_result(None)
+        logger.debug("Indexed %d places for cell %s (radius %s m)", len(places), key[0], key[1])
+        # True when the caller should go on to its sub-cell
+        return full_page and len(key[0]) < self.max_precision
+
+    def _fail(self, key, pending, error):
+        """Waiters on this cell get the same error; the next request asks the provider again."""
+        with self._lock:
+            self._pending.pop(key, None)
+        if not isinstance(error, Exception):
+            # e.g. the asking request was cancelled; don't cancel the others with it
+            error = PlacesLookupError("Places lookup was interrupted", 503)
+        if not pending.done():
+            pending.set_exception(error)
+
+    def _answer(self, lat, lng, radius):
+        # The provider only ever returned places within `radius`; keep that true for indexed ones
+        return self.index.nearest(lat, lng, max_km=min(MAX_DISTANCE_KM, radius / 1000.0))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "provider": self.provider.name,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "cells": len(self._cells),
+                "places": len(self.index)
+            }
+
+
+def make_provider(name=PLACES_PROVIDER):
+    if name == "fixture":
+        return FixturePlacesProvider.from_file(PLACES_FIXTURE_PATH)
+    return GooglePlacesProvider()
+
+
+locator = DermatologistLocator(make_provider())
+
+
+def _places_metric_lines():
+    stats = locator.stats()
+    return [
+        "# TYPE skincare_places_lookups_total counter",
+        f'skincare_places_lookups_total{{result="hit"}} {stats["hits"]}',
+        f'skincare_places_lookups_total{{result="miss"}} {stats["misses"]}',
+        f'skincare_places_lookups_total{{result="coalesced"}} {stats["coalesced"]}',
+        "# TYPE skincare_places_indexed gauge",
+        f"skincare_places_indexed {stats['places']}",
+    ]
+
+
+registry.register_collector(_places_metric_lines)
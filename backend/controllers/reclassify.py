@@ -0,0 +1,114 @@
+"""
+Re-run the classifier over stored sessions or image URLs, e.g. after
+deploying a new do7.keras. Works in chunks of --batch-size: each chunk's
+images are fetched concurrently, predicted as one batch and stored with one
+bulk write (see controllers.batch_classification).
+
+    cd backend
+    python -m controllers.reclassify --all
+    python -m controllers.reclassify --session-ids 1f0c... 9a2b...
+    python -m controllers.reclassify --ids-file ids.txt --batch-size 128
+    python -m controllers.reclassify --image-urls https://i.ibb.co/... --no-save
+"""
+import sys
+import json
+import argparse
+
+from utils.logger import setup_logging, get_logger
+setup_logging()
+
+from config.database import init_db
+db = init_db()  # before the imports below, which bind config.database.db
+
+from controllers.batch_classification import items_for_sessions, items_for_urls, classify_batch
+from ml_model.classifier import start_background_loading, wait_until_ready
+
+logger = get_logger(__name__)
+
+
+def iter_all_session_ids(limit=None, page_size=64):
+    """
+    Every session with at least one image, in session_id order (served by the
+    session_id index). Read one keyset page at a time, so no cursor stays open
+    while a chunk is being classified (the server drops idle cursors after 10 minutes).
+    """
+    query = {"images.0": {"$exists": True}}
+    last = None
+    remaining = limit
+    while remaining is None or remaining > 0:
+        if last is not None:
+            query["session_id"] = {"$gt": last}
+        size = page_size if remaining is None else min(page_size, remaining)
+        page = [session["session_id"] for session in
+                db.sessions.find(query, {"_id": 0, "session_id": 1}).sort("session_id", 1).limit(size)]
+        yield from page
+        if len(page) < size:
+            return
+        last = page[-1]
+        if remaining is not None:
+            remaining -= len(page)
+
+
+def chunked(values, size):
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--all", action="store_true", help="every session that has an image")
+    source.add_argument("--session-ids", nargs="+")
+    source.add_argument("--ids-file", help="file with one session id per line")
+    source.add_argument("--image-urls", nargs="+", help="classify bare URLs (nothing is stored)")
+    parser.add_argument("--limit", type=int, help="with --all, stop after this many sessions")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--no-recommend", action="store_true", help="classification only (implies --no-save)")
+    parser.add_argument("--no-save", action="store_true", help="report results without writing them")
+    parser.add_argument("--output", help="write every item's result as JSON lines")
+    args = parser.parse_args()
+
+    recommend = not args.no_recommend
+    save = recommend and not args.no_save and not args.image_urls
+
+    if args.all:
+        values, make_items = iter_all_session_ids(args.limit, args.batch_size), items_for_sessions
+    elif args.ids_file:
+        with open(args.ids_file) as f:
+            values, make_items = [line.strip() for line in f if line.strip()], items_for_sessions
+    elif args.session_ids:
+        values, make_items = args.session_ids, items_for_sessions
+    else:
+        values, make_items = args.image_urls, items_for_urls
+
+    start_background_loading()
+    wait_until_ready(timeout=None)
+
+    totals = {"classified": 0, "failed": 0, "stored": 0}
+    output = open(args.output, "w") if args.output else None
+    try:
+        for number, chunk in enumerate(chunked(values, args.batch_size), start=1):
+            summary = classify_batch(make_items(chunk), recommend=recommend, save=save)
+            for key in totals:
+                totals[key] += summary[key]
+            logger.info("Batch %d: %d classified, %d failed, %d stored",
+                        number, summary["classified"], summary["failed"], summary["stored"])
+            if output:
+                for item in summary["results"]:
+                    output.write(json.dumps(item, default=str) + "\n")
+    finally:
+        if output:
+            output.close()
+
+    print(json.dumps(totals, indent=2))
+    return 1 if totals["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
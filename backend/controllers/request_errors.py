@@ -0,0 +1,15 @@
+"""
+Errors the route helpers raise instead of building framework responses, so
+the Flask (routes/) and Quart (routes/async_*) blueprints share every check
+and turn them into JSON the same way (see their errorhandler).
+"""
+
+
+class RequestError(Exception):
+    """A handled failure: `body` goes back as JSON with `status_code` and `headers`."""
+
+    def __init__(self, message, status_code=400, headers=None, **extra):
+        super().__init__(message)
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.body = {"error": message, **extra}
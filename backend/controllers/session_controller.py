@@ -0,0 +1,230 @@
+"""
+Request validation and response bodies for the /session routes, shared by
+routes/session_routes.py (Flask) and routes/async_session_routes.py (Quart).
+The blueprints only do the (awaited) model/inference calls in between.
+"""
+import json
+
+from controllers.request_errors import RequestError
+from controllers.batch_classification import parse_batch_request
+from models.session_model import Session, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ml_model.loader import ModelsNotReady
+from utils.image_fetch import ImageDownloadError
+from controllers.dermatologists import PlacesLookupError, parse_coordinates, parse_radius
+from utils.logger import get_logger, log_payload
+
+logger = get_logger(__name__)
+
+# Unexpected errors answer {"error": str(e)} unless the endpoint had its own message
+INTERNAL_ERROR_MESSAGES = {
+    "fetch_session_details": "Failed to fetch session",
+    "get_nearest_dermatologists": "Internal server error",
+}
+
+# Keep proxies (nginx) from buffering the SSE stream
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+
+# === Errors ===
+def models_unavailable(error):
+    """503 for classify routes while the model/index are still warming up (or failed to load)."""
+    return RequestError(str(error), 503, headers={"Retry-After": "5"}, loader=error.status)
+
+
+def image_download_failed(error):
+    # Size/format rejections are the client's problem (400); anything else is ours
+    if error.status_code == 400:
+        return RequestError(str(error), 400)
+    return RequestError("Failed to download image", 500)
+
+
+def classification_failed(error, session_id):
+    """RequestError for anything raised while downloading/classifying a session's image."""
+    if isinstance(error, ModelsNotReady):
+        return models_unavailable(error)
+    if isinstance(error, ImageDownloadError):
+        logger.warning("Image download failed for session %s: %s", session_id, error)
+        return image_download_failed(error)
+    logger.error("Error in model prediction for session %s", session_id, exc_info=error)
+    return RequestError("Model failed to classify the image.", 500)
+
+
+def as_request_error(error, endpoint):
+    """What the blueprints' errorhandler answers for `error` raised by `endpoint`."""
+    if isinstance(error, RequestError):
+        return error
+    if isinstance(error, ModelsNotReady):
+        return models_unavailable(error)
+    if isinstance(error, PlacesLookupError):
+        return RequestError(str(error), error.status_code)
+    name = (endpoint or "").rsplit(".", 1)[-1]
+    logger.error("Error in %s", name, exc_info=error)
+    return RequestError(INTERNAL_ERROR_MESSAGES.get(name, str(error)), 500)
+
+
+# === Sessions ===
+def start_session_params(data):
+    uid = data.get("uid")
+    session_name = data.get("session_name")
+    logger.debug("start-session request: uid=%s, session_name=%s", uid, session_name)
+    if not uid or not session_name:
+        raise RequestError("UID and session name are required")
+    return uid, session_name
+
+
+def listing_params(params):
+    """(uid, limit, cursor) for /get-sessions; the cursor is checked here so a bad one is a 400."""
+    uid = params.get("uid")
+    if not uid:
+        raise RequestError("UID is required")
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        raise RequestError("limit must be an integer")
+    cursor = params.get("cursor")
+    if cursor:
+        try:
+            Session.decode_cursor(cursor)
+        except ValueError as e:
+            raise RequestError(str(e))
+    return uid, limit, cursor
+
+
+def require_session(session):
+    if not session:
+        raise RequestError("Session not found", 404)
+    return session
+
+
+def session_details(session):
+    require_session(session)
+    return {
+        "session_name": session.get("session_name"),
+        "image_url": session.get("images", [{}])[0].get("url") if session.get("images") else None,
+        "classification_results": session.get("classification_results")
+    }
+
+
+def deleted(success, message):
+    if not success:
+        raise RequestError(message, 404)
+    return {"message": message}
+
+
+# === Upload + jobs ===
+def upload_params(data):
+    """(uid, image_object) of an /upload-image body."""
+    log_payload(logger, "upload-image payload", data)
+    uid = data.get("uid")
+    image_objects = data.get("image_urls")
+
+    if not uid or not image_objects:
+        raise RequestError("Missing uid or image URLs")
+    if not isinstance(image_objects, list) or len(image_objects) != 1:
+        raise RequestError("Only one image allowed per session.")
+
+    image_object = image_objects[0]
+    if not isinstance(image_object, dict) or "url" not in image_object or "delete_url" not in image_object:
+        raise RequestError("Invalid image object format. Must be a dict with 'url' and 'delete_url'.")
+    return uid, image_object
+
+
+def image_stored(success, message):
+    if not success:
+        raise RequestError(message, 500)
+
+
+def upload_accepted(session_id, job):
+    logger.info("Queued classification job %s for session %s", job.job_id, session_id)
+    return {
+        "message": "Image uploaded, classification queued",
+        "job_id": job.job_id,
+        "status_url": f"/session/{session_id}/job/{job.job_id}",
+        "job": job.to_dict()
+    }
+
+
+def job_status(job, session_id):
+    if not job or job.session_id != session_id:
+        raise RequestError("Job not found", 404)
+    return job.to_dict()
+
+
+# === Classification ===
+def require_image_url(image_url):
+    if not image_url:
+        raise RequestError("No image found in session", 404)
+    logger.debug("Downloading image from %s", image_url)
+    return image_url
+
+
+def session_image_url(session):
+    """First image URL of a session document; 404 when there is none."""
+    return require_image_url(Session.first_image_url(session))
+
+
+def classified(result, success, message):
+    if not success:
+        raise RequestError(message, 500)
+    return {"result": result}
+
+
+def batch_params(data):
+    """parse_batch_request, with its ValueErrors as 400s."""
+    try:
+        return parse_batch_request(data)
+    except ValueError as e:
+        raise RequestError(str(e))
+
+
+def batch_done(summary):
+    log_payload(logger, "Batch classification result", summary)
+    return summary
+
+
+def streamed_result(classification, parts, image_url):
+    return {
+        "classification": classification,
+        "recommendation": "".join(parts),
+        "image_url": image_url
+    }
+
+
+def sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def saved_event(result, success, message):
+    """Last SSE event of /classify-stream once the result was (or failed to be) stored."""
+    if not success:
+        return sse_event("error", {"error": message})
+    return sse_event("done", {"result": result})
+
+
+def classification_update(session_id, data):
+    """The document /update-classification stores."""
+    if not data:
+        logger.info("No classification data received for session %s", session_id)
+        raise RequestError("No data received")
+    logger.debug("Received classification update for session %s", session_id)
+    log_payload(logger, "Classification update", data)
+    return {
+        "classification": data.get("classification"),
+        "recommendations": data.get("recommendations")
+    }
+
+
+def classification_updated(session_id, success, message):
+    if not success:
+        logger.warning("Classification update failed for session %s: %s", session_id, message)
+        raise RequestError(message, 404)
+    logger.info("Classification update successful for session %s", session_id)
+    return {"message": message}
+
+
+# === Dermatologists ===
+def dermatologist_query(args):
+    """(lat, lng, radius) from the /nearest-dermatologists query string."""
+    lat, lng = parse_coordinates(args.get("lat"), args.get("lng"))
+    radius = parse_radius(args.get("radius", default=10000, type=int))
+    return lat, lng, radius
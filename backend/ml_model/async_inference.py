@@ -0,0 +1,170 @@
+"""
+Awaitable versions of the classifier entry points for the ASGI app.
+
+Network I/O (image download, Ollama) runs on the event loop via httpx; CPU
+work (decode-to-tensor, FAISS search, Mongo-backed cache tiers) goes to a
+small thread pool; the model itself is reached through the shared
+InferenceBatcher future, so no thread is parked while a batch is pending.
+"""
+import os
+import json
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from ml_model.classifier import (
+    class_labels, resources, batcher, result_cache, recommendation_cache,
+    preprocess_image, build_recommendation_prompt, wait_until_ready,
+    MODEL_WAIT_SECONDS, OLLAMA_URL, OLLAMA_TIMEOUT
+)
+from utils.async_http_client import async_http_client
+from utils.image_fetch import download_image_async
+from ml_model.preprocessing import new_batch, draft_size
+from utils.metrics import span
+
+# === Config ===
+CPU_WORKERS = int(os.getenv("ASYNC_CPU_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+_executor = ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="async-cpu")
+
+
+async def run_blocking(fn, *args):
+    """Run a blocking call on the CPU pool without stalling the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_executor, fn, *args)
+
+
+def shutdown_executor():
+    _executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def wait_until_ready_async(timeout=MODEL_WAIT_SECONDS):
+    if resources.is_ready():
+        return resources.get()
+    return await run_blocking(wait_until_ready, timeout)
+
+
+# === Classification ===
+async def fetch_image_async(image_url):
+    with span("image_download"):
+        return await download_image_async(image_url, async_http_client, draft_size=draft_size())
+
+
+async def classify_image_async(downloaded):
+    """Async classify_image: same cache, same batcher, same result shape."""
+    await wait_until_ready_async()
+    if result_cache.use_mongo:
+        cached = await run_blocking(result_cache.get, downloaded.digest)
+    else:
+        cached = result_cache.get(downloaded.digest)
+    if cached is not None:
+        return cached
+
+    # A fresh buffer per call: pool threads are shared, so the per-thread one
+    # could be overwritten before the batcher copies it
+    tensor = new_batch(1)
+    await run_blocking(preprocess_image, downloaded.image, tensor)
+    with span("predict"):
+        preds = await asyncio.wrap_future(batcher.submit(tensor))
+    idx = int(np.argmax(preds))
+    result = {
+        "acne_type": class_labels[idx],
+        "confidence": float(preds[idx])
+    }
+
+    if result_cache.use_mongo:
+        await run_blocking(result_cache.put, downloaded.digest, result)
+    else:
+        result_cache.put(downloaded.digest, result)
+    return result
+
+
+async def classify_image_url_async(image_url):
+    return await classify_image_async(await fetch_image_async(image_url))
+
+
+# === Recommendation ===
+# label -> Task generating it, so concurrent misses share one Ollama call
+_inflight = {}
+
+
+async def _generate_recommendation(acne_type):
+    version = recommendation_cache.current_version()
+    prompt = await run_blocking(build_recommendation_prompt, acne_type)
+
+    try:
+        with span("ollama_generate"):
+            response = await async_http_client.post(
+                OLLAMA_URL,
+                upstream="ollama",
+                timeout=OLLAMA_TIMEOUT,
+                json={"model": "mistral", "prompt": prompt, "stream": False}
+            )
+            response.raise_for_status()
+            text = response.json().get("response", "No answer generated.")
+    except Exception as e:
+        raise RuntimeError(f"Recommendation fetch failed: {e}")
+
+    recommendation_cache.put(acne_type, text, version)
+    return text
+
+
+async def get_recommendation_async(acne_type):
+    with span("recommendation"):
+        cached = recommendation_cache.peek(acne_type)
+        if cached is not None:
+            return cached
+
+        task = _inflight.get(acne_type)
+        if task is None:
+            task = _inflight[acne_type] = asyncio.ensure_future(_generate_recommendation(acne_type))
+            task.add_done_callback(lambda _: _inflight.pop(acne_type, None))
+        # shield: one client disconnecting must not cancel the call others are waiting on
+        return await asyncio.shield(task)
+
+
+async def stream_recommendation_async(acne_type):
+    """Async stream_recommendation: cached text as one chunk, else Ollama tokens as they arrive."""
+    cached = recommendation_cache.peek(acne_type)
+    if cached is not None:
+        yield cached
+        return
+
+    version = recommendation_cache.current_version()
+    prompt = await run_blocking(build_recommendation_prompt, acne_type)
+    parts = []
+    try:
+        async with async_http_client.stream(
+            "POST",
+            OLLAMA_URL,
+            upstream="ollama",
+            timeout=OLLAMA_TIMEOUT,
+            json={"model": "mistral", "prompt": prompt, "stream": True}
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    parts.append(chunk["response"])
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+    except Exception as e:
+        raise RuntimeError(f"Recommendation stream failed: {e}")
+    recommendation_cache.put(acne_type, "".join(parts), version)
+
+
+async def classify_and_recommend_async(image_url, image=None):
+    if image is None:
+        image = await fetch_image_async(image_url)
+    result = await classify_image_async(image)
+    recommendation = await get_recommendation_async(result["acne_type"])
+    return {
+        "classification": result,
+        "recommendation": recommendation,
+        "image_url": image_url
+    }
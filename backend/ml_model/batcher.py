@@ -0,0 +1,205 @@
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+from utils.metrics import observe, span, BATCH_SIZE
+
+# === Config ===
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "16"))
+MAX_WAIT_MS = float(os.getenv("INFERENCE_MAX_WAIT_MS", "10"))
+
+# Upper bounds (ms) of the queue-wait histogram buckets
+WAIT_BUCKETS_MS = [1, 2, 5, 10, 25, 50, 100, 250, 500, 1000]
+
+
+class _PendingItem:
+    __slots__ = ("tensor", "rows", "future", "enqueued_at")
+
+    def __init__(self, tensor, rows=False):
+        self.tensor = tensor
+        # rows=True: the future gets every prediction row for the tensor, not just the first
+        self.rows = rows
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class InferenceBatcher:
+    """
+    Collects single-image tensors from concurrent callers and runs them
+    through `predict_fn` as one batch once `max_batch_size` rows are queued
+    or the oldest item has waited `max_wait_ms`, whichever comes first.
+    Already-assembled batches (`submit_rows`) go through the same queue in
+    chunks, so bulk work interleaves with online requests instead of racing them.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS, max_in_flight=1):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max(max_wait_ms, 0) / 1000.0
+        # >1 when predict_fn can run batches concurrently (e.g. a pool of worker processes)
+        self.max_in_flight = max(1, max_in_flight)
+        self._in_flight = threading.BoundedSemaphore(self.max_in_flight)
+        self._flush_pool = None
+        if self.max_in_flight > 1:
+            self._flush_pool = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="inference-flush")
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+        self._stats_lock = threading.Lock()
+        self._batch_sizes = Counter()
+        self._queue_depths = Counter()
+        self._wait_ms = Counter()
+        self._batches = 0
+        self._items = 0
+        self._errors = 0
+
+    def start(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, tensor):
+        """Queue one preprocessed tensor (224x224x3 or 1x224x224x3) and return a Future of its prediction row."""
+        tensor = np.asarray(tensor)
+        if tensor.ndim == 3:
+            tensor = tensor[np.newaxis, ...]
+        if tensor.shape[0] != 1:
+            raise ValueError(f"Expected a single image tensor, got shape {tensor.shape}")
+
+        self.start()
+        item = _PendingItem(tensor)
+        self._queue.put(item)
+        return item.future
+
+    def predict(self, tensor, timeout=None):
+        """Blocking helper: submit a tensor and wait for its prediction row."""
+        return self.submit(tensor).result(timeout=timeout)
+
+    def submit_rows(self, batch):
+        """Queue an (n, 224, 224, 3) batch in max_batch_size chunks; returns one Future per chunk."""
+        batch = np.asarray(batch)
+        self.start()
+        futures = []
+        for start in range(0, len(batch), self.max_batch_size):
+            item = _PendingItem(batch[start:start + self.max_batch_size], rows=True)
+            self._queue.put(item)
+            futures.append(item.future)
+        return futures
+
+    def predict_rows(self, batch, timeout=None):
+        """Blocking helper: prediction rows for every image in `batch`, in order."""
+        futures = self.submit_rows(batch)
+        if not futures:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate([future.result(timeout=timeout) for future in futures], axis=0)
+
+    # === Worker ===
+    def _run(self):
+        while True:
+            # Wait for a free predict slot first, so requests keep piling into the next batch meanwhile
+            self._in_flight.acquire()
+            batch = [self._queue.get()]
+            deadline = batch[0].enqueued_at + self.max_wait
+            rows = len(batch[0].tensor)
+
+            # A chunk taken last can push a batch past max_batch_size (by less than one chunk)
+            while rows < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    if remaining <= 0:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item.tensor)
+
+            if self._flush_pool is None:
+                self._flush_then_release(batch)
+            else:
+                self._flush_pool.submit(self._flush_then_release, batch)
+
+    def _flush_then_release(self, batch):
+        try:
+            self._flush(batch)
+        finally:
+            self._in_flight.release()
+
+    def _flush(self, batch):
+        started = time.monotonic()
+        self._record(batch, started)
+
+        try:
+            inputs = np.concatenate([item.tensor for item in batch], axis=0)
+            with span("model_predict_batch"):
+                preds = self.predict_fn(inputs)
+        except Exception as e:
+            with self._stats_lock:
+                self._errors += 1
+            for item in batch:
+                item.future.set_exception(e)
+            return
+
+        offset = 0
+        for item in batch:
+            n = len(item.tensor)
+            item.future.set_result(preds[offset:offset + n] if item.rows else preds[offset])
+            offset += n
+
+    # === Stats ===
+    def _record(self, batch, flushed_at):
+        depth = self._queue.qsize()
+        rows = sum(len(item.tensor) for item in batch)
+        with self._stats_lock:
+            self._batches += 1
+            self._items += rows
+            self._batch_sizes[rows] += 1
+            self._queue_depths[_depth_bucket(depth)] += 1
+            for item in batch:
+                self._wait_ms[_wait_bucket((flushed_at - item.enqueued_at) * 1000.0)] += 1
+        observe(BATCH_SIZE, rows)
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000.0,
+                "max_in_flight": self.max_in_flight,
+                "queue_depth": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "errors": self._errors,
+                "avg_batch_size": (self._items / self._batches) if self._batches else 0.0,
+                "batch_size_histogram": {str(k): v for k, v in sorted(self._batch_sizes.items())},
+                "queue_depth_histogram": _ordered(self._queue_depths),
+                "queue_wait_ms_histogram": _ordered(self._wait_ms),
+            }
+
+
+def _depth_bucket(depth):
+    """Power-of-two buckets: 0, 1, 2, 4, 8, ..."""
+    if depth <= 0:
+        return 0
+    return 1 << (depth - 1).bit_length()
+
+
+def _wait_bucket(wait_ms):
+    for bound in WAIT_BUCKETS_MS:
+        if wait_ms <= bound:
+            return bound
+    return float("inf")
+
+
+def _ordered(counter):
+    return {str(k): counter[k] for k in sorted(counter)}
@@ -1,80 +1,231 @@
 import os
+import json
+import threading
 import numpy as np
-import requests
-from io import BytesIO
-from PIL import Image
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.image import img_to_array
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
+from types import SimpleNamespace
+from ml_model.batcher import InferenceBatcher
+from ml_model.process_pool import InferenceProcessPool, INFERENCE_WORKERS
+from ml_model.runtime import load_predictor, resolve_runtime
+from ml_model.index_builder import sync_index, load_manifest, load_embedding_model, PDF_FOLDER, INDEX_PATH, INDEX_NAME
+from ml_model.retrieval import class_labels, recommendation_query, load_contexts, context_text, RETRIEVAL_K
+from utils.http_client import http_client, CONNECT_TIMEOUT
+from utils.image_fetch import download_image, decode_image_bytes
+from ml_model.preprocessing import new_batch, preprocess_into, draft_size
+from utils.logger import get_logger
+from utils.metrics import span, registry
+from ml_model.loader import ResourceLoader
+from ml_model.result_cache import ClassificationCache, model_fingerprint
+from ml_model.recommendation_cache import RecommendationCache, sources_version
+
+logger = get_logger(__name__)
 
 # === Paths ===
 BASE_DIR = os.path.dirname(__file__)
 MODEL_PATH = os.path.join(BASE_DIR, "do7.keras")
-INDEX_PATH = os.path.join(BASE_DIR, "index_data")
-PDF_FOLDER = os.path.join(BASE_DIR, "source_pdfs")
-INDEX_NAME = "index"
 INDEX_FILE = os.path.join(INDEX_PATH, f"{INDEX_NAME}.faiss")
+# Keep the FAISS index in step with source_pdfs/ on every start (cheap when nothing changed)
+INDEX_SYNC_ON_STARTUP = os.getenv("INDEX_SYNC_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+# How long a classify request waits on a cold loader before giving up with 503
+MODEL_WAIT_SECONDS = float(os.getenv("MODEL_WAIT_SECONDS", "10"))
+
+# === Heavy resources (TensorFlow, embeddings, FAISS) ===
+def load_vector_store(embedding_model):
+    from langchain_community.vectorstores import FAISS
+
+    if not INDEX_SYNC_ON_STARTUP and os.path.exists(INDEX_FILE):
+        logger.info("FAISS index found. Loading...")
+        return FAISS.load_local(INDEX_PATH, embeddings=embedding_model, allow_dangerous_deserialization=True)
+
+    # Only new/changed PDFs are parsed and embedded; see ml_model.index_builder
+    vector_store, _ = sync_index(embedding_model, PDF_FOLDER, INDEX_PATH)
+    return vector_store
+
+def load_retrieval():
+    """
+    (embedding_model, vector_store, contexts). When the per-label contexts
+    precomputed at index build time match the index on disk, neither the
+    embedding model nor FAISS is loaded; recommendations only read contexts.
+    """
+    index_current = not INDEX_SYNC_ON_STARTUP or not sync_index(None, PDF_FOLDER, INDEX_PATH, dry_run=True)[1].content_changed
+    if index_current:
+        contexts = load_contexts(INDEX_PATH, load_manifest(INDEX_PATH))
+        if contexts is not None:
+            logger.info("Using precomputed retrieval contexts; embedding model not loaded.")
+            return None, None, contexts
+
+    embedding_model = load_embedding_model()
+    vector_store = load_vector_store(embedding_model)
+    return embedding_model, vector_store, load_contexts(INDEX_PATH, load_manifest(INDEX_PATH))
+
+def load_classifier_model():
+    """
+    The classifier in-process, or a pool of worker processes each holding one
+    (INFERENCE_WORKERS > 0). Either way it runs on the exported ONNX/TFLite
+    artifact when there is one (see ml_model.runtime / ml_model.export_model).
+    """
+    if INFERENCE_WORKERS > 0:
+        return InferenceProcessPool(
+            (MODEL_PATH,),
+            workers=INFERENCE_WORKERS,
+            max_batch=batcher.max_batch_size,
+            num_outputs=len(class_labels)
+        ).start()
+    return load_predictor(MODEL_PATH)
+
+def _load_resources():
+    # The loaders import the ML stack lazily, so the app can start serving before it is in memory
+    runtime, artifact = resolve_runtime(MODEL_PATH)
+    model = load_classifier_model()
+    embedding_model, vector_store, contexts = load_retrieval()
+    # Keyed on the artifact actually served, so switching runtime never reuses cached results.
+    # Set here, before the loader reports ready, so no request caches under another model's id.
+    model_id = model_fingerprint(artifact)
+    result_cache.model_id = model_id
+    return SimpleNamespace(
+        model=model,
+        runtime=runtime,
+        model_id=model_id,
+        embedding_model=embedding_model,
+        vector_store=vector_store,
+        contexts=contexts
+    )
+
+resources = ResourceLoader("classifier", _load_resources)
+
+def start_background_loading():
+    """Warm the model and index on a background thread (called at app boot)."""
+    resources.start()
+
+def wait_until_ready(timeout=MODEL_WAIT_SECONDS):
+    """Block until resources are loaded; raises ModelsNotReady after `timeout` seconds."""
+    return resources.get(timeout=timeout)
+
+# Concurrent requests share one `predict` call per batch window; with worker
+# processes, one batch per worker can be in flight
+batcher = InferenceBatcher(
+    lambda batch: resources.get().model.predict(batch, verbose=0),
+    max_in_flight=max(INFERENCE_WORKERS, 1)
+)
 
-# === Model + Labels ===
-model = load_model(MODEL_PATH)
-class_labels = ["Acne", "Keratosis", "Milia"]
-
-# === Embedding + FAISS ===
-embedding_model = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-
-def load_documents_from_pdfs(pdf_folder):
-    all_docs = []
-    for filename in os.listdir(pdf_folder):
-        if filename.endswith(".pdf"):
-            loader = PyPDFLoader(os.path.join(pdf_folder, filename))
-            pages = loader.load_and_split()
-            all_docs.extend(pages)
-    return all_docs
-
-if os.path.exists(INDEX_FILE):
-    print("✅ FAISS index found. Loading...")
-    vector_store = FAISS.load_local(INDEX_PATH, embeddings=embedding_model, allow_dangerous_deserialization=True)
-else:
-    print("⚠️ FAISS index not found. Creating from PDFs...")
-    docs = load_documents_from_pdfs(PDF_FOLDER)
-    vector_store = FAISS.from_documents(docs, embedding_model)
-    os.makedirs(INDEX_PATH, exist_ok=True)
-    vector_store.save_local(INDEX_PATH)
-    print("✅ New FAISS index created and saved.")
+# Repeat classifications of the same image never reach TensorFlow (model_id is set by _load_resources)
+result_cache = ClassificationCache(model_id=None)
 
 # === Image Preprocessing ===
-def preprocess_image_url(image_url):
+def fetch_image(image_url):
+    """Streamed, size-capped download decoded on the fly (see utils.image_fetch)."""
+    with span("image_download"):
+        return download_image(image_url, draft_size=draft_size())
+
+_buffers = threading.local()
+
+def _input_buffer():
+    """
+    Per-thread (1, 224, 224, 3) float32 input tensor, reused across requests.
+    Safe because the calling thread blocks on its prediction before decoding again.
+    """
+    buffer = getattr(_buffers, "input", None)
+    if buffer is None:
+        buffer = _buffers.input = new_batch(1)
+    return buffer
+
+def preprocess_image(img, out=None):
+    """Write the normalised 224x224 pixels of a PIL image into `out` (or the thread's buffer)."""
     try:
-        response = requests.get(image_url)
-        response.raise_for_status()
-        img = Image.open(BytesIO(response.content)).convert('RGB')
-        img = img.resize((224, 224))
-        img_array = img_to_array(img)
-        img_array = np.expand_dims(img_array, axis=0) / 255.0
-        return img_array
+        with span("preprocess"):
+            img_array = out if out is not None else _input_buffer()
+            preprocess_into(img, img_array[0])
+            return img_array
     except Exception as e:
-        raise RuntimeError(f"Error loading image from URL: {e}")
+        raise RuntimeError(f"Error decoding image: {e}")
+
+def preprocess_image_bytes(image_bytes, out=None):
+    return preprocess_image(decode_image_bytes(image_bytes, draft_size=draft_size()).image, out=out)
+
+def preprocess_image_url(image_url):
+    return preprocess_image(fetch_image(image_url).image)
 
 # === Acne Classification ===
-def classify_image_url(image_url):
-    img_array = preprocess_image_url(image_url)
-    preds = model.predict(img_array)
-    idx = np.argmax(preds)
-    return {
+def classify_image(downloaded):
+    """Classify a DownloadedImage, answering from the content cache when possible."""
+    wait_until_ready()
+    cached = result_cache.get(downloaded.digest)
+    if cached is not None:
+        return cached
+
+    img_array = preprocess_image(downloaded.image)
+    with span("predict"):  # includes time queued in the batcher
+        preds = batcher.predict(img_array)
+    idx = int(np.argmax(preds))
+    result = {
         "acne_type": class_labels[idx],
-        "confidence": float(preds[0][idx])
+        "confidence": float(preds[idx])
     }
+    result_cache.put(downloaded.digest, result)
+    return result
+
+def classify_images(downloaded_images):
+    """
+    Classify many DownloadedImages in one go, returning results in input order.
+    Cache hits are answered directly; the remaining distinct images are
+    preprocessed into a single float32 batch and run through the batcher in chunks.
+    """
+    wait_until_ready()
+    results = [result_cache.get(downloaded.digest) for downloaded in downloaded_images]
+
+    # Same bytes uploaded twice are predicted once
+    pending = {}
+    for i, downloaded in enumerate(downloaded_images):
+        if results[i] is None:
+            pending.setdefault(downloaded.digest, []).append(i)
+    if not pending:
+        return results
+
+    batch = new_batch(len(pending))
+    for row, positions in enumerate(pending.values()):
+        preprocess_image(downloaded_images[positions[0]].image, out=batch[row:row + 1])
+    with span("predict"):
+        preds = batcher.predict_rows(batch)
+
+    for row, (digest, positions) in enumerate(pending.items()):
+        idx = int(np.argmax(preds[row]))
+        result = {
+            "acne_type": class_labels[idx],
+            "confidence": float(preds[row][idx])
+        }
+        result_cache.put(digest, result)
+        for i in positions:
+            results[i] = result
+    return results
+
+def classify_image_bytes(image_bytes):
+    return classify_image(decode_image_bytes(image_bytes, draft_size=draft_size()))
+
+def classify_image_url(image_url):
+    return classify_image(fetch_image(image_url))
 
 # === Mistral Integration ===
-def get_recommendation(acne_type):
-    query = f"What is {acne_type}? List the ingredients, products and selfcare tips for {acne_type}."
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
+# Generation is slow; only the read side gets a long timeout
+OLLAMA_TIMEOUT = (CONNECT_TIMEOUT, float(os.getenv("OLLAMA_READ_TIMEOUT", "120")))
 
-    results = vector_store.similarity_search(query, k=4)
-    context = "\n\n".join([doc.page_content for doc in results])
+def retrieve_context(acne_type):
+    loaded = wait_until_ready()
+    contexts = getattr(loaded, "contexts", None) or {}
+    if acne_type in contexts:
+        return context_text(contexts[acne_type])
 
-    prompt = f"""You are a helpful assistant. Based on the following context, answer the question.
+    if loaded.vector_store is None:
+        raise RuntimeError(f"No retrieval context for '{acne_type}'")
+    with span("faiss_search"):
+        results = loaded.vector_store.similarity_search(recommendation_query(acne_type), k=RETRIEVAL_K)
+    return "\n\n".join([doc.page_content for doc in results])
+
+def build_recommendation_prompt(acne_type):
+    query = recommendation_query(acne_type)
+    context = retrieve_context(acne_type)
+
+    return f"""You are a helpful assistant. Based on the following context, answer the question.
 
 Context:
 {context}
@@ -83,22 +234,121 @@ Question: {query}
 
 Answer:"""
 
+def generate_recommendation(acne_type):
+    prompt = build_recommendation_prompt(acne_type)
+
     try:
-        response = requests.post(
-            "http://localhost:11434/api/generate",
-            json={"model": "mistral", "prompt": prompt, "stream": False}
-        )
-        response.raise_for_status()
-        return response.json().get("response", "No answer generated.")
+        with span("ollama_generate"):
+            response = http_client.post(
+                OLLAMA_URL,
+                upstream="ollama",
+                timeout=OLLAMA_TIMEOUT,
+                json={"model": "mistral", "prompt": prompt, "stream": False}
+            )
+            response.raise_for_status()
+            return response.json().get("response", "No answer generated.")
     except Exception as e:
         raise RuntimeError(f"Recommendation fetch failed: {e}")
 
+def stream_ollama_tokens(acne_type):
+    """Yield text chunks as Ollama generates them (one JSON object per line)."""
+    prompt = build_recommendation_prompt(acne_type)
+
+    try:
+        with http_client.post(
+            OLLAMA_URL,
+            upstream="ollama",
+            timeout=OLLAMA_TIMEOUT,
+            json={"model": "mistral", "prompt": prompt, "stream": True},
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("error"):
+                    raise RuntimeError(chunk["error"])
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    break
+    except Exception as e:
+        raise RuntimeError(f"Recommendation stream failed: {e}")
+
+# Entries are tied to the PDFs + FAISS index they were generated from
+recommendation_cache = RecommendationCache(
+    generate_recommendation,
+    lambda: sources_version([PDF_FOLDER, INDEX_FILE])
+)
+
+def get_recommendation(acne_type):
+    with span("recommendation"):
+        return recommendation_cache.get(acne_type)
+
+def stream_recommendation(acne_type):
+    """
+    Yield the recommendation in chunks. A cached answer comes back as a single
+    chunk; otherwise tokens are relayed from Ollama and the assembled text is cached.
+    """
+    cached = recommendation_cache.peek(acne_type)
+    if cached is not None:
+        yield cached
+        return
+
+    version = recommendation_cache.current_version()
+    parts = []
+    for token in stream_ollama_tokens(acne_type):
+        parts.append(token)
+        yield token
+    recommendation_cache.put(acne_type, "".join(parts), version)
+
+if os.getenv("RECOMMENDATION_WARMUP", "true").lower() in ("1", "true", "yes"):
+    resources.on_ready(lambda loaded: recommendation_cache.warm_up(class_labels))
+
 # === Final Function ===
-def classify_and_recommend(image_url):
-    result = classify_image_url(image_url)
+def classify_and_recommend(image_url, image=None):
+    """Pass `image` (a DownloadedImage) when the caller already downloaded it, so it is fetched only once."""
+    if image is None:
+        image = fetch_image(image_url)
+    result = classify_image(image)
     recommendation = get_recommendation(result["acne_type"])
     return {
         "classification": result,
         "recommendation": recommendation,
         "image_url": image_url
     }
+
+# === Stats ===
+def get_inference_stats():
+    loaded = resources.get(timeout=0) if resources.is_ready() else None
+    model = loaded.model if loaded else None
+    return {
+        "loader": resources.status(),
+        "runtime": getattr(loaded, "runtime", None),
+        **batcher.stats(),
+        "worker_pool": model.stats() if isinstance(model, InferenceProcessPool) else None,
+        "result_cache": result_cache.stats(),
+        "recommendation_cache": recommendation_cache.stats()
+    }
+
+def _inference_metric_lines():
+    stats = get_inference_stats()
+    cache = stats["result_cache"]
+    recommendations = stats["recommendation_cache"]
+    return [
+        "# TYPE skincare_models_ready gauge",
+        f"skincare_models_ready {int(resources.is_ready())}",
+        "# TYPE skincare_inference_queue_depth gauge",
+        f"skincare_inference_queue_depth {stats['queue_depth']}",
+        "# TYPE skincare_classification_cache_lookups_total counter",
+        f'skincare_classification_cache_lookups_total{{result="hit"}} {cache["hits"]}',
+        f'skincare_classification_cache_lookups_total{{result="mongo_hit"}} {cache["mongo_hits"]}',
+        f'skincare_classification_cache_lookups_total{{result="miss"}} {cache["misses"]}',
+        "# TYPE skincare_recommendation_cache_lookups_total counter",
+        f'skincare_recommendation_cache_lookups_total{{result="hit"}} {recommendations["hits"]}',
+        f'skincare_recommendation_cache_lookups_total{{result="stale_hit"}} {recommendations["stale_hits"]}',
+        f'skincare_recommendation_cache_lookups_total{{result="miss"}} {recommendations["misses"]}',
+    ]
+
+registry.register_collector(_inference_metric_lines)
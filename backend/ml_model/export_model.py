@@ -0,0 +1,115 @@
+"""
+Export do7.keras to a lighter CPU runtime.
+
+    cd backend
+    python -m ml_model.export_model --format onnx
+    python -m ml_model.export_model --format onnx --quantize int8
+    python -m ml_model.export_model --format tflite --quantize fp16
+    python -m ml_model.export_model --format tflite --quantize int8 --calibration-dir samples/
+
+The artifact is written next to the Keras file (do7.onnx / do7.tflite),
+where INFERENCE_RUNTIME=auto picks it up on the next start. Check it with
+`python -m benchmarks.runtime_parity` before deploying.
+
+Needs the export toolchain, not the serving one: tensorflow plus tf2onnx,
+onnxconverter-common and onnxruntime for ONNX.
+"""
+import os
+import argparse
+
+import numpy as np
+
+from ml_model.runtime import artifact_path
+
+BASE_DIR = os.path.dirname(__file__)
+DEFAULT_MODEL_PATH = os.path.join(BASE_DIR, "do7.keras")
+INPUT_SHAPE = (224, 224, 3)
+
+
+def calibration_batches(calibration_dir, limit=100):
+    """Preprocessed sample images for int8 calibration, one (1, 224, 224, 3) batch at a time."""
+    from PIL import Image
+    from ml_model.classifier import preprocess_image
+
+    names = sorted(
+        name for name in os.listdir(calibration_dir)
+        if name.lower().endswith((".jpg", ".jpeg", ".png", ".webp", ".bmp"))
+    )[:limit]
+    if not names:
+        raise SystemExit(f"No images found in {calibration_dir}")
+    for name in names:
+        with Image.open(os.path.join(calibration_dir, name)) as img:
+            yield preprocess_image(img, out=np.empty((1,) + INPUT_SHAPE, dtype=np.float32)).copy()
+
+
+def export_onnx(model, output_path, quantize):
+    import tensorflow as tf
+    import tf2onnx
+    import onnx
+
+    spec = (tf.TensorSpec((None,) + INPUT_SHAPE, tf.float32, name="input"),)
+    onnx_model, _ = tf2onnx.convert.from_keras(model, input_signature=spec, opset=17)
+
+    if quantize == "fp16":
+        from onnxconverter_common import float16
+        # Keep float32 inputs/outputs so callers don't change
+        onnx_model = float16.convert_float_to_float16(onnx_model, keep_io_types=True)
+
+    if quantize == "int8":
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+
+        float_path = output_path + ".fp32.tmp"
+        onnx.save(onnx_model, float_path)
+        try:
+            quantize_dynamic(float_path, output_path, weight_type=QuantType.QInt8)
+        finally:
+            os.remove(float_path)
+        return
+
+    onnx.save(onnx_model, output_path)
+
+
+def export_tflite(model, output_path, quantize, calibration_dir):
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantize == "fp16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantize == "int8":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        if calibration_dir:
+            # Full-integer kernels; float in/out so the serving code is unchanged
+            converter.representative_dataset = lambda: ([batch] for batch in calibration_batches(calibration_dir))
+            converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        # Without calibration data this is dynamic-range (weights-only) int8
+
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default=DEFAULT_MODEL_PATH, help="path to the .keras model")
+    parser.add_argument("--format", choices=["onnx", "tflite"], required=True)
+    parser.add_argument("--quantize", choices=["none", "fp16", "int8"], default="none")
+    parser.add_argument("--calibration-dir", help="sample images for full int8 calibration (tflite)")
+    parser.add_argument("--output", help="defaults to the model path with the format's extension")
+    args = parser.parse_args()
+
+    import tensorflow as tf
+
+    output_path = args.output or artifact_path(args.model, args.format)
+    model = tf.keras.models.load_model(args.model)
+
+    if args.format == "onnx":
+        export_onnx(model, output_path, args.quantize)
+    else:
+        export_tflite(model, output_path, args.quantize, args.calibration_dir)
+
+    size_mb = os.path.getsize(output_path) / (1024 * 1024)
+    print(f"Wrote {output_path} ({size_mb:.1f} MB, {args.format}, quantize={args.quantize})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,326 @@
+"""
+Incremental FAISS index over the PDFs in source_pdfs/.
+
+A manifest next to the index records each PDF's content hash and the ids of
+the chunks it contributed, so a sync only parses and embeds new or changed
+PDFs and deletes the chunks of removed ones. PDFs are parsed in a process
+pool and their chunks streamed through the embedder in fixed-size batches,
+so build time scales with cores and memory stays bounded. Runs at startup (see
+classifier.load_vector_store) and offline:
+
+    cd backend
+    python -m ml_model.index_builder             # apply changes
+    python -m ml_model.index_builder --dry-run   # show what would change
+    python -m ml_model.index_builder --rebuild   # start from scratch
+
+Every sync also refreshes the per-label retrieval contexts (ml_model.retrieval).
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from ml_model.retrieval import build_contexts, save_contexts, load_contexts, index_version
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Paths ===
+BASE_DIR = os.path.dirname(__file__)
+PDF_FOLDER = os.path.join(BASE_DIR, "source_pdfs")
+INDEX_PATH = os.path.join(BASE_DIR, "index_data")
+INDEX_NAME = "index"
+MANIFEST_NAME = "manifest.json"
+# 2: chunk ids include the filename (v1 ids were content-only and collided on renames/copies)
+MANIFEST_VERSION = 2
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# === Ingestion ===
+# PDFs parsed in parallel (0 = one per core); parsing is pure Python and CPU bound
+PARSE_WORKERS = int(os.getenv("INDEX_PARSE_WORKERS", "0")) or (os.cpu_count() or 1)
+# Chunks embedded and added to FAISS per step; bounds peak memory regardless of corpus size
+EMBED_BATCH_SIZE = int(os.getenv("INDEX_EMBED_BATCH_SIZE", "64"))
+
+
+def load_embedding_model():
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL_NAME,
+        encode_kwargs={"batch_size": EMBED_BATCH_SIZE},
+    )
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def chunk_ids(name, sha256, count):
+    """
+    Stable ids: the same file with the same content always maps to the same
+    chunk ids. The filename is part of the id, so a copy of a PDF gets its own
+    chunks and a rename never reuses the ids it is deleting.
+    """
+    return [f"{name}:{sha256[:16]}:{i}" for i in range(count)]
+
+
+def parse_pdf(path):
+    """Split one PDF into page chunks (the same splitting the original full build used)."""
+    from langchain_community.document_loaders import PyPDFLoader
+
+    return PyPDFLoader(path).load_and_split()
+
+
+def load_manifest(index_path):
+    try:
+        with open(os.path.join(index_path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def save_manifest(index_path, manifest):
+    path = os.path.join(index_path, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+class IndexPlan:
+    """What a sync will do, computed from the manifest and the PDF folder without parsing anything."""
+
+    def __init__(self):
+        self.added = []       # filenames new since the last build
+        self.changed = []     # filenames whose content hash differs
+        self.removed = []     # filenames in the manifest but gone from disk
+        self.unchanged = []
+        self.hashes = {}      # filename -> sha256 for added/changed (and touched) files
+        self.touched = {}     # filename -> new (size, mtime) for files whose content did not change
+
+    @property
+    def content_changed(self):
+        return bool(self.added or self.changed or self.removed)
+
+    def summary(self):
+        return {
+            "added": sorted(self.added),
+            "changed": sorted(self.changed),
+            "removed": sorted(self.removed),
+            "unchanged": len(self.unchanged),
+        }
+
+
+def plan_sync(pdf_folder, manifest):
+    plan = IndexPlan()
+    known = (manifest or {}).get("files", {})
+    on_disk = sorted(name for name in os.listdir(pdf_folder) if name.endswith(".pdf"))
+
+    for name in on_disk:
+        stat = os.stat(os.path.join(pdf_folder, name))
+        entry = known.get(name)
+        # size + mtime match: trust the manifest and skip hashing
+        if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+            plan.unchanged.append(name)
+            continue
+
+        sha256 = file_sha256(os.path.join(pdf_folder, name))
+        plan.hashes[name] = sha256
+        if entry is None:
+            plan.added.append(name)
+        elif entry["sha256"] != sha256:
+            plan.changed.append(name)
+        else:
+            plan.unchanged.append(name)
+            plan.touched[name] = (stat.st_size, stat.st_mtime)
+
+    plan.removed = [name for name in known if name not in on_disk]
+    return plan
+
+
+def _parse_file(pdf_folder, name, sha256):
+    """Worker-side: parse one PDF and tag its chunks with their source hash."""
+    chunks = parse_pdf(os.path.join(pdf_folder, name))
+    for chunk in chunks:
+        chunk.metadata["source_sha256"] = sha256
+    return name, chunks
+
+
+def iter_chunks(pdf_folder, names, hashes, workers=PARSE_WORKERS):
+    """
+    Yield (filename, chunk_id, document) for every chunk of `names`.
+
+    With several files and workers, PDFs are parsed in a process pool with at
+    most `workers` parsed files waiting to be consumed, so memory stays flat
+    however large the corpus is.
+    """
+    if workers <= 1 or len(names) <= 1:
+        parsed = (_parse_file(pdf_folder, name, hashes[name]) for name in names)
+        for name, chunks in parsed:
+            yield from zip([name] * len(chunks), chunk_ids(name, hashes[name], len(chunks)), chunks)
+        return
+
+    # spawn: the server may call this with threads running, where fork is unsafe
+    with ProcessPoolExecutor(max_workers=min(workers, len(names)), mp_context=mp.get_context("spawn")) as executor:
+        queued = iter(names)
+        pending = deque()
+
+        def submit_next():
+            name = next(queued, None)
+            if name is not None:
+                pending.append(executor.submit(_parse_file, pdf_folder, name, hashes[name]))
+
+        for _ in range(workers):
+            submit_next()
+        while pending:
+            name, chunks = pending.popleft().result()
+            submit_next()
+            yield from zip([name] * len(chunks), chunk_ids(name, hashes[name], len(chunks)), chunks)
+
+
+def _batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _refresh_contexts(vector_store, embedding_model, index_path, manifest):
+    if load_contexts(index_path, manifest) is not None:
+        return
+    save_contexts(index_path, build_contexts(vector_store, embedding_model, index_version(manifest)))
+    logger.info("Retrieval contexts precomputed for index version %s", index_version(manifest))
+
+
+def sync_index(embedding_model, pdf_folder=PDF_FOLDER, index_path=INDEX_PATH, rebuild=False, dry_run=False):
+    """
+    Bring the FAISS index in `index_path` in line with `pdf_folder` and return
+    (vector_store, plan). Falls back to a full build when there is no usable
+    index + manifest pair or the embedding model changed.
+    """
+    manifest = None if rebuild else load_manifest(index_path)
+    index_file = os.path.join(index_path, f"{INDEX_NAME}.faiss")
+    if manifest and (manifest.get("embedding_model") != EMBEDDING_MODEL_NAME or not os.path.exists(index_file)):
+        logger.warning("Index manifest does not match the current index/embedding model; rebuilding.")
+        manifest = None
+
+    plan = plan_sync(pdf_folder, manifest)
+    if dry_run:
+        return None, plan
+
+    from langchain_community.vectorstores import FAISS
+
+    vector_store = None
+    if manifest is not None:
+        vector_store = FAISS.load_local(index_path, embeddings=embedding_model, allow_dangerous_deserialization=True)
+        if not plan.content_changed:
+            if plan.touched:
+                # Same bytes, new mtime: refresh the manifest but leave the index (and its mtime) alone
+                for name, (size, mtime) in plan.touched.items():
+                    manifest["files"][name].update(size=size, mtime=mtime)
+                save_manifest(index_path, manifest)
+            _refresh_contexts(vector_store, embedding_model, index_path, manifest)
+            logger.info("FAISS index is up to date (%d PDFs).", len(plan.unchanged))
+            return vector_store, plan
+
+    started = time.perf_counter()
+    files = dict((manifest or {}).get("files", {}))
+
+    stale_ids = []
+    for name in plan.removed + plan.changed:
+        stale_ids.extend(files.pop(name)["chunk_ids"])
+
+    # Checked against the index: after a crash, the manifest and index can disagree
+    present = set(vector_store.index_to_docstore_id.values()) if vector_store is not None else set()
+    stale_present = [chunk_id for chunk_id in stale_ids if chunk_id in present]
+    if stale_present:
+        vector_store.delete(stale_present)
+        present.difference_update(stale_present)
+
+    to_embed = plan.added + plan.changed
+    per_file = {name: [] for name in to_embed}
+    embedded = 0
+    for batch in _batched(iter_chunks(pdf_folder, to_embed, plan.hashes, PARSE_WORKERS), EMBED_BATCH_SIZE):
+        names, ids, documents = zip(*batch)
+        texts = [document.page_content for document in documents]
+        metadatas = [document.metadata for document in documents]
+        text_embeddings = list(zip(texts, embedding_model.embed_documents(texts)))
+        if vector_store is None:
+            vector_store = FAISS.from_embeddings(text_embeddings, embedding_model, metadatas=metadatas, ids=list(ids))
+        else:
+            duplicates = [chunk_id for chunk_id in ids if chunk_id in present]
+            if duplicates:
+                vector_store.delete(duplicates)
+            vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=list(ids))
+        for name, chunk_id in zip(names, ids):
+            per_file[name].append(chunk_id)
+        embedded += len(ids)
+    if vector_store is None:
+        raise RuntimeError(f"No PDFs to index in {pdf_folder}")
+
+    for name in to_embed:
+        stat = os.stat(os.path.join(pdf_folder, name))
+        files[name] = {
+            "sha256": plan.hashes[name],
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "chunk_ids": per_file[name],
+        }
+    for name, (size, mtime) in plan.touched.items():
+        files[name].update(size=size, mtime=mtime)
+
+    os.makedirs(index_path, exist_ok=True)
+    vector_store.save_local(index_path, INDEX_NAME)
+    # Manifest last: after a crash in between, the next sync just redoes this diff
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "embedding_model": EMBEDDING_MODEL_NAME,
+        "updated_at": time.time(),
+        "files": files,
+    }
+    save_manifest(index_path, manifest)
+    # Stamped with the new index version, so stale contexts are never read back
+    _refresh_contexts(vector_store, embedding_model, index_path, manifest)
+
+    logger.info(
+        "FAISS index synced in %.1fs: +%d new, ~%d changed, -%d removed PDFs (%d chunks embedded, %d deleted)",
+        time.perf_counter() - started, len(plan.added), len(plan.changed), len(plan.removed),
+        embedded, len(stale_ids)
+    )
+    return vector_store, plan
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pdf-folder", default=PDF_FOLDER)
+    parser.add_argument("--index-path", default=INDEX_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="ignore the manifest and re-embed everything")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would change")
+    args = parser.parse_args()
+
+    embedding_model = None if args.dry_run else load_embedding_model()
+
+    _, plan = sync_index(embedding_model, args.pdf_folder, args.index_path, rebuild=args.rebuild, dry_run=args.dry_run)
+    print(json.dumps(plan.summary(), indent=2))
+
+
+if __name__ == "__main__":
+    from utils.logger import setup_logging
+    setup_logging()
+    main()
@@ -0,0 +1,130 @@
+import os
+import threading
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Config ===
+# After a failed load, the next get()/start() retries once this has passed; doubles per failure
+LOADER_RETRY_SECONDS = float(os.getenv("LOADER_RETRY_SECONDS", "30"))
+LOADER_MAX_RETRY_SECONDS = float(os.getenv("LOADER_MAX_RETRY_SECONDS", "600"))
+
+
+class ModelsNotReady(RuntimeError):
+    """Raised when heavy ML resources are still loading or failed to load."""
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status or {}
+
+
+class ResourceLoader:
+    """
+    Loads expensive resources (TensorFlow model, embeddings, FAISS index) once,
+    on a background thread, so importing the app stays cheap.
+
+    `load_fn` returns any object holding the loaded resources; `on_ready`
+    callbacks run on the loader thread right after a successful load.
+    A failed load is retried (with exponential backoff) by the next start()
+    or get() once its retry delay has passed, so a transient outage does
+    not leave the process unready until restart.
+    """
+
+    PENDING = "pending"
+    LOADING = "loading"
+    READY = "ready"
+    FAILED = "failed"
+
+    def __init__(self, name, load_fn, retry_seconds=LOADER_RETRY_SECONDS, max_retry_seconds=LOADER_MAX_RETRY_SECONDS):
+        self.name = name
+        self.load_fn = load_fn
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self.state = self.PENDING
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.failures = 0
+
+        self._value = None
+        self._ready = threading.Event()
+        self._lock = threading.Lock()
+        self._on_ready = []
+
+    def start(self):
+        """Kick off loading on a daemon thread; safe to call more than once."""
+        with self._lock:
+            if self.state == self.FAILED and self._retry_in() <= 0:
+                logger.info("Retrying %s load (attempt %d)", self.name, self.failures + 1)
+                self._ready.clear()
+            elif self.state != self.PENDING:
+                return
+            self.state = self.LOADING
+            self.started_at = time.time()
+            self.finished_at = None
+        threading.Thread(target=self._load, name=f"{self.name}-loader", daemon=True).start()
+
+    def on_ready(self, callback):
+        self._on_ready.append(callback)
+
+    def get(self, timeout=None):
+        """
+        Return the loaded resources, starting the load if nobody has yet.
+        Waits up to `timeout` seconds (forever when None) and raises
+        ModelsNotReady if they are still loading or failed.
+        """
+        self.start()
+        if not self._ready.wait(timeout):
+            raise ModelsNotReady(f"{self.name} is still loading, please retry shortly", self.status())
+        if self.state == self.FAILED:
+            raise ModelsNotReady(f"{self.name} failed to load: {self.error}", self.status())
+        return self._value
+
+    def is_ready(self):
+        return self.state == self.READY
+
+    def status(self):
+        elapsed = None
+        if self.started_at is not None:
+            elapsed = round((self.finished_at or time.time()) - self.started_at, 2)
+        return {
+            "name": self.name,
+            "state": self.state,
+            "elapsed_seconds": elapsed,
+            "error": self.error,
+            "failures": self.failures,
+            "retry_in_seconds": round(max(self._retry_in(), 0.0), 1) if self.state == self.FAILED else None,
+        }
+
+    def _retry_in(self):
+        delay = min(self.retry_seconds * 2 ** max(self.failures - 1, 0), self.max_retry_seconds)
+        return (self.finished_at or 0.0) + delay - time.time()
+
+    def _load(self):
+        logger.info("Loading %s in background...", self.name)
+        try:
+            value = self.load_fn()
+        except Exception as e:
+            self.error = str(e)
+            self.failures += 1
+            self.finished_at = time.time()
+            self.state = self.FAILED
+            logger.exception("Failed to load %s", self.name)
+            self._ready.set()
+            return
+
+        self._value = value
+        self.error = None
+        self.failures = 0
+        self.state = self.READY
+        self.finished_at = time.time()
+        self._ready.set()
+        logger.info("%s loaded in %.1fs", self.name, self.finished_at - self.started_at)
+
+        for callback in self._on_ready:
+            try:
+                callback(value)
+            except Exception:
+                logger.exception("%s on_ready callback failed", self.name)
@@ -0,0 +1,43 @@
+"""
+Image -> model input, written straight into preallocated float32 tensors.
+
+JPEGs are decoded with PIL's draft mode (see utils.image_fetch), which lets
+libjpeg scale by 1/2, 1/4 or 1/8 while decoding, so a phone photo never
+exists at full resolution. What remains is one resize to 224x224 and one
+float32 multiply that writes the normalised pixels into the caller's batch
+row: no float64 temporaries, no expand_dims copies.
+"""
+import os
+
+import numpy as np
+from PIL import Image
+
+# === Config ===
+INPUT_SIZE = (224, 224)
+INPUT_SHAPE = (INPUT_SIZE[1], INPUT_SIZE[0], 3)
+# Decode JPEGs at reduced scale (set false to always decode at full resolution)
+DRAFT_DECODE = os.getenv("IMAGE_DRAFT_DECODE", "true").lower() in ("1", "true", "yes")
+# Image.resize reducing_gap: shrink by whole factors first, then resample; 3.0 is visually lossless
+RESIZE_REDUCING_GAP = 3.0
+
+_SCALE = np.float32(1.0 / 255.0)
+
+
+def draft_size():
+    """Size to hand to the decoders for draft mode, or None when it is disabled."""
+    return INPUT_SIZE if DRAFT_DECODE else None
+
+
+def new_batch(n):
+    return np.empty((n,) + INPUT_SHAPE, dtype=np.float32)
+
+
+def preprocess_into(image, out):
+    """Write `image` as normalised 224x224x3 float32 pixels into `out` (a batch row) and return it."""
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != INPUT_SIZE:
+        image = image.resize(INPUT_SIZE, Image.BICUBIC, reducing_gap=RESIZE_REDUCING_GAP)
+    # uint8 * float32 scalar runs the float32 loop and lands in `out` without a temporary
+    np.multiply(np.asarray(image), _SCALE, out=out, dtype=np.float32)
+    return out
@@ -0,0 +1,313 @@
+import os
+import time
+import queue
+import atexit
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ml_model.runtime import worker_predictor
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Config ===
+# 0 keeps inference in-process (the default); N > 0 runs N dedicated model processes
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+# Per-worker TensorFlow thread pools; by default the cores are split evenly between workers
+INTRA_OP_THREADS = int(os.getenv("INFERENCE_INTRA_OP_THREADS", "0"))
+INTER_OP_THREADS = int(os.getenv("INFERENCE_INTER_OP_THREADS", "1"))
+PIN_CPUS = os.getenv("INFERENCE_PIN_CPUS", "false").lower() in ("1", "true", "yes")
+WORKER_TIMEOUT = float(os.getenv("INFERENCE_WORKER_TIMEOUT", "30"))
+WORKER_LOAD_TIMEOUT = float(os.getenv("INFERENCE_WORKER_LOAD_TIMEOUT", "300"))
+HEALTH_CHECK_SECONDS = float(os.getenv("INFERENCE_HEALTH_CHECK_SECONDS", "10"))
+
+INPUT_SHAPE = (224, 224, 3)
+
+
+class WorkerCrashed(RuntimeError):
+    """The worker process died (or hung) while holding a batch; it has been restarted."""
+
+
+def _threads_per_worker(workers):
+    if INTRA_OP_THREADS > 0:
+        return INTRA_OP_THREADS
+    return max(1, (os.cpu_count() or 1) // max(workers, 1))
+
+
+# === Worker process ===
+def _worker_main(conn, input_name, output_name, max_batch, num_outputs, loader, loader_args, threads, cpus):
+    # Thread-count env must be set before TensorFlow/OpenMP initialise
+    os.environ["OMP_NUM_THREADS"] = str(threads[0])
+    os.environ["TF_NUM_INTRAOP_THREADS"] = str(threads[0])
+    os.environ["TF_NUM_INTEROP_THREADS"] = str(threads[1])
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    inputs_shm = shared_memory.SharedMemory(name=input_name)
+    outputs_shm = shared_memory.SharedMemory(name=output_name)
+    inputs = np.ndarray((max_batch,) + INPUT_SHAPE, dtype=np.float32, buffer=inputs_shm.buf)
+    outputs = np.ndarray((max_batch, num_outputs), dtype=np.float32, buffer=outputs_shm.buf)
+
+    try:
+        predict = loader(*loader_args, *threads)
+    except Exception as e:
+        conn.send(("load_error", f"{type(e).__name__}: {e}"))
+        return
+    conn.send(("ready", os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            break
+        command = message[0]
+        if command == "stop":
+            break
+        if command == "ping":
+            conn.send(("pong",))
+            continue
+        if command == "predict":
+            n = message[1]
+            try:
+                outputs[:n] = predict(inputs[:n])
+                conn.send(("ok", n))
+            except Exception as e:
+                conn.send(("error", f"{type(e).__name__}: {e}"))
+
+    del inputs, outputs
+    inputs_shm.close()
+    outputs_shm.close()
+
+
+# === Parent side ===
+class _WorkerSlot:
+    """One worker process plus the shared-memory input/output slabs it reads and writes in place."""
+
+    def __init__(self, pool, index):
+        self.pool = pool
+        self.index = index
+        self.lock = threading.Lock()
+        self.process = None
+        self.conn = None
+        self.restarts = 0
+        self.batches = 0
+        self.errors = 0
+
+        self._inputs_shm = shared_memory.SharedMemory(
+            create=True, size=pool.max_batch * int(np.prod(INPUT_SHAPE)) * 4)
+        self._outputs_shm = shared_memory.SharedMemory(
+            create=True, size=pool.max_batch * pool.num_outputs * 4)
+        self.inputs = np.ndarray((pool.max_batch,) + INPUT_SHAPE, dtype=np.float32, buffer=self._inputs_shm.buf)
+        self.outputs = np.ndarray((pool.max_batch, pool.num_outputs), dtype=np.float32, buffer=self._outputs_shm.buf)
+
+    def spawn(self):
+        pool = self.pool
+        parent_conn, child_conn = pool.context.Pipe()
+        self.conn = parent_conn
+        self.process = pool.context.Process(
+            target=_worker_main,
+            args=(child_conn, self._inputs_shm.name, self._outputs_shm.name,
+                  pool.max_batch, pool.num_outputs, pool.loader, pool.loader_args,
+                  (pool.intra_op_threads, pool.inter_op_threads), pool.cpus_for(self.index)),
+            name=f"inference-worker-{self.index}",
+            daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+        if not parent_conn.poll(pool.load_timeout):
+            self.kill()
+            raise RuntimeError(f"Inference worker {self.index} did not load within {pool.load_timeout}s")
+        message = parent_conn.recv()
+        if message[0] != "ready":
+            self.kill()
+            raise RuntimeError(f"Inference worker {self.index} failed to load: {message[1]}")
+        logger.info("Inference worker %d ready (pid %s)", self.index, message[1])
+
+    def kill(self):
+        if self.process is not None and self.process.is_alive():
+            self.process.kill()
+        if self.process is not None:
+            self.process.join(timeout=5)
+        if self.conn is not None:
+            self.conn.close()
+
+    def restart(self, reason):
+        logger.warning("Restarting inference worker %d: %s", self.index, reason)
+        self.kill()
+        self.restarts += 1
+        self.spawn()
+
+    def run(self, batch):
+        """Caller holds `self.lock`. Copies the batch in, waits for the worker, copies the rows out."""
+        n = len(batch)
+        if not self.process.is_alive():
+            # Died while idle (before the monitor noticed): nothing is lost, so bring it back first
+            self.process.join(timeout=1)
+            self.restart(f"exited with code {self.process.exitcode}")
+        self.inputs[:n] = batch
+
+        deadline = time.monotonic() + self.pool.timeout
+        try:
+            self.conn.send(("predict", n))
+            while not self.conn.poll(0.25):
+                if not self.process.is_alive():
+                    raise EOFError
+                if time.monotonic() > deadline:
+                    self.errors += 1
+                    self.restart(f"no reply within {self.pool.timeout}s")
+                    raise WorkerCrashed(f"Inference worker {self.index} timed out during predict")
+            message = self.conn.recv()
+        except (EOFError, OSError):
+            # A dead worker shows up as EOF on its pipe
+            self.errors += 1
+            self.process.join(timeout=1)
+            self.restart(f"exited with code {self.process.exitcode}")
+            raise WorkerCrashed(f"Inference worker {self.index} crashed during predict")
+
+        if message[0] != "ok":
+            self.errors += 1
+            raise RuntimeError(f"Inference worker {self.index}: {message[1]}")
+        self.batches += 1
+        return self.outputs[:n].copy()
+
+    def check(self):
+        """Health check for an idle worker (caller holds `self.lock`)."""
+        if not self.process.is_alive():
+            self.restart(f"exited with code {self.process.exitcode}")
+            return
+        try:
+            self.conn.send(("ping",))
+            healthy = self.conn.poll(self.pool.timeout) and self.conn.recv()[0] == "pong"
+        except (OSError, EOFError):
+            healthy = False
+        if not healthy:
+            self.restart("failed health check")
+
+    def close(self):
+        try:
+            if self.process is not None and self.process.is_alive():
+                self.conn.send(("stop",))
+                self.process.join(timeout=2)
+        except (OSError, EOFError):
+            pass
+        self.kill()
+        del self.inputs, self.outputs
+        for shm in (self._inputs_shm, self._outputs_shm):
+            shm.close()
+            shm.unlink()
+
+    def stats(self):
+        return {
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "busy": self.lock.locked(),
+            "batches": self.batches,
+            "errors": self.errors,
+            "restarts": self.restarts,
+        }
+
+
+class InferenceProcessPool:
+    """
+    N model processes, each with its own copy of the model and fixed
+    intra/inter-op thread counts, fed through shared-memory tensors.
+
+    `predict(batch)` matches `model.predict`, so the pool drops in behind
+    InferenceBatcher (run it with max_in_flight = workers to keep all busy).
+    A monitor thread pings idle workers and restarts any that died or hung.
+    """
+
+    def __init__(self, loader_args, workers=INFERENCE_WORKERS, max_batch=16, num_outputs=3,
+                 loader=worker_predictor, timeout=WORKER_TIMEOUT, load_timeout=WORKER_LOAD_TIMEOUT,
+                 health_check_seconds=HEALTH_CHECK_SECONDS):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.workers = workers
+        self.max_batch = max_batch
+        self.num_outputs = num_outputs
+        self.loader = loader
+        self.loader_args = tuple(loader_args)
+        self.timeout = timeout
+        self.load_timeout = load_timeout
+        self.health_check_seconds = health_check_seconds
+        self.intra_op_threads = _threads_per_worker(workers)
+        self.inter_op_threads = INTER_OP_THREADS
+        # spawn: a forked TensorFlow/OpenMP runtime is not safe to reuse
+        self.context = mp.get_context("spawn")
+
+        self._slots = []
+        self._idle = None
+        self._closed = threading.Event()
+
+    def cpus_for(self, index):
+        if not PIN_CPUS or not hasattr(os, "sched_getaffinity"):
+            return None
+        cpus = sorted(os.sched_getaffinity(0))
+        per_worker = max(1, len(cpus) // self.workers)
+        start = (index * per_worker) % len(cpus)
+        return set(cpus[start:start + per_worker])
+
+    def start(self):
+        """Spawn every worker and wait for their models to load (raises if any fails)."""
+        self._idle = queue.Queue()
+        try:
+            for index in range(self.workers):
+                slot = _WorkerSlot(self, index)
+                self._slots.append(slot)
+                slot.spawn()
+                self._idle.put(slot)
+        except Exception:
+            self.close()
+            raise
+
+        atexit.register(self.close)
+        threading.Thread(target=self._monitor, name="inference-pool-monitor", daemon=True).start()
+        logger.info("Inference pool started: %d workers x %d intra-op threads",
+                    self.workers, self.intra_op_threads)
+        return self
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch, dtype=np.float32)
+        if len(batch) > self.max_batch:
+            return np.concatenate([
+                self.predict(batch[i:i + self.max_batch]) for i in range(0, len(batch), self.max_batch)
+            ])
+
+        slot = self._idle.get()
+        try:
+            with slot.lock:
+                return slot.run(batch)
+        finally:
+            self._idle.put(slot)
+
+    def _monitor(self):
+        while not self._closed.wait(self.health_check_seconds):
+            for slot in self._slots:
+                # Busy workers are watched by run() itself
+                if not slot.lock.acquire(blocking=False):
+                    continue
+                try:
+                    slot.check()
+                except Exception:
+                    logger.exception("Health check failed for inference worker %d", slot.index)
+                finally:
+                    slot.lock.release()
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        for slot in self._slots:
+            slot.close()
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "intra_op_threads": self.intra_op_threads,
+            "inter_op_threads": self.inter_op_threads,
+            "slots": [slot.stats() for slot in self._slots],
+        }
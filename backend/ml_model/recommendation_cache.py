@@ -0,0 +1,195 @@
+import os
+import hashlib
+import threading
+import time
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Config ===
+RECOMMENDATION_TTL_SECONDS = int(os.getenv("RECOMMENDATION_TTL_SECONDS", str(24 * 3600)))
+VERSION_CHECK_INTERVAL_SECONDS = float(os.getenv("RECOMMENDATION_VERSION_CHECK_SECONDS", "30"))
+
+
+def sources_version(paths):
+    """
+    Cheap fingerprint of the files a recommendation depends on (PDFs, FAISS index).
+    Uses name, size and mtime only, so it can be re-checked without reading the files.
+    """
+    digest = hashlib.sha256()
+    for path in paths:
+        if os.path.isdir(path):
+            entries = sorted(os.path.join(path, name) for name in os.listdir(path))
+        else:
+            entries = [path]
+        for entry in entries:
+            try:
+                stat = os.stat(entry)
+            except FileNotFoundError:
+                continue
+            digest.update(f"{entry}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return digest.hexdigest()[:16]
+
+
+class _Entry:
+    __slots__ = ("value", "version", "expires_at")
+
+    def __init__(self, value, version, expires_at):
+        self.value = value
+        self.version = version
+        self.expires_at = expires_at
+
+
+class RecommendationCache:
+    """
+    Per-label cache in front of the RAG + LLM call.
+
+    - A fresh entry is returned as-is.
+    - An entry past its TTL is returned immediately and refreshed on a background
+      thread (stale-while-revalidate), so a known label never waits on the LLM.
+    - An entry built against an older source version (PDFs or index changed) is
+      dropped and recomputed.
+    """
+
+    def __init__(self, compute_fn, version_fn, ttl_seconds=RECOMMENDATION_TTL_SECONDS,
+                 version_check_interval=VERSION_CHECK_INTERVAL_SECONDS):
+        self.compute_fn = compute_fn
+        self.version_fn = version_fn
+        self.ttl_seconds = ttl_seconds
+        self.version_check_interval = version_check_interval
+
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._label_locks = {}
+        self._refreshing = set()
+        self._version = None
+        self._version_checked_at = 0.0
+        self.counters = {"hits": 0, "stale_hits": 0, "misses": 0, "invalidations": 0, "refreshes": 0, "refresh_errors": 0}
+
+    # === Public API ===
+    def get(self, label):
+        version = self.current_version()
+
+        with self._lock:
+            entry = self._entries.get(label)
+            if entry is not None and entry.version != version:
+                del self._entries[label]
+                self.counters["invalidations"] += 1
+                entry = None
+
+            if entry is not None:
+                if entry.expires_at > time.monotonic():
+                    self.counters["hits"] += 1
+                    return entry.value
+                self.counters["stale_hits"] += 1
+                self._schedule_refresh(label)
+                return entry.value
+
+        return self._compute(label, version)
+
+    def peek(self, label):
+        """Cached value for the current source version, fresh or stale, or None; never blocks on the LLM."""
+        version = self.current_version()
+        with self._lock:
+            entry = self._entries.get(label)
+            if entry is None or entry.version != version:
+                return None
+            if entry.expires_at > time.monotonic():
+                self.counters["hits"] += 1
+            else:
+                self.counters["stale_hits"] += 1
+                self._schedule_refresh(label)
+            return entry.value
+
+    def put(self, label, value, version=None):
+        """Store a value computed outside the cache (e.g. an assembled streamed answer)."""
+        self._store(label, value, version or self.current_version())
+
+    def warm_up(self, labels, background=True):
+        """Precompute entries for every label, by default without blocking the caller."""
+        def _warm():
+            for label in labels:
+                try:
+                    self.get(label)
+                    logger.info("Recommendation cache warmed for %s", label)
+                except Exception as e:
+                    logger.warning("Recommendation warm-up failed for %s: %s", label, e)
+
+        if not background:
+            _warm()
+            return None
+        thread = threading.Thread(target=_warm, name="recommendation-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def invalidate(self, label=None):
+        with self._lock:
+            if label is None:
+                self.counters["invalidations"] += len(self._entries)
+                self._entries.clear()
+            elif self._entries.pop(label, None) is not None:
+                self.counters["invalidations"] += 1
+            self._version_checked_at = 0.0
+
+    def current_version(self):
+        now = time.monotonic()
+        if self._version is None or now - self._version_checked_at >= self.version_check_interval:
+            self._version = self.version_fn()
+            self._version_checked_at = now
+        return self._version
+
+    def stats(self):
+        with self._lock:
+            return {
+                **self.counters,
+                "labels": sorted(self._entries),
+                "version": self._version,
+                "ttl_seconds": self.ttl_seconds,
+            }
+
+    # === Internals ===
+    def _label_lock(self, label):
+        with self._lock:
+            return self._label_locks.setdefault(label, threading.Lock())
+
+    def _compute(self, label, version):
+        # One LLM call per label even when many requests miss at once
+        with self._label_lock(label):
+            with self._lock:
+                entry = self._entries.get(label)
+                if entry is not None and entry.version == version:
+                    self.counters["hits"] += 1
+                    return entry.value
+                self.counters["misses"] += 1
+
+            value = self.compute_fn(label)
+            self._store(label, value, version)
+            return value
+
+    def _store(self, label, value, version):
+        with self._lock:
+            self._entries[label] = _Entry(value, version, time.monotonic() + self.ttl_seconds)
+
+    def _schedule_refresh(self, label):
+        # Caller holds self._lock
+        if label in self._refreshing:
+            return
+        self._refreshing.add(label)
+        threading.Thread(target=self._refresh, args=(label,), name=f"recommendation-refresh-{label}", daemon=True).start()
+
+    def _refresh(self, label):
+        try:
+            version = self.current_version()
+            with self._label_lock(label):
+                value = self.compute_fn(label)
+                self._store(label, value, version)
+            with self._lock:
+                self.counters["refreshes"] += 1
+        except Exception as e:
+            with self._lock:
+                self.counters["refresh_errors"] += 1
+            logger.warning("Recommendation refresh failed for %s: %s", label, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(label)
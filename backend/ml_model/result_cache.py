@@ -0,0 +1,146 @@
+import os
+import hashlib
+import datetime
+import threading
+import time
+from collections import OrderedDict
+
+import config.database as database
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Config ===
+CACHE_MAX_ENTRIES = int(os.getenv("CLASSIFICATION_CACHE_MAX_ENTRIES", "2048"))
+CACHE_TTL_SECONDS = int(os.getenv("CLASSIFICATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_USE_MONGO = os.getenv("CLASSIFICATION_CACHE_MONGO", "false").lower() in ("1", "true", "yes")
+CACHE_COLLECTION = "classification_cache"
+
+
+def model_fingerprint(model_path):
+    """Content hash of the model file, so a retrained `do7.keras` never serves stale results."""
+    digest = hashlib.sha256()
+    with open(model_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+class ClassificationCache:
+    """
+    Two-tier cache of classifier output keyed by the sha256 digest of the encoded
+    image bytes + model fingerprint.
+    Tier 1 is an in-process LRU with size and TTL eviction; tier 2 is an optional
+    MongoDB collection so hits survive restarts.
+    """
+
+    def __init__(self, model_id, max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS, use_mongo=CACHE_USE_MONGO):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_mongo = use_mongo
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._indexes_ready = False
+        self.counters = {"hits": 0, "mongo_hits": 0, "misses": 0, "evictions": 0}
+
+    def key_for(self, digest):
+        return f"{self.model_id}:{digest}"
+
+    def get(self, digest):
+        if self.model_id is None:
+            # No model loaded yet: there is no key a result could be valid under
+            return None
+        key = self.key_for(digest)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return dict(result)
+                del self._entries[key]
+
+        result = self._mongo_get(key)
+        if result is not None:
+            self._remember(key, result)
+            with self._lock:
+                self.counters["mongo_hits"] += 1
+            return dict(result)
+
+        with self._lock:
+            self.counters["misses"] += 1
+        return None
+
+    def put(self, digest, result):
+        if self.model_id is None:
+            return
+        key = self.key_for(digest)
+        result = {"acne_type": result["acne_type"], "confidence": result["confidence"]}
+        self._remember(key, result)
+        self._mongo_put(key, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["mongo_hits"] + self.counters["misses"]
+            hits = self.counters["hits"] + self.counters["mongo_hits"]
+            return {
+                **self.counters,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_ratio": (hits / lookups) if lookups else 0.0,
+                "model_id": self.model_id,
+                "mongo_enabled": self.use_mongo,
+            }
+
+    # === Memory tier ===
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    # === Mongo tier ===
+    def _collection(self):
+        if not self.use_mongo or database.db is None:
+            return None
+        collection = database.db[CACHE_COLLECTION]
+        if not self._indexes_ready:
+            # Mongo's TTL monitor drops expired documents for us
+            collection.create_index("created_at", expireAfterSeconds=self.ttl_seconds)
+            self._indexes_ready = True
+        return collection
+
+    def _mongo_get(self, key):
+        try:
+            collection = self._collection()
+            if collection is None:
+                return None
+            doc = collection.find_one({"_id": key}, {"_id": 0, "acne_type": 1, "confidence": 1})
+            return doc
+        except Exception as e:
+            logger.warning("Classification cache lookup failed: %s", e)
+            return None
+
+    def _mongo_put(self, key, result):
+        try:
+            collection = self._collection()
+            if collection is None:
+                return
+            collection.update_one(
+                {"_id": key},
+                {"$set": {**result, "model_id": self.model_id, "created_at": datetime.datetime.now(datetime.timezone.utc)}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.warning("Classification cache write failed: %s", e)
@@ -0,0 +1,81 @@
+"""
+Per-label retrieval contexts, precomputed when the index is built.
+
+The recommendation query is fixed per acne class, so its embedding and its
+top-k chunks only change when the index does. index_builder stores them in
+contexts.json next to the index, stamped with the version of the index they
+came from; at runtime a matching file lets recommendations skip the
+embedding model and FAISS entirely.
+"""
+import os
+import json
+import hashlib
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+CONTEXTS_NAME = "contexts.json"
+RETRIEVAL_K = 4
+
+# === Labels ===
+class_labels = ["Acne", "Keratosis", "Milia"]
+
+
+def recommendation_query(acne_type):
+    return f"What is {acne_type}? List the ingredients, products and selfcare tips for {acne_type}."
+
+
+def index_version(manifest):
+    """Content version of an index: its embedding model plus the hash of every PDF in it."""
+    digest = hashlib.sha256(manifest.get("embedding_model", "").encode())
+    for name, entry in sorted(manifest.get("files", {}).items()):
+        digest.update(f"{name}:{entry['sha256']}".encode())
+    return digest.hexdigest()[:16]
+
+
+def build_contexts(vector_store, embedding_model, version, labels=class_labels, k=RETRIEVAL_K):
+    contexts = {}
+    for label in labels:
+        query = recommendation_query(label)
+        # embed_query, as similarity_search would, so the results are identical
+        embedding = embedding_model.embed_query(query)
+        documents = vector_store.similarity_search_by_vector(embedding, k=k)
+        contexts[label] = {
+            "query": query,
+            "embedding": [float(value) for value in embedding],
+            "chunk_ids": [getattr(document, "id", None) for document in documents],
+            "passages": [document.page_content for document in documents],
+        }
+    return {"version": version, "k": k, "labels": contexts}
+
+
+def save_contexts(index_path, contexts):
+    path = os.path.join(index_path, CONTEXTS_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(contexts, f)
+    os.replace(tmp_path, path)
+
+
+def load_contexts(index_path, manifest, labels=class_labels, k=RETRIEVAL_K):
+    """The stored label -> context map, or None when missing or computed for another index/query/k."""
+    if manifest is None:
+        return None
+    try:
+        with open(os.path.join(index_path, CONTEXTS_NAME)) as f:
+            contexts = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if contexts.get("version") != index_version(manifest) or contexts.get("k") != k:
+        return None
+    entries = contexts.get("labels", {})
+    for label in labels:
+        if entries.get(label, {}).get("query") != recommendation_query(label):
+            return None
+    return entries
+
+
+def context_text(entry):
+    return "\n\n".join(entry["passages"])
@@ -0,0 +1,136 @@
+import os
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Config ===
+# auto: first exported artifact found next to the .keras file (onnx, then tflite), else Keras
+INFERENCE_RUNTIME = os.getenv("INFERENCE_RUNTIME", "auto").lower()
+RUNTIMES = ("keras", "onnx", "tflite")
+ARTIFACT_SUFFIXES = {"onnx": ".onnx", "tflite": ".tflite"}
+
+
+def artifact_path(model_path, runtime):
+    """do7.keras -> do7.onnx / do7.tflite"""
+    if runtime == "keras":
+        return model_path
+    return os.path.splitext(model_path)[0] + ARTIFACT_SUFFIXES[runtime]
+
+
+def resolve_runtime(model_path, runtime=INFERENCE_RUNTIME):
+    """Pick (runtime, path) to serve from; an explicit runtime must have its artifact on disk."""
+    if runtime == "auto":
+        for candidate in ("onnx", "tflite"):
+            path = artifact_path(model_path, candidate)
+            if os.path.exists(path):
+                return candidate, path
+        return "keras", model_path
+    if runtime not in RUNTIMES:
+        raise ValueError(f"Unknown INFERENCE_RUNTIME '{runtime}', expected auto or one of {RUNTIMES}")
+    path = artifact_path(model_path, runtime)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{runtime} artifact not found at {path}; run `python -m ml_model.export_model`")
+    return runtime, path
+
+
+# === Predictors ===
+# All expose predict(batch, verbose=0) -> (n, classes) like a Keras model
+class KerasPredictor:
+    runtime = "keras"
+
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0):
+        import tensorflow as tf
+
+        if intra_op_threads:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+        if inter_op_threads:
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        self.model = tf.keras.models.load_model(path)
+
+    def predict(self, batch, verbose=0):
+        return self.model.predict(batch, verbose=verbose)
+
+
+class OnnxPredictor:
+    runtime = "onnx"
+
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+        self.session = ort.InferenceSession(path, sess_options=options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.input_type = self.session.get_inputs()[0].type
+
+    def predict(self, batch, verbose=0):
+        # fp16-converted graphs keep a float16 input unless exported with keep_io_types
+        dtype = np.float16 if self.input_type == "tensor(float16)" else np.float32
+        return self.session.run(None, {self.input_name: np.asarray(batch, dtype=dtype)})[0].astype(np.float32)
+
+
+class TFLitePredictor:
+    runtime = "tflite"
+
+    def __init__(self, path, intra_op_threads=0, inter_op_threads=0):
+        try:
+            # The standalone interpreter avoids importing full TensorFlow
+            from ai_edge_litert.interpreter import Interpreter
+        except ImportError:
+            try:
+                from tflite_runtime.interpreter import Interpreter
+            except ImportError:
+                from tensorflow.lite import Interpreter
+
+        self.interpreter = Interpreter(model_path=path, num_threads=intra_op_threads or None)
+        self.input = self.interpreter.get_input_details()[0]
+        self.output = self.interpreter.get_output_details()[0]
+        self._batch_size = None
+
+    def predict(self, batch, verbose=0):
+        batch = np.asarray(batch)
+        if self._batch_size != len(batch):
+            self.interpreter.resize_tensor_input(self.input["index"], (len(batch),) + batch.shape[1:])
+            self.interpreter.allocate_tensors()
+            self._batch_size = len(batch)
+        self.interpreter.set_tensor(self.input["index"], _quantize(batch, self.input))
+        self.interpreter.invoke()
+        return _dequantize(self.interpreter.get_tensor(self.output["index"]), self.output)
+
+
+def _quantize(batch, detail):
+    if detail["dtype"] in (np.int8, np.uint8):
+        scale, zero_point = detail["quantization"]
+        info = np.iinfo(detail["dtype"])
+        return np.clip(np.round(batch / scale + zero_point), info.min, info.max).astype(detail["dtype"])
+    return batch.astype(detail["dtype"], copy=False)
+
+
+def _dequantize(values, detail):
+    if detail["dtype"] in (np.int8, np.uint8):
+        scale, zero_point = detail["quantization"]
+        return (values.astype(np.float32) - zero_point) * scale
+    return values.astype(np.float32, copy=False)
+
+
+PREDICTORS = {"keras": KerasPredictor, "onnx": OnnxPredictor, "tflite": TFLitePredictor}
+
+
+def load_predictor(model_path, runtime=INFERENCE_RUNTIME, intra_op_threads=0, inter_op_threads=0):
+    runtime, path = resolve_runtime(model_path, runtime)
+    predictor = PREDICTORS[runtime](path, intra_op_threads, inter_op_threads)
+    predictor.path = path
+    logger.info("Classifier loaded with the %s runtime from %s", runtime, os.path.basename(path))
+    return predictor
+
+
+def worker_predictor(model_path, intra_op_threads, inter_op_threads):
+    """InferenceProcessPool loader: same runtime selection, with the worker's thread counts."""
+    return load_predictor(model_path, intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads).predict
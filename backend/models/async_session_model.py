@@ -0,0 +1,84 @@
+from config.async_database import init_async_db
+from models.session_model import (
+    Session, InvalidSessionUpdate, DEFAULT_PAGE_SIZE, SESSION_SUMMARY_PROJECTION, SESSION_LISTING_SORT
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _sessions():
+    return init_async_db().sessions
+
+
+class AsyncSession:
+    """
+    Motor version of Session for the ASGI app: the same Session helpers build
+    the queries and read the results, only the Mongo calls are awaited.
+    """
+
+    @staticmethod
+    async def create_session(uid, session_id, session_name):
+        await _sessions().insert_one(Session.new_document(uid, session_id, session_name))
+        return session_id
+
+    @staticmethod
+    def get_user_sessions(uid, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Motor cursor over up to `limit + 1` summaries (read it with `to_list`); see Session.get_user_sessions."""
+        return _sessions().find(Session.listing_query(uid, cursor), SESSION_SUMMARY_PROJECTION) \
+            .sort(SESSION_LISTING_SORT) \
+            .limit(limit + 1)
+
+    @staticmethod
+    async def get_session_by_id(session_id):
+        return Session.fetched(session_id, await _sessions().find_one({"session_id": session_id}, {"_id": 0}))
+
+    @staticmethod
+    async def delete_session(session_id):
+        return Session.deleted(await _sessions().delete_one({"session_id": session_id}))
+
+    @staticmethod
+    async def add_images_to_session(uid, session_id, image_object):
+        try:
+            result = await _sessions().update_one(*Session.image_push(uid, session_id, image_object))
+        except InvalidSessionUpdate as e:
+            return False, str(e)
+        except Exception as e:
+            return Session.db_error("add_images_to_session", e)
+        return Session.image_pushed(result)
+
+    @staticmethod
+    async def update_classification_results(session_id, classification_results):
+        try:
+            result = await _sessions().update_one(*Session.classification_update(session_id, classification_results))
+        except InvalidSessionUpdate as e:
+            return False, str(e)
+        except Exception as e:
+            return Session.db_error("update_classification_results", e)
+        return Session.classification_updated(result)
+
+    @staticmethod
+    async def bulk_update_classification_results(results_by_session):
+        """See Session.bulk_update_classification_results."""
+        if not results_by_session:
+            return True, 0
+        try:
+            result = await _sessions().bulk_write(Session.bulk_results_operations(results_by_session), ordered=False)
+        except Exception as e:
+            return Session.db_error("bulk_update_classification_results", e)
+        return Session.bulk_written(result)
+
+    @staticmethod
+    async def get_image_urls_by_session_ids(session_ids):
+        """{session_id: first image URL} for the given sessions (ones without an image are left out)."""
+        sessions = await _sessions().find(*Session.image_urls_query(session_ids)).to_list(length=None)
+        return Session.image_urls(sessions)
+
+    @staticmethod
+    async def get_image_url_by_session_id(session_id):
+        try:
+            session = await _sessions().find_one({"session_id": session_id}, {"_id": 0, "images": 1})
+        except Exception:
+            logger.exception("DB error in get_image_url_by_session_id")
+            return None
+        return Session.first_image_url(session)
@@ -0,0 +1,54 @@
+from pymongo.errors import DuplicateKeyError
+from config.async_database import init_async_db
+from models.user_cache import user_cache
+from models.user_model import (
+    UPSERT_OPTIONS, NAME_UPDATE_OPTIONS, new_user_document, upsert_args, name_update_args,
+    settle_lookup, settle_name_update, settle_upsert, settle_duplicate
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _users():
+    return init_async_db()["users"]
+
+
+class AsyncUser:
+    """Motor version of User for the ASGI app; same queries and outcomes, shares its user cache."""
+
+    @staticmethod
+    async def create_user(uid, name, email):
+        user_data = new_user_document(uid, name, email)
+        await _users().insert_one(user_data)
+        user_cache.put(user_data)
+
+    @staticmethod
+    async def ensure_user(uid, name, email):
+        """Async User.ensure_user: (user, created) with zero or one Mongo op. Raises EmailInUse."""
+        user = user_cache.get(uid)
+        if user is not None:
+            return user, False
+
+        new_user = new_user_document(uid, name, email)
+        try:
+            before = await _users().find_one_and_update(*upsert_args(new_user), **UPSERT_OPTIONS)
+        except DuplicateKeyError as e:
+            return settle_duplicate(uid, e, await _users().find_one({"uid": uid}))
+        return settle_upsert(new_user, before)
+
+    @staticmethod
+    async def find_by_email(email):
+        return await _users().find_one({"email": email})
+
+    @staticmethod
+    async def find_by_uid(uid):
+        user = user_cache.get(uid)
+        if user is None:
+            user = settle_lookup(await _users().find_one({"uid": uid}))
+        return user
+
+    @staticmethod
+    async def update_name(uid, name):
+        user = await _users().find_one_and_update(*name_update_args(uid, name), **NAME_UPDATE_OPTIONS)
+        return settle_name_update(uid, user)
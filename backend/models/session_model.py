@@ -1,8 +1,41 @@
 from config.database import db
+from pymongo import UpdateOne
+from utils.logger import get_logger, log_payload
 import uuid
+import json
+import base64
 import datetime
 
+logger = get_logger(__name__)
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# What the session list needs; images and LLM text are served by /session/<id>
+SESSION_SUMMARY_PROJECTION = {
+    "_id": 0,
+    "session_id": 1,
+    "session_name": 1,
+    "created_at": 1,
+    "classification_results.acne_type": 1,
+    "classification_results.confidence": 1,
+    "classification_results.classified_at": 1
+}
+# Newest first; session_id breaks created_at ties so the keyset cursor is unambiguous
+SESSION_LISTING_SORT = [("created_at", -1), ("session_id", -1)]
+
+
+class InvalidSessionUpdate(ValueError):
+    """The update was rejected before reaching Mongo; the message is returned to the caller."""
+
+
 class Session:
+    """
+    Sessions on the sync pymongo client. The static helpers below the Mongo
+    calls build every filter/update and read every result, so AsyncSession
+    (models/async_session_model.py) only swaps in the awaited Motor call.
+    """
+
     @staticmethod
     def store_image(uid, session_id, image_url):
         db.sessions.update_one(
@@ -13,114 +46,133 @@ class Session:
     @staticmethod
     def create_session(uid, session_id, session_name):
         """Create a new session with a name."""
-        db.sessions.insert_one({
-            "uid": uid,
-            "session_id": session_id,
-            "session_name": session_name,
-            "images": [],
-            "classification_results": None,
-            "created_at": datetime.datetime.now()
-        })
+        db.sessions.insert_one(Session.new_document(uid, session_id, session_name))
         return session_id
 
     @staticmethod
-    def get_user_sessions(uid):
-        """Get all sessions for a user including session names."""
-        sessions = list(db.sessions.find(
-            {"uid": uid},
-            {
-                "_id": 0,
-                "uid": 1,
-                "session_id": 1,
-                "session_name": 1,
-                "created_at": 1,
-                "images": 1,
-                "classification_results": 1
-            }
-        ))
-        print(f"Retrieved sessions for {uid}: {sessions}")
-        return sessions
+    def get_user_sessions(uid, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """
+        Newest-first page of session summaries for a user.
+
+        Returns a live pymongo cursor over up to `limit + 1` documents; the
+        extra one only tells the caller there is a next page. `cursor` is the
+        opaque token from a previous page (see encode_cursor).
+        """
+        return db.sessions.find(Session.listing_query(uid, cursor), SESSION_SUMMARY_PROJECTION) \
+            .sort(SESSION_LISTING_SORT) \
+            .limit(limit + 1)
+
+    @staticmethod
+    def listing_page(sessions, limit):
+        """
+        {"sessions", "next_cursor"} from the up to `limit + 1` documents
+        fetched by get_user_sessions (already a list, so it never grows past
+        MAX_PAGE_SIZE + 1 summaries).
+        """
+        page = sessions[:limit]
+        next_cursor = Session.encode_cursor(page[-1]) if len(sessions) > limit and page else None
+        return {"sessions": page, "next_cursor": next_cursor}
+
+    @staticmethod
+    def listing_query(uid, cursor=None):
+        """Filter for the page of `uid`'s sessions that starts after `cursor`."""
+        query = {"uid": uid}
+        if cursor:
+            created_at, session_id = Session.decode_cursor(cursor)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "session_id": {"$lt": session_id}}
+            ]
+        return query
+
+    @staticmethod
+    def encode_cursor(session):
+        """Opaque keyset token pointing just after `session` in the listing order."""
+        payload = json.dumps({"c": session["created_at"].isoformat(), "s": session["session_id"]})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    @staticmethod
+    def decode_cursor(cursor):
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return datetime.datetime.fromisoformat(payload["c"]), payload["s"]
+        except Exception:
+            raise ValueError("Invalid cursor")
 
     @staticmethod
     def get_session_by_id(session_id):
         """Get a single session by its ID."""
-        session = db.sessions.find_one(
-            {"session_id": session_id},
-            {"_id": 0}
-        )
-        print(f"Fetched session for session_id {session_id}: {session}")
-        return session
+        return Session.fetched(session_id, db.sessions.find_one({"session_id": session_id}, {"_id": 0}))
 
     @staticmethod
     def delete_session(session_id):
         """Delete a session by ID."""
-        result = db.sessions.delete_one({"session_id": session_id})
-        if result.deleted_count > 0:
-            return True, "Session deleted successfully"
-        return False, "Session not found"
+        return Session.deleted(db.sessions.delete_one({"session_id": session_id}))
 
     @staticmethod
     def add_images_to_session(uid, session_id, image_object):
         """
         Add a single image object (dict with url + delete_url) to the session.
         """
-        if not uid or not session_id or not image_object:
-            return False, "Missing parameters"
-
-        if not isinstance(image_object, dict) or "url" not in image_object or "delete_url" not in image_object:
-            print("⚠️ image_object must be a dict with 'url' and 'delete_url'")
-            return False, "Invalid image format"
-
         try:
-            result = db.sessions.update_one(
-                {"uid": uid, "session_id": session_id},
-                {"$push": {"images": image_object}}
-            )
-
-            if result.matched_count == 0:
-                return False, "Session not found"
-
-            return True, "Image added successfully"
+            result = db.sessions.update_one(*Session.image_push(uid, session_id, image_object))
+        except InvalidSessionUpdate as e:
+            return False, str(e)
         except Exception as e:
-            print("❌ DB Error in add_images_to_session:", str(e))
-            return False, f"Internal server error: {str(e)}"
+            return Session.db_error("add_images_to_session", e)
+        return Session.image_pushed(result)
+
+    @staticmethod
+    def results_document(classification_results):
+        """Shape a classify_and_recommend result into the stored `classification_results` subdocument."""
+        # Fix for accessing nested structure
+        return {
+            "acne_type": classification_results.get("classification", {}).get("acne_type"),
+            "confidence": classification_results.get("classification", {}).get("confidence"),
+            "recommendations": classification_results.get("recommendation"),  # Note: singular not plural
+            "classified_at": datetime.datetime.now()
+        }
 
     @staticmethod
     def update_classification_results(session_id, classification_results):
         try:
-            if not isinstance(classification_results, dict):
-                return False, "Invalid classification result format"
-
-            print(f"[📝] Updating session {session_id} with result: {classification_results}")
-
-            # Fix for accessing nested structure
-            results_data = {
-                "acne_type": classification_results.get("classification", {}).get("acne_type"),
-                "confidence": classification_results.get("classification", {}).get("confidence"),
-                "recommendations": classification_results.get("recommendation"),  # Note: singular not plural
-                "classified_at": datetime.datetime.now()
-            }
-
-            print(f"[🔍] Database update with data: {results_data}")
-
-            result = db.sessions.update_one(
-                {"session_id": session_id},
-                {"$set": {
-                    "classification_results": results_data,
-                    "updated_at": datetime.datetime.now()
-                }}
-            )
-
-            if result.matched_count == 0:
-                return False, "Session not found"
+            result = db.sessions.update_one(*Session.classification_update(session_id, classification_results))
+        except InvalidSessionUpdate as e:
+            return False, str(e)
+        except Exception as e:
+            return Session.db_error("update_classification_results", e)
+        return Session.classification_updated(result)
 
-            if result.modified_count == 1:
-                return True, "Classification results updated successfully"
-            return True, "Classification already up-to-date"
+    @staticmethod
+    def results_update(session_id, results_data):
+        """(filter, update) that stores `results_data` on a session."""
+        return (
+            {"session_id": session_id},
+            {"$set": {
+                "classification_results": results_data,
+                "updated_at": datetime.datetime.now()
+            }}
+        )
 
+    @staticmethod
+    def bulk_update_classification_results(results_by_session):
+        """
+        Store many {session_id: classify_and_recommend result} pairs in one
+        unordered bulk_write instead of one round trip per session.
+        Returns (success, matched_count or error message).
+        """
+        if not results_by_session:
+            return True, 0
+        try:
+            result = db.sessions.bulk_write(Session.bulk_results_operations(results_by_session), ordered=False)
         except Exception as e:
-            print(f"❌ DB Error in update_classification_results: {str(e)}")
-            return False, f"Internal server error: {str(e)}"
+            return Session.db_error("bulk_update_classification_results", e)
+        return Session.bulk_written(result)
+
+    @staticmethod
+    def get_image_urls_by_session_ids(session_ids):
+        """{session_id: first image URL} for the given sessions (ones without an image are left out)."""
+        return Session.image_urls(db.sessions.find(*Session.image_urls_query(session_ids)))
 
     @staticmethod
     def get_image_url_by_session_id(session_id):
@@ -134,28 +186,117 @@ class Session:
             str or None: The image URL or None if not found
         """
         try:
-            session = db.sessions.find_one(
-                {"session_id": session_id},
-                {"_id": 0, "images": 1}
-            )
+            session = db.sessions.find_one({"session_id": session_id}, {"_id": 0, "images": 1})
+        except Exception:
+            logger.exception("DB error in get_image_url_by_session_id")
+            return None
+        return Session.first_image_url(session)
 
-            if not session or not session.get("images"):
-                return None
+    @staticmethod
+    def first_image_url(session):
+        """URL of the first image in a session document, whatever shape it was stored in."""
+        if not session or not session.get("images"):
+            return None
 
-            first_image = session["images"][0]
+        first_image = session["images"][0]
 
-            # Handle nested list case
-            if isinstance(first_image, list):
-                first_image = first_image[0] if first_image else None
+        # Handle nested list case
+        if isinstance(first_image, list):
+            first_image = first_image[0] if first_image else None
 
-            if isinstance(first_image, dict) and "url" in first_image:
-                return first_image["url"]
+        if isinstance(first_image, dict) and "url" in first_image:
+            return first_image["url"]
 
-            # Fallback if image was just a string
-            if isinstance(first_image, str):
-                return first_image
+        # Fallback if image was just a string
+        if isinstance(first_image, str):
+            return first_image
 
-            return None
-        except Exception as e:
-            print(f"❌ DB Error in get_image_url_by_session_id: {str(e)}")
-            return None
+        return None
+
+    # === Shared with AsyncSession: documents in, results out ===
+    @staticmethod
+    def new_document(uid, session_id, session_name):
+        return {
+            "uid": uid,
+            "session_id": session_id,
+            "session_name": session_name,
+            "images": [],
+            "classification_results": None,
+            "created_at": datetime.datetime.now()
+        }
+
+    @staticmethod
+    def fetched(session_id, session):
+        log_payload(logger, f"Fetched session {session_id}", session)
+        return session
+
+    @staticmethod
+    def deleted(result):
+        if result.deleted_count > 0:
+            return True, "Session deleted successfully"
+        return False, "Session not found"
+
+    @staticmethod
+    def image_push(uid, session_id, image_object):
+        """(filter, update) appending `image_object`; raises InvalidSessionUpdate."""
+        if not uid or not session_id or not image_object:
+            raise InvalidSessionUpdate("Missing parameters")
+        if not isinstance(image_object, dict) or "url" not in image_object or "delete_url" not in image_object:
+            logger.warning("image_object must be a dict with 'url' and 'delete_url'")
+            raise InvalidSessionUpdate("Invalid image format")
+        return {"uid": uid, "session_id": session_id}, {"$push": {"images": image_object}}
+
+    @staticmethod
+    def image_pushed(result):
+        if result.matched_count == 0:
+            return False, "Session not found"
+        return True, "Image added successfully"
+
+    @staticmethod
+    def classification_update(session_id, classification_results):
+        """(filter, update) storing a classify_and_recommend result; raises InvalidSessionUpdate."""
+        if not isinstance(classification_results, dict):
+            raise InvalidSessionUpdate("Invalid classification result format")
+        results_data = Session.results_document(classification_results)
+        log_payload(logger, f"Updating classification results for session {session_id}", results_data)
+        return Session.results_update(session_id, results_data)
+
+    @staticmethod
+    def classification_updated(result):
+        if result.matched_count == 0:
+            return False, "Session not found"
+        if result.modified_count == 1:
+            return True, "Classification results updated successfully"
+        return True, "Classification already up-to-date"
+
+    @staticmethod
+    def bulk_results_operations(results_by_session):
+        return [
+            UpdateOne(*Session.results_update(session_id, Session.results_document(result)))
+            for session_id, result in results_by_session.items()
+        ]
+
+    @staticmethod
+    def bulk_written(result):
+        logger.info("Bulk-stored classification results: %d matched, %d modified",
+                    result.matched_count, result.modified_count)
+        return True, result.matched_count
+
+    @staticmethod
+    def image_urls_query(session_ids):
+        return {"session_id": {"$in": list(session_ids)}}, {"_id": 0, "session_id": 1, "images": 1}
+
+    @staticmethod
+    def image_urls(sessions):
+        """{session_id: first image URL} (sessions without an image are left out)."""
+        urls = {}
+        for session in sessions:
+            image_url = Session.first_image_url(session)
+            if image_url:
+                urls[session["session_id"]] = image_url
+        return urls
+
+    @staticmethod
+    def db_error(operation, error):
+        logger.error("DB error in %s", operation, exc_info=error)
+        return False, f"Internal server error: {str(error)}"
@@ -0,0 +1,71 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+# === Config ===
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "10000"))
+# Per process: a name changed through another worker shows up here after at most this long
+USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+
+
+class UserCache:
+    """
+    In-process LRU of user documents by uid, with TTL eviction. Writers go
+    through User / AsyncUser, which put the updated document back here
+    (write-through), so this process never serves its own stale writes.
+    """
+
+    def __init__(self, max_entries=USER_CACHE_MAX_ENTRIES, ttl_seconds=USER_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, uid):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(uid)
+            if entry is not None:
+                expires_at, user = entry
+                if expires_at > now:
+                    self._entries.move_to_end(uid)
+                    self.counters["hits"] += 1
+                    return dict(user)
+                del self._entries[uid]
+            self.counters["misses"] += 1
+            return None
+
+    def put(self, user):
+        if not user or not user.get("uid"):
+            return
+        # _id is an ObjectId nobody reads from here; keep the cached copy plain
+        user = {key: value for key, value in user.items() if key != "_id"}
+        with self._lock:
+            self._entries[user["uid"]] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(user["uid"])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def invalidate(self, uid):
+        with self._lock:
+            self._entries.pop(uid, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_ratio": (self.counters["hits"] / lookups) if lookups else 0.0,
+            }
+
+
+user_cache = UserCache()
@@ -1,17 +1,103 @@
 from config.database import init_db
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from models.user_cache import user_cache
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 db = init_db()  
+
+
+class UserNotFound(LookupError):
+    pass
+
+
+class EmailInUse(ValueError):
+    """A new uid tried to register an email that already belongs to another user."""
+
+
+# === Queries and outcomes (shared with AsyncUser, which only awaits the Mongo calls) ===
+UPSERT_OPTIONS = {"upsert": True, "return_document": ReturnDocument.BEFORE}
+NAME_UPDATE_OPTIONS = {"return_document": ReturnDocument.AFTER}
+
+
+def new_user_document(uid, name, email):
+    return {"uid": uid, "name": name, "email": email}
+
+
+def upsert_args(new_user):
+    """(filter, update) for ensure_user's $setOnInsert upsert."""
+    return {"uid": new_user["uid"]}, {"$setOnInsert": new_user}
+
+
+def name_update_args(uid, name):
+    logger.debug("Updating name for UID %s", uid)
+    return {"uid": uid}, {"$set": {"name": name}}
+
+
+def settle_lookup(user):
+    user_cache.put(user)
+    return user
+
+
+def settle_name_update(uid, user):
+    """Write the renamed user through to the cache; raises UserNotFound."""
+    if user is None:
+        user_cache.invalidate(uid)
+        logger.info("User with UID %s not found in MongoDB", uid)
+        raise UserNotFound("User not found")
+    user_cache.put(user)
+    return user
+
+
+def settle_upsert(new_user, before):
+    """The $setOnInsert upsert succeeded: `before` is None exactly when new_user was inserted."""
+    user = before if before is not None else new_user
+    user_cache.put(user)
+    return user, before is None
+
+
+def settle_duplicate(uid, error, existing):
+    """
+    The upsert hit a unique index. If a concurrent upsert for the same uid won,
+    `existing` is that user; otherwise the clash was on another key (email_unique)
+    and nothing was written, so nothing is cached.
+    """
+    if existing is None:
+        logger.info("User %s not created: %s", uid, error)
+        raise EmailInUse("Email is already registered to another user") from error
+    user_cache.put(existing)
+    return existing, False
+
+
 class User:
     collection = db["users"]
     
     @staticmethod
     def create_user(uid, name, email):
-        user_data = {
-            "uid": uid,
-            "name": name,
-            "email": email
-        }
+        user_data = new_user_document(uid, name, email)
         User.collection.insert_one(user_data)
+        user_cache.put(user_data)
+
+    @staticmethod
+    def ensure_user(uid, name, email):
+        """
+        Return (user, created): the stored user, inserting it first if it is new.
+        A cached user costs no Mongo op; otherwise one atomic upsert replaces
+        the old find-then-insert (and cannot race into a duplicate).
+        Raises EmailInUse when the email belongs to a different uid.
+        """
+        user = user_cache.get(uid)
+        if user is not None:
+            return user, False
+
+        new_user = new_user_document(uid, name, email)
+        try:
+            before = User.collection.find_one_and_update(*upsert_args(new_user), **UPSERT_OPTIONS)
+        except DuplicateKeyError as e:
+            return settle_duplicate(uid, e, User.collection.find_one({"uid": uid}))
+        return settle_upsert(new_user, before)
     
     @staticmethod
     def find_by_email(email):
@@ -19,29 +105,13 @@ class User:
     
     @staticmethod
     def find_by_uid(uid):
-        return User.collection.find_one({"uid": uid})
+        user = user_cache.get(uid)
+        if user is None:
+            user = settle_lookup(User.collection.find_one({"uid": uid}))
+        return user
 
     @staticmethod
     def update_name(uid, name):
-        try:
-            print(f"📌 Attempting to update name - UID: {uid}, New Name: {name}")  # Debug
-
-            # Check if user exists before updating
-            user = User.collection.find_one({"uid": uid})
-            if not user:
-                print(f"❌ User with UID {uid} not found in MongoDB")
-                raise Exception("User not found")
-
-            # Perform the update
-            result = User.collection.update_one({"uid": uid}, {"$set": {"name": name}})
-
-            print(f"✅ MongoDB Update Result: Acknowledged: {result.acknowledged}, Matched: {result.matched_count}, Modified: {result.modified_count}")
-
-            if result.matched_count == 0:
-                raise Exception("Update failed: No matching UID found")
-
-            return result
-
-        except Exception as e:
-            print(f"🔥 Error in update_name: {str(e)}")  # Print exact error in console
-            raise
\ No newline at end of file
+        """One find_one_and_update; the updated user is written through to the cache. Raises UserNotFound."""
+        user = User.collection.find_one_and_update(*name_update_args(uid, name), **NAME_UPDATE_OPTIONS)
+        return settle_name_update(uid, user)
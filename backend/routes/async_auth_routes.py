@@ -0,0 +1,42 @@
+from quart import Blueprint, request, jsonify
+from werkzeug.exceptions import HTTPException
+from models.async_user_model import AsyncUser
+from controllers.auth_controller import FIREBASE_VERIFY_TOKENS, verify_request_token_async
+from controllers import auth_controller as api
+from utils.logger import get_logger
+
+# Same URLs and JSON as routes/auth_routes.py; CORS is applied app-wide in asgi.py
+auth_bp = Blueprint('auth', __name__)
+logger = get_logger(__name__)
+
+@auth_bp.errorhandler(Exception)
+async def handle_error(e):
+    if isinstance(e, HTTPException):
+        return e
+    error = api.as_request_error(e, request.endpoint)
+    return jsonify(error.body), error.status_code, error.headers
+
+@auth_bp.route('/verify-token', methods=['POST', 'OPTIONS'])
+async def verify_token():
+    """See routes/auth_routes.py; token checks that miss the cache run off the event loop."""
+    if request.method == "OPTIONS":
+        return '', 200
+
+    data = await request.get_json()
+    claims = await verify_request_token_async(data, request.headers) if FIREBASE_VERIFY_TOKENS else None
+    uid, email, name = api.request_identity(data, claims)
+    _, created = await AsyncUser.ensure_user(uid=uid, name=name, email=email)
+    return jsonify(api.authenticated(uid, created)), 200
+
+
+@auth_bp.route('/check-user-info', methods=['GET', 'POST'])
+async def check_user_info():
+    uid = api.user_info_uid(await request.get_json())
+    return jsonify(api.user_info(uid, await AsyncUser.find_by_uid(uid))), 200
+
+
+@auth_bp.route('/update-name', methods=['POST'])
+async def update_name():
+    uid, name = api.name_update_params(await request.get_json())
+    await AsyncUser.update_name(uid, name)
+    return jsonify(api.name_updated(uid)), 200
@@ -0,0 +1,142 @@
+from quart import Blueprint, request, jsonify, Response
+from werkzeug.exceptions import HTTPException
+from models.async_session_model import AsyncSession
+from models.session_model import Session
+from utils.logger import get_logger
+from utils.metrics import span
+import uuid
+from ml_model.async_inference import (
+    wait_until_ready_async, fetch_image_async, classify_image_url_async,
+    classify_and_recommend_async, stream_recommendation_async
+)
+from controllers.classification_jobs import job_queue
+from controllers.batch_classification import items_for_urls
+from controllers.async_batch_classification import items_for_sessions_async, classify_batch_async
+from controllers.dermatologists import USE_MOCK_DATA, MOCK_DERMATOLOGISTS, locator
+from controllers import session_controller as api
+
+# Same URLs and JSON as routes/session_routes.py, served by asgi.py; every
+# check and response body comes from controllers.session_controller
+session_bp = Blueprint('session', __name__)
+logger = get_logger(__name__)
+
+@session_bp.errorhandler(Exception)
+async def handle_error(e):
+    if isinstance(e, HTTPException):
+        return e
+    error = api.as_request_error(e, request.endpoint)
+    return jsonify(error.body), error.status_code, error.headers
+
+@session_bp.route('/start-session', methods=['POST'])
+async def start_session():
+    uid, session_name = api.start_session_params(await request.get_json())
+    session_id = str(uuid.uuid4())
+    await AsyncSession.create_session(uid, session_id, session_name)
+    return jsonify({"session_id": session_id, "session_name": session_name}), 201
+
+@session_bp.route('/get-sessions', methods=['GET', 'POST'])
+async def get_sessions():
+    params = (await request.get_json(silent=True) or {}) if request.method == 'POST' else request.args
+    uid, limit, cursor = api.listing_params(params)
+    sessions = await AsyncSession.get_user_sessions(uid, limit=limit, cursor=cursor).to_list(length=limit + 1)
+    return jsonify(Session.listing_page(sessions, limit)), 200
+
+@session_bp.route("/<session_id>", methods=["GET"])
+async def fetch_session_details(session_id):
+    return jsonify(api.session_details(await AsyncSession.get_session_by_id(session_id))), 200
+
+@session_bp.route("/delete-session/<session_id>", methods=["DELETE"])
+async def delete_session(session_id):
+    return jsonify(api.deleted(*await AsyncSession.delete_session(session_id))), 200
+
+@session_bp.route("/<session_id>/upload-image", methods=["POST", "OPTIONS"])
+async def upload_images(session_id):
+    if request.method == "OPTIONS":
+        return "", 200
+
+    uid, image_object = api.upload_params(await request.get_json())
+    with span("store_image"):
+        api.image_stored(*await AsyncSession.add_images_to_session(uid, session_id, image_object))
+
+    # The job pipeline runs on its own thread pools either way
+    job = job_queue.submit(session_id, image_object["url"])
+    return jsonify(api.upload_accepted(session_id, job)), 202
+
+@session_bp.route("/<session_id>/job/<job_id>", methods=["GET"])
+async def get_job_status(session_id, job_id):
+    return jsonify(api.job_status(job_queue.get(job_id), session_id)), 200
+
+@session_bp.route("/<session_id>/classify", methods=["POST"])
+async def classify_uploaded_image(session_id):
+    await wait_until_ready_async()
+    image_url = api.session_image_url(await AsyncSession.get_session_by_id(session_id))
+
+    try:
+        result = await classify_and_recommend_async(image_url, image=await fetch_image_async(image_url))
+    except Exception as e:
+        raise api.classification_failed(e, session_id)
+
+    with span("save_results"):
+        success, message = await AsyncSession.update_classification_results(session_id, result)
+    return jsonify(api.classified(result, success, message)), 200
+
+@session_bp.route("/batch-classify", methods=["POST"])
+async def batch_classify():
+    """Async /batch-classify; same request and response as routes/session_routes.py."""
+    session_ids, image_urls, recommend, save = api.batch_params(await request.get_json(silent=True) or {})
+    await wait_until_ready_async()
+    if session_ids is not None:
+        items = await items_for_sessions_async(session_ids)
+    else:
+        items = items_for_urls(image_urls)
+    return jsonify(api.batch_done(await classify_batch_async(items, recommend=recommend, save=save))), 200
+
+@session_bp.route("/<session_id>/classify-stream", methods=["GET", "POST"])
+async def classify_stream(session_id):
+    """SSE events as in the sync app: `classification`, `token`..., then `done` or `error`."""
+    await wait_until_ready_async()
+    image_url = api.require_image_url(await AsyncSession.get_image_url_by_session_id(session_id))
+
+    try:
+        classification = await classify_image_url_async(image_url)
+    except Exception as e:
+        raise api.classification_failed(e, session_id)
+
+    async def generate():
+        yield api.sse_event("classification", classification).encode()
+
+        parts = []
+        try:
+            async for token in stream_recommendation_async(classification["acne_type"]):
+                parts.append(token)
+                yield api.sse_event("token", {"token": token}).encode()
+        except Exception:
+            logger.exception("Recommendation stream failed for session %s", session_id)
+            yield api.sse_event("error", {"error": "Recommendation stream failed."}).encode()
+            return
+
+        result = api.streamed_result(classification, parts, image_url)
+        with span("save_results"):
+            success, message = await AsyncSession.update_classification_results(session_id, result)
+        yield api.saved_event(result, success, message).encode()
+
+    response = Response(generate(), mimetype="text/event-stream", headers=api.SSE_HEADERS)
+    response.timeout = None  # LLM streams outlive Quart's default response timeout
+    return response
+
+@session_bp.route("/<session_id>/update-classification", methods=["POST"])
+async def update_classification(session_id):
+    result_data = api.classification_update(session_id, await request.get_json())
+    with span("save_results"):
+        success, message = await AsyncSession.update_classification_results(session_id, result_data)
+    return jsonify(api.classification_updated(session_id, success, message)), 200
+
+@session_bp.route("/<session_id>/nearest-dermatologists", methods=["GET"])
+async def get_nearest_dermatologists(session_id):
+    if USE_MOCK_DATA:
+        logger.debug("Using mock dermatologist data")
+        return jsonify({"dermatologists": MOCK_DERMATOLOGISTS}), 200
+
+    api.require_session(await AsyncSession.get_session_by_id(session_id))
+    lat, lng, radius = api.dermatologist_query(request.args)
+    return jsonify({"dermatologists": await locator.find_async(lat, lng, radius)}), 200
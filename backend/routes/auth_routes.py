@@ -1,59 +1,43 @@
 from flask import Blueprint, request, jsonify
-from firebase_admin import auth
 from flask_cors import cross_origin
+from werkzeug.exceptions import HTTPException
 from models.user_model import User
-import traceback
+from controllers.auth_controller import FIREBASE_VERIFY_TOKENS, verify_request_token
+from controllers import auth_controller as api
+from utils.logger import get_logger
 
 auth_bp = Blueprint('auth', __name__)
+logger = get_logger(__name__)
+
+@auth_bp.errorhandler(Exception)
+def handle_error(e):
+    # Validation lives in controllers.auth_controller; it and anything unexpected end up here
+    if isinstance(e, HTTPException):
+        return e
+    error = api.as_request_error(e, request.endpoint)
+    return jsonify(error.body), error.status_code, error.headers
 
 @auth_bp.route('/verify-token', methods=['POST', 'OPTIONS'])
 @cross_origin(origins="http://localhost:5173", supports_credentials=True)
 def verify_token():
     """
-    Accepts UID and Email directly from frontend (NO token verification).
-    WARNING: Only for local development.
+    With FIREBASE_VERIFY_TOKENS, verifies the Firebase ID token (cached, local
+    signature check) and uses its uid/email/name. Otherwise accepts UID and
+    Email directly from frontend (NO token verification).
+    WARNING: the unverified mode is only for local development.
     """
     if request.method == "OPTIONS":
         # This handles the CORS preflight request
         return '', 200
-    
-    try:
-        print("📥 Received /verify-token request")
-        data = request.get_json()
-        print(f"📦 Request Data: {data}")
-
-        uid = data.get('uid')
-        email = data.get('email')
-        name = data.get('name', 'Unknown')
-
-        if not uid:
-            print("❌ UID missing")
-            return jsonify({'error': 'UID is required'}), 400
-
-        if not email:
-            print("⚠️ Email missing for UID: {uid}")
-
-        print(f"👤 UID: {uid}, Email: {email}, Name: {name}")
 
-        # Check if user exists in DB
-        user = User.find_by_uid(uid)
-        if not user:
-            print("🆕 New user, creating in MongoDB")
-            User.create_user(uid=uid, name=name, email=email)
-        else:
-            print("✅ User already exists in DB")
+    logger.debug("Received /verify-token request")
+    data = request.get_json()
+    claims = verify_request_token(data, request.headers) if FIREBASE_VERIFY_TOKENS else None
+    uid, email, name = api.request_identity(data, claims)
 
-        print("✅ User authenticated and processed")
-        return jsonify({'message': 'User authenticated successfully', 'uid': uid}), 200
-
-    except Exception as e:
-        print(f"🔥 Internal Server Error: {str(e)}")
-        traceback.print_exc()
-        return jsonify({
-            'error': 'Internal Server Error',
-            'details': str(e),
-            'traceback': traceback.format_exc()
-        }), 500
+    # Cached users cost nothing; otherwise one atomic upsert
+    _, created = User.ensure_user(uid=uid, name=name, email=email)
+    return jsonify(api.authenticated(uid, created)), 200
 
 
 @auth_bp.route('/check-user-info', methods=['GET', 'POST'])
@@ -62,59 +46,15 @@ def check_user_info():
     """
     Checks if the user's name is "Unknown" and requires an update.
     """
-    try:
-        print("📥 Received /check-user-info request")
-        data = request.get_json()
-        print(f"📦 Request Data: {data}")
-
-        uid = data.get('uid')
-        if not uid:
-            print("❌ UID missing")
-            return jsonify({'error': 'UID is required'}), 400
-
-        user = User.find_by_uid(uid)
-        if not user:
-            print(f"❌ User with UID {uid} not found")
-            return jsonify({'error': 'User not found'}), 404
-
-        requires_update = user.get("name", "Unknown") == "Unknown"
-        print(f"🔍 Name check result: requiresUpdate = {requires_update}, Name = {user.get('name')}")
-
-        return jsonify({'requiresUpdate': requires_update, 'name': user.get("name", "Unknown")}), 200
-
-    except Exception as e:
-        print(f"🔥 Internal Server Error: {str(e)}")
-        traceback.print_exc()
-        return jsonify({'error': str(e)}), 500
+    logger.debug("Received /check-user-info request")
+    uid = api.user_info_uid(request.get_json())
+    return jsonify(api.user_info(uid, User.find_by_uid(uid))), 200
 
 
 @auth_bp.route('/update-name', methods=['POST'])
 @cross_origin(origins="http://localhost:5173", supports_credentials=True)
 def update_name():
-    try:
-        print("📥 Received /update-name request")
-        data = request.get_json()
-        print(f"📦 Request Data: {data}")
-
-        uid = data.get('uid')
-        name = data.get('name')
-
-        print(f"📌 Update request: UID={uid}, Name={name}")
-
-        if not uid or not name:
-            print("❌ Missing UID or Name")
-            return jsonify({'error': 'UID and Name are required'}), 400
-
-        user = User.find_by_uid(uid)
-        if not user:
-            print(f"❌ User with UID {uid} not found in DB")
-            return jsonify({'error': 'User not found'}), 404
-
-        User.update_name(uid, name)
-        print("✅ User name updated successfully")
-        return jsonify({'message': 'User name updated successfully'}), 200
-
-    except Exception as e:
-        print(f"🔥 Internal Server Error: {str(e)}")
-        traceback.print_exc()
-        return jsonify({'error': 'Internal Server Error', 'details': str(e)}), 500
\ No newline at end of file
+    logger.debug("Received /update-name request")
+    uid, name = api.name_update_params(request.get_json())
+    User.update_name(uid, name)
+    return jsonify(api.name_updated(uid)), 200
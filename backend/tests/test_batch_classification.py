@@ -0,0 +1,28 @@
+import pytest
+
+from controllers.batch_classification import parse_batch_request, MAX_BATCH_ITEMS
+
+
+def test_flags_accept_booleans_and_boolean_strings():
+    assert parse_batch_request({"image_urls": ["u"], "recommend": True, "save": False}) == (None, ["u"], True, False)
+    assert parse_batch_request({"session_ids": ["s"], "recommend": "false", "save": "0"}) == (["s"], None, False, False)
+    assert parse_batch_request({"image_urls": ["u"], "save": "yes"}) == (None, ["u"], True, True)
+
+
+@pytest.mark.parametrize("value", ["nope", 0, 1, None, []])
+def test_flags_reject_anything_else(value):
+    with pytest.raises(ValueError, match="recommend must be a boolean"):
+        parse_batch_request({"image_urls": ["u"], "recommend": value, "save": False})
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"session_ids": ["s"], "image_urls": ["u"]},
+    {"image_urls": []},
+    {"image_urls": [""]},
+    {"image_urls": ["u"] * (MAX_BATCH_ITEMS + 1)},
+    {"image_urls": ["u"], "recommend": "false"},
+])
+def test_invalid_bodies(body):
+    with pytest.raises(ValueError):
+        parse_batch_request(body)
@@ -0,0 +1,112 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from ml_model.batcher import InferenceBatcher
+
+
+class FakeModel:
+    """predict_fn that answers each row with its own first value, and records batch sizes."""
+
+    def __init__(self, before=None):
+        self.before = before
+        self.batches = []
+
+    def __call__(self, inputs):
+        self.batches.append(len(inputs))
+        if self.before is not None:
+            self.before(inputs)
+        return inputs.reshape(len(inputs), -1)[:, :1] * 10.0
+
+
+def image(value):
+    return np.full((1, 2, 2, 3), value, dtype=np.float32)
+
+
+def test_flushes_when_batch_is_full():
+    model = FakeModel()
+    batcher = InferenceBatcher(model, max_batch_size=4, max_wait_ms=10_000)
+
+    futures = [batcher.submit(image(i)) for i in range(4)]
+
+    # Well before the 10s window: the fourth row fills the batch
+    assert [f.result(timeout=2)[0] for f in futures] == [0.0, 10.0, 20.0, 30.0]
+    assert model.batches == [4]
+
+
+def test_flushes_when_wait_window_expires():
+    model = FakeModel()
+    batcher = InferenceBatcher(model, max_batch_size=16, max_wait_ms=50)
+
+    started = time.monotonic()
+    assert batcher.predict(image(7), timeout=2)[0] == 70.0
+    assert time.monotonic() - started >= 0.04
+    assert model.batches == [1]
+
+
+def test_each_caller_gets_its_own_row():
+    model = FakeModel()
+    batcher = InferenceBatcher(model, max_batch_size=8, max_wait_ms=200)
+    start = threading.Barrier(8)
+    results = {}
+
+    def call(value):
+        start.wait()
+        results[value] = batcher.predict(image(value), timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert {value: row.tolist() for value, row in results.items()} == {i: [i * 10.0] for i in range(8)}
+    assert sum(model.batches) == 8
+
+
+def test_submit_rows_chunks_and_reassembles_in_order():
+    model = FakeModel()
+    batcher = InferenceBatcher(model, max_batch_size=4, max_wait_ms=0)
+    batch = np.concatenate([image(i) for i in range(10)])
+
+    futures = batcher.submit_rows(batch)
+    assert [len(f.result(timeout=2)) for f in futures] == [4, 4, 2]
+
+    rows = batcher.predict_rows(batch, timeout=2)
+    assert rows[:, 0].tolist() == [i * 10.0 for i in range(10)]
+    assert batcher.predict_rows(batch[:0]).shape == (0, 0)
+
+
+def test_error_reaches_every_future_in_the_batch():
+    def fail(inputs):
+        raise RuntimeError("model exploded")
+
+    batcher = InferenceBatcher(FakeModel(before=fail), max_batch_size=3, max_wait_ms=10_000)
+
+    futures = [batcher.submit(image(i)) for i in range(3)]
+
+    for future in futures:
+        with pytest.raises(RuntimeError, match="model exploded"):
+            future.result(timeout=2)
+    assert batcher.stats()["errors"] == 1
+
+
+def test_max_in_flight_runs_batches_concurrently():
+    # Each predict waits for a second one to start: only passes if two batches are in flight at once
+    both_running = threading.Barrier(2, timeout=5)
+    model = FakeModel(before=lambda inputs: both_running.wait())
+    batcher = InferenceBatcher(model, max_batch_size=1, max_wait_ms=0, max_in_flight=2)
+
+    futures = [batcher.submit(image(i)) for i in range(2)]
+
+    assert sorted(f.result(timeout=5)[0] for f in futures) == [0.0, 10.0]
+    assert model.batches == [1, 1]
+    assert batcher.stats()["max_in_flight"] == 2
+
+
+def test_rejects_multi_image_submit():
+    batcher = InferenceBatcher(FakeModel())
+    with pytest.raises(ValueError):
+        batcher.submit(np.zeros((2, 2, 2, 3)))
@@ -0,0 +1,129 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from controllers import dermatologists
+from controllers.dermatologists import DermatologistLocator, PlaceIndex, PlacesLookupError
+
+
+def place(place_id, lat=18.52, lng=73.85, rating=4.5):
+    return {"place_id": place_id, "name": place_id, "rating": rating,
+            "geometry": {"location": {"lat": lat, "lng": lng}}}
+
+
+class FakeProvider:
+    name = "fake"
+
+    def __init__(self, answers, page_size=None, gate=None):
+        self.answers = list(answers)
+        self.page_size = page_size
+        self.gate = gate
+        self.calls = []
+
+    def nearby(self, lat, lng, radius):
+        self.calls.append((lat, lng, radius))
+        if self.gate is not None:
+            self.gate.wait(5)
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(dermatologists, "time", SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_expired_rows_are_compacted_on_add(clock):
+    index = PlaceIndex(ttl_seconds=10)
+    index.add([place("a"), place("b")])
+    clock[0] += 11
+    index.add([place("c"), place("a")])
+    assert len(index) == 2
+    assert sorted(entry["place_id"] for entry in index.nearest(18.52, 73.85)) == ["a", "c"]
+
+    clock[0] += 11
+    index.add([])
+    assert len(index) == 0 and index.nearest(18.52, 73.85) == []
+
+
+def test_concurrent_misses_share_one_provider_call(clock):
+    gate = threading.Event()
+    provider = FakeProvider([[place("a")]], gate=gate)
+    locator = DermatologistLocator(provider, ttl_seconds=60, precision=5, max_precision=5)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(locator.find(18.52, 73.85, 5000))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while locator.stats()["coalesced"] + locator.stats()["misses"] < 5:
+        pass
+    gate.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(provider.calls) == 1
+    assert [[entry["place_id"] for entry in result] for result in results] == [["a"]] * 5
+
+
+def test_failed_lookup_reaches_waiters_and_is_retried(clock):
+    provider = FakeProvider([PlacesLookupError("down", 502), [place("a")]])
+    locator = DermatologistLocator(provider, ttl_seconds=60, precision=5, max_precision=5)
+
+    with pytest.raises(PlacesLookupError):
+        locator.find(18.52, 73.85, 5000)
+    assert [entry["place_id"] for entry in locator.find(18.52, 73.85, 5000)] == ["a"]
+    assert len(provider.calls) == 2
+
+
+def test_full_page_moves_the_lookup_to_the_callers_sub_cell(clock):
+    provider = FakeProvider([[place("far-1"), place("far-2")], [place("near")]], page_size=2)
+    locator = DermatologistLocator(provider, ttl_seconds=60, precision=5, max_precision=7)
+
+    assert len(locator.find(18.52, 73.85, 5000)) == 3
+    assert len(provider.calls) == 2
+    # The sub-cell search is centred closer to the caller with a tighter radius
+    assert provider.calls[1][2] < provider.calls[0][2]
+
+    locator.find(18.52, 73.85, 5000)
+    assert len(provider.calls) == 2 and locator.stats()["hits"] == 1
+
+
+def test_a_place_repeated_in_one_answer_is_indexed_once(clock):
+    index = PlaceIndex(ttl_seconds=10)
+    nameless = {"name": "Clinic", "rating": 4.2, "geometry": {"location": {"lat": 18.53, "lng": 73.85}}}
+    index.add([place("a"), dict(place("a"), rating=4.9), nameless, dict(nameless)])
+    assert len(index) == 2
+    assert [entry["rating"] for entry in index.nearest(18.52, 73.85)] == [4.9, 4.2]
+
+    index.add([place("b"), place("a")])
+    assert sorted(entry["place_id"] for entry in index.nearest(18.52, 73.85)) == ["", "a", "b"]
+
+
+def test_a_failure_while_indexing_releases_the_waiters(clock):
+    provider = FakeProvider([[place("a")], [place("a")]])
+    locator = DermatologistLocator(provider, ttl_seconds=60, precision=5, max_precision=5)
+
+    def broken_add(places):
+        raise RuntimeError("index broke")
+    locator.index.add = broken_add
+    with pytest.raises(RuntimeError):
+        locator.find(18.52, 73.85, 5000)
+    assert locator._pending == {}
+
+    del locator.index.add
+    assert [entry["place_id"] for entry in locator.find(18.52, 73.85, 5000)] == ["a"]
+
+
+def test_waiters_give_up_after_places_wait_seconds(clock, monkeypatch):
+    monkeypatch.setattr(dermatologists, "PLACES_WAIT_SECONDS", 0.05)
+    locator = DermatologistLocator(FakeProvider([]), ttl_seconds=60, precision=5, max_precision=5)
+    query, pending = locator._provider_query(18.52, 73.85, 5000)  # an owner that never finishes
+
+    with pytest.raises(PlacesLookupError) as error:
+        locator.find(18.52, 73.85, 5000)
+    assert error.value.status_code == 504 and not pending.done()
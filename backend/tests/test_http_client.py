@@ -0,0 +1,182 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from urllib3.connection import HTTPConnection
+
+from utils import http_client as http_client_module
+from utils.http_client import CircuitBreaker, CircuitOpenError, HttpClient, MAX_RETRIES
+
+
+# === CircuitBreaker ===
+def test_breaker_opens_half_opens_and_closes():
+    now = [100.0]
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30, clock=lambda: now[0])
+
+    for _ in range(2):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+    now[0] += 29.9
+    assert not breaker.allow()
+
+    # Reset window over: exactly one trial request gets through
+    now[0] += 0.1
+    assert breaker.allow()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    assert breaker.allow()
+
+
+def test_failed_trial_reopens_for_a_full_window():
+    now = [100.0]
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=30, clock=lambda: now[0])
+    breaker.record_failure()
+
+    now[0] += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    now[0] += 29
+    assert not breaker.allow()
+    now[0] += 1
+    assert breaker.allow()
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=30, clock=lambda: 0.0)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+# === HttpClient retries ===
+class Upstream:
+    """Local HTTP server answering with scripted statuses (the last one repeats) and counting hits."""
+
+    def __init__(self, statuses, delay=0.0):
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.hits = 0
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _answer(self):
+                upstream.hits += 1
+                status = upstream.statuses.pop(0) if len(upstream.statuses) > 1 else upstream.statuses[0]
+                time.sleep(upstream.delay)
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            do_GET = do_POST = _answer
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # No sleeping between retries
+    monkeypatch.setattr(http_client_module, "RETRY_BACKOFF", 0)
+    return HttpClient()
+
+
+@pytest.fixture
+def upstream():
+    servers = []
+
+    def start(statuses, delay=0.0):
+        server = Upstream(statuses, delay)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+@pytest.mark.parametrize("status", [502, 503, 504])
+def test_retries_gateway_errors(client, upstream, status):
+    server = upstream([status, status, 200])
+    assert client.get(server.url).status_code == 200
+    assert server.hits == 3
+
+
+def test_gives_up_after_max_retries(client, upstream):
+    server = upstream([503])
+    assert client.get(server.url).status_code == 503
+    assert server.hits == MAX_RETRIES + 1
+
+
+@pytest.mark.parametrize("status", [500, 404, 429])
+def test_other_statuses_are_not_retried(client, upstream, status):
+    server = upstream([status, 200])
+    assert client.get(server.url).status_code == status
+    assert server.hits == 1
+
+
+def test_post_is_not_retried(client, upstream):
+    server = upstream([503, 200])
+    assert client.post(server.url).status_code == 503
+    assert server.hits == 1
+
+
+def test_read_timeout_is_not_retried(client, upstream):
+    server = upstream([200], delay=0.5)
+    # read=0: urllib3 gives up on the first read timeout (surfacing as a ConnectionError)
+    with pytest.raises(requests.ConnectionError, match="Read timed out"):
+        client.get(server.url, timeout=(1, 0.1))
+    assert server.hits == 1
+
+
+def test_connect_errors_are_retried(client, monkeypatch):
+    # A port nobody listens on
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    attempts = []
+    new_conn = HTTPConnection._new_conn
+
+    def counting(self):
+        attempts.append(self.port)
+        return new_conn(self)
+
+    monkeypatch.setattr(HTTPConnection, "_new_conn", counting)
+    with pytest.raises(requests.ConnectionError):
+        client.get(f"http://127.0.0.1:{port}/")
+    assert attempts == [port] * (MAX_RETRIES + 1)
+
+
+def test_breaker_stops_calls_to_a_failing_upstream(client, upstream):
+    server = upstream([500])
+    for _ in range(http_client_module.BREAKER_FAILURE_THRESHOLD):
+        assert client.get(server.url, upstream="flaky").status_code == 500
+
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url, upstream="flaky")
+    assert server.hits == http_client_module.BREAKER_FAILURE_THRESHOLD
+    assert client.stats()["flaky"]["circuit"] == CircuitBreaker.OPEN
@@ -0,0 +1,105 @@
+import hashlib
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from utils.image_fetch import ImageTooLarge, NotAnImage, _StreamDecoder
+
+
+def encode(fmt, size=(800, 600)):
+    buffer = BytesIO()
+    Image.new("RGB", size, (200, 120, 90)).save(buffer, fmt)
+    return buffer.getvalue()
+
+
+def stream(decoder, data, chunk_size=5):
+    # Small chunks so the header sniff spans several feeds
+    for start in range(0, len(data), chunk_size):
+        decoder.feed(data[start:start + chunk_size])
+    return decoder.close()
+
+
+def test_jpeg_with_draft_size_decodes_at_reduced_scale():
+    data = encode("JPEG")
+    decoder = _StreamDecoder(len(data), draft_size=(224, 224))
+
+    result = stream(decoder, data, chunk_size=1024)
+
+    assert decoder.parser is None
+    # Smallest 1/2..1/8 scale still covering 224x224
+    assert result.image.size == (400, 300)
+    assert result.digest == hashlib.sha256(data).hexdigest()
+    assert result.size == len(data)
+
+
+def test_jpeg_without_draft_size_goes_through_the_parser():
+    data = encode("JPEG")
+    decoder = _StreamDecoder(len(data))
+
+    result = stream(decoder, data)
+
+    assert decoder.parser is not None and decoder.encoded is None
+    assert result.image.size == (800, 600)
+    assert result.digest == hashlib.sha256(data).hexdigest()
+
+
+def test_png_is_parsed_even_with_draft_size():
+    data = encode("PNG", size=(64, 48))
+    decoder = _StreamDecoder(len(data), draft_size=(224, 224))
+
+    result = stream(decoder, data)
+
+    assert decoder.parser is not None
+    assert result.image.size == (64, 48)
+    assert result.size == len(data)
+
+
+@pytest.mark.parametrize("draft_size", [None, (224, 224)])
+def test_body_over_the_cap_is_rejected_while_streaming(draft_size):
+    data = encode("JPEG")
+    decoder = _StreamDecoder(len(data) - 1, draft_size)
+
+    with pytest.raises(ImageTooLarge):
+        stream(decoder, data, chunk_size=1024)
+    assert decoder.total <= len(data)
+
+
+def test_content_length_over_the_cap_is_rejected_up_front():
+    decoder = _StreamDecoder(1000)
+    decoder.check_length("1000")
+    decoder.check_length(None)
+    decoder.check_length("not-a-number")
+    with pytest.raises(ImageTooLarge) as excinfo:
+        decoder.check_length("1001")
+    assert excinfo.value.status_code == 400
+
+
+def test_junk_is_rejected_by_header_sniff():
+    decoder = _StreamDecoder(1 << 20)
+    with pytest.raises(NotAnImage) as excinfo:
+        decoder.feed(b"<html><body>")
+    assert excinfo.value.status_code == 400
+
+
+def test_junk_is_rejected_as_soon_as_the_header_is_in():
+    decoder = _StreamDecoder(1 << 20)
+    decoder.feed(b"<html>")
+    with pytest.raises(NotAnImage):
+        decoder.feed(b"<body>not an image</body></html>")
+
+
+def test_body_shorter_than_the_header_is_rejected():
+    decoder = _StreamDecoder(1 << 20)
+    decoder.feed(b"\xff\xd8")
+    with pytest.raises(NotAnImage):
+        decoder.close()
+
+
+@pytest.mark.parametrize("fmt,draft_size", [("JPEG", (224, 224)), ("PNG", None)])
+def test_truncated_image_fails_to_decode(fmt, draft_size):
+    data = encode(fmt)[:200]
+    decoder = _StreamDecoder(1 << 20, draft_size)
+
+    with pytest.raises(NotAnImage, match="Error decoding image"):
+        stream(decoder, data)
@@ -0,0 +1,71 @@
+import os
+import shutil
+
+import pytest
+
+pytest.importorskip("faiss")
+pytest.importorskip("langchain_community")
+
+from langchain_community.embeddings import FakeEmbeddings
+from langchain_core.documents import Document
+
+from ml_model import index_builder
+
+
+def fake_parse_pdf(path):
+    """One chunk per line, so tests can use plain-text files named *.pdf."""
+    with open(path) as f:
+        return [Document(page_content=line, metadata={"source": path}) for line in f.read().splitlines() if line]
+
+
+@pytest.fixture
+def folders(tmp_path, monkeypatch):
+    monkeypatch.setattr(index_builder, "parse_pdf", fake_parse_pdf)
+    # In-process parsing: a spawn pool would not see the patched parser
+    monkeypatch.setattr(index_builder, "PARSE_WORKERS", 1)
+    monkeypatch.setattr(index_builder, "build_contexts", lambda *args: {"version": args[2], "k": 0, "labels": {}})
+
+    pdf_folder = tmp_path / "pdfs"
+    pdf_folder.mkdir()
+    (pdf_folder / "a.pdf").write_text("alpha one\nalpha two\nalpha three\n")
+    (pdf_folder / "b.pdf").write_text("beta one\nbeta two\n")
+    return str(pdf_folder), str(tmp_path / "index")
+
+
+def sync(pdf_folder, index_path):
+    return index_builder.sync_index(FakeEmbeddings(size=16), pdf_folder, index_path)
+
+
+def stored_ids(vector_store):
+    return set(vector_store.index_to_docstore_id.values())
+
+
+def test_rename_replaces_chunks(folders):
+    pdf_folder, index_path = folders
+    sync(pdf_folder, index_path)
+
+    os.rename(os.path.join(pdf_folder, "a.pdf"), os.path.join(pdf_folder, "renamed.pdf"))
+    vector_store, plan = sync(pdf_folder, index_path)
+    assert plan.added == ["renamed.pdf"] and plan.removed == ["a.pdf"]
+    assert vector_store.index.ntotal == 5
+    assert all(not chunk_id.startswith("a.pdf:") for chunk_id in stored_ids(vector_store))
+
+    # And the index is usable again on the next run
+    vector_store, plan = sync(pdf_folder, index_path)
+    assert not plan.content_changed and vector_store.index.ntotal == 5
+
+
+def test_copy_gets_its_own_chunks(folders):
+    pdf_folder, index_path = folders
+    sync(pdf_folder, index_path)
+
+    shutil.copy(os.path.join(pdf_folder, "a.pdf"), os.path.join(pdf_folder, "copy.pdf"))
+    vector_store, _ = sync(pdf_folder, index_path)
+    assert vector_store.index.ntotal == 8
+
+    # Removing the original must leave the copy's chunks in place
+    os.remove(os.path.join(pdf_folder, "a.pdf"))
+    vector_store, _ = sync(pdf_folder, index_path)
+    manifest = index_builder.load_manifest(index_path)
+    assert vector_store.index.ntotal == 5
+    assert set(manifest["files"]["copy.pdf"]["chunk_ids"]) <= stored_ids(vector_store)
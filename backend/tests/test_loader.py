@@ -0,0 +1,44 @@
+import time
+
+from ml_model.loader import ResourceLoader, ModelsNotReady
+
+import pytest
+
+
+def flaky(failures):
+    calls = []
+
+    def load():
+        calls.append(time.time())
+        if len(calls) <= failures:
+            raise RuntimeError("mongo down")
+        return "loaded"
+
+    return load, calls
+
+
+def test_failed_load_is_retried_after_backoff():
+    load, calls = flaky(failures=1)
+    loader = ResourceLoader("test", load, retry_seconds=0.05, max_retry_seconds=1)
+
+    with pytest.raises(ModelsNotReady):
+        loader.get(timeout=5)
+    assert loader.state == loader.FAILED and loader.status()["failures"] == 1
+
+    # Inside the backoff window: no new attempt
+    with pytest.raises(ModelsNotReady):
+        loader.get(timeout=5)
+    assert len(calls) == 1
+
+    time.sleep(0.06)
+    assert loader.get(timeout=5) == "loaded"
+    assert len(calls) == 2 and loader.status()["error"] is None
+
+
+def test_backoff_doubles_up_to_the_cap():
+    load, _ = flaky(failures=10)
+    loader = ResourceLoader("test", load, retry_seconds=10, max_retry_seconds=25)
+    for failures, expected in [(1, 10), (2, 20), (3, 25)]:
+        loader.failures = failures
+        loader.finished_at = time.time()
+        assert loader._retry_in() == pytest.approx(expected, abs=0.5)
@@ -0,0 +1,94 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from ml_model.process_pool import INPUT_SHAPE, InferenceProcessPool, WorkerCrashed
+
+# First pixel values that make the fake model misbehave inside the worker
+CRASH = -1.0
+HANG = -2.0
+
+
+def mean_predictor(intra_op_threads, inter_op_threads):
+    """Stand-in for runtime.worker_predictor: per-channel means, no model to load."""
+    def predict(inputs):
+        first = inputs[0, 0, 0, 0]
+        if first == CRASH:
+            os._exit(1)
+        if first == HANG:
+            time.sleep(60)
+        return inputs.mean(axis=(1, 2))
+    return predict
+
+
+def images(*values):
+    """(n, 224, 224, 3) batch whose channels hold (v, 2v, 3v) for each value."""
+    batch = np.empty((len(values),) + INPUT_SHAPE, dtype=np.float32)
+    for row, value in enumerate(values):
+        batch[row] = np.array([value, 2 * value, 3 * value], dtype=np.float32)
+    return batch
+
+
+def expected(*values):
+    return np.array([[v, 2 * v, 3 * v] for v in values], dtype=np.float32)
+
+
+@pytest.fixture(scope="module")
+def pool():
+    # spawn workers re-import this module to unpickle mean_predictor
+    pool = InferenceProcessPool((), workers=1, max_batch=4, loader=mean_predictor,
+                                timeout=2, load_timeout=60, health_check_seconds=3600)
+    pool.start()
+    yield pool
+    pool.close()
+
+
+def slot(pool):
+    return pool._slots[0]
+
+
+def test_round_trips_through_shared_memory(pool):
+    np.testing.assert_allclose(pool.predict(images(1, 2, 3)), expected(1, 2, 3))
+    # A smaller batch after a larger one only reads its own rows of the slab
+    np.testing.assert_allclose(pool.predict(images(5)), expected(5))
+
+
+def test_splits_inputs_larger_than_max_batch(pool):
+    values = list(range(1, 11))
+    before = slot(pool).batches
+
+    np.testing.assert_allclose(pool.predict(images(*values)), expected(*values))
+    assert slot(pool).batches - before == 3
+
+
+def test_worker_killed_while_idle_is_restarted_before_the_next_predict(pool):
+    worker = slot(pool)
+    restarts = worker.restarts
+    worker.process.kill()
+    worker.process.join(timeout=5)
+
+    np.testing.assert_allclose(pool.predict(images(4)), expected(4))
+    assert worker.restarts == restarts + 1
+
+
+def test_crash_during_predict_restarts_the_worker(pool):
+    worker = slot(pool)
+    restarts = worker.restarts
+
+    with pytest.raises(WorkerCrashed, match="crashed"):
+        pool.predict(images(CRASH))
+    assert worker.restarts == restarts + 1
+    np.testing.assert_allclose(pool.predict(images(6)), expected(6))
+
+
+def test_hung_worker_is_restarted_after_the_timeout(pool):
+    worker = slot(pool)
+    restarts = worker.restarts
+
+    with pytest.raises(WorkerCrashed, match="timed out"):
+        pool.predict(images(HANG))
+    assert worker.restarts == restarts + 1
+    np.testing.assert_allclose(pool.predict(images(7)), expected(7))
+    assert pool.stats()["slots"][0]["alive"]
@@ -0,0 +1,47 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from config import database
+
+database.db = database.db or mongomock.MongoClient()["skincare_test"]
+
+from controllers import reclassify
+
+
+class CountingCollection:
+    """Wraps a collection and records every find(), to check no cursor spans two pages."""
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.queries = []
+
+    def find(self, query, projection):
+        self.queries.append(dict(query))
+        return self.collection.find(query, projection)
+
+
+@pytest.fixture
+def sessions(monkeypatch):
+    db = mongomock.MongoClient()["skincare_test"]
+    db.sessions.insert_many(
+        [{"session_id": f"s{i:02d}", "images": [{"url": f"u{i}"}]} for i in range(7)]
+        + [{"session_id": "s99", "images": []}]
+    )
+    collection = CountingCollection(db.sessions)
+    monkeypatch.setattr(reclassify, "db", type("DB", (), {"sessions": collection})())
+    return collection
+
+
+def test_all_session_ids_are_read_one_page_at_a_time(sessions):
+    ids = reclassify.iter_all_session_ids(page_size=3)
+    assert next(ids) == "s00" and len(sessions.queries) == 1
+
+    assert ["s00"] + list(ids) == [f"s{i:02d}" for i in range(7)]
+    assert len(sessions.queries) == 3
+    assert sessions.queries[-1]["session_id"] == {"$gt": "s05"}
+
+
+def test_limit_stops_paging(sessions):
+    assert list(reclassify.iter_all_session_ids(limit=4, page_size=3)) == ["s00", "s01", "s02", "s03"]
+    assert len(sessions.queries) == 2
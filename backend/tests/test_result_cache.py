@@ -0,0 +1,12 @@
+from ml_model.result_cache import ClassificationCache
+
+
+def test_nothing_is_cached_before_the_model_id_is_known():
+    cache = ClassificationCache(model_id=None, use_mongo=False)
+    cache.put("digest", {"acne_type": "Acne", "confidence": 0.9})
+    assert cache.get("digest") is None and cache.stats()["size"] == 0
+
+    cache.model_id = "model-a"
+    cache.put("digest", {"acne_type": "Acne", "confidence": 0.9})
+    assert cache.get("digest") == {"acne_type": "Acne", "confidence": 0.9}
+    assert cache.key_for("digest") == "model-a:digest"
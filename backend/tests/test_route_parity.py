@@ -0,0 +1,132 @@
+"""
+The Flask and Quart blueprints must answer the same requests the same way;
+both get their checks and bodies from controllers/, so this drives each
+with one script against its own in-memory database and compares.
+"""
+import asyncio
+
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+mongomock_motor = pytest.importorskip("mongomock_motor")
+pytest.importorskip("quart")
+
+from config import database, async_database
+
+database.db = database.db or mongomock.MongoClient()["skincare_test"]
+
+from flask import Flask
+from quart import Quart
+
+from models.user_model import User
+from models.user_cache import user_cache
+from routes import session_routes, auth_routes, async_session_routes, async_auth_routes
+import models.session_model as session_model
+
+# (method, path, json body or None); {sid} is the session created by the first request
+SCRIPT = [
+    ("POST", "/session/start-session", {"uid": "u1"}),
+    ("POST", "/session/start-session", {"uid": "u1", "session_name": "Morning"}),
+    ("GET", "/session/get-sessions", None),
+    ("GET", "/session/get-sessions?uid=u1&limit=abc", None),
+    ("GET", "/session/get-sessions?uid=u1&cursor=nope", None),
+    ("GET", "/session/get-sessions?uid=u1", None),
+    ("GET", "/session/{sid}", None),
+    ("GET", "/session/missing", None),
+    ("POST", "/session/{sid}/upload-image", {"uid": "u1"}),
+    ("POST", "/session/{sid}/upload-image", {"uid": "u1", "image_urls": [{"url": "x"}]}),
+    ("GET", "/session/{sid}/job/missing", None),
+    ("POST", "/session/{sid}/update-classification", {}),
+    ("POST", "/session/missing/update-classification", {"classification": {"acne_type": "Acne"}}),
+    ("POST", "/session/{sid}/update-classification", {"classification": {"acne_type": "Acne"}}),
+    ("POST", "/session/batch-classify", {"image_urls": ["u"], "recommend": "nope"}),
+    ("POST", "/session/batch-classify", {"image_urls": ["u"], "recommend": False}),
+    ("GET", "/session/missing/nearest-dermatologists?lat=1&lng=2", None),
+    ("GET", "/session/{sid}/nearest-dermatologists?lat=abc&lng=2", None),
+    ("DELETE", "/session/delete-session/missing", None),
+    ("DELETE", "/session/delete-session/{sid}", None),
+    ("POST", "/auth/verify-token", {"email": "a@example.com"}),
+    ("POST", "/auth/verify-token", {"uid": "u1", "email": "a@example.com"}),
+    ("POST", "/auth/verify-token", {"uid": "u2", "email": "a@example.com"}),
+    ("POST", "/auth/check-user-info", {}),
+    ("POST", "/auth/check-user-info", {"uid": "nobody"}),
+    ("POST", "/auth/check-user-info", {"uid": "u1"}),
+    ("POST", "/auth/update-name", {"uid": "u1"}),
+    ("POST", "/auth/update-name", {"uid": "nobody", "name": "N"}),
+    ("POST", "/auth/update-name", {"uid": "u1", "name": "Ana"}),
+]
+
+
+def normalise(body, session_id):
+    """Drop what legitimately differs between runs (ids, timestamps, cursors)."""
+    if isinstance(body, dict):
+        return {key: normalise(value, session_id) for key, value in body.items()
+                if key not in ("created_at", "next_cursor")}
+    if isinstance(body, list):
+        return [normalise(value, session_id) for value in body]
+    if body == session_id:
+        return "<sid>"
+    return body
+
+
+@pytest.fixture
+def fresh_databases(monkeypatch):
+    def reset():
+        sync_db = mongomock.MongoClient()["skincare_test"]
+        database.ensure_indexes(sync_db)
+        monkeypatch.setattr(session_model, "db", sync_db)
+        monkeypatch.setattr(User, "collection", sync_db["users"])
+        # Wrap its own mongomock client, so the indexes can be created synchronously as init_db does
+        async_client = mongomock.MongoClient()
+        database.ensure_indexes(async_client["skincare_test"])
+        async_db = mongomock_motor.AsyncMongoMockClient(mock_mongo_client=async_client)["skincare_test"]
+        monkeypatch.setattr(async_database, "async_db", async_db)
+        user_cache.clear()
+    yield reset
+    user_cache.clear()
+
+
+def run_sync():
+    app = Flask(__name__)
+    app.register_blueprint(auth_routes.auth_bp, url_prefix="/auth")
+    app.register_blueprint(session_routes.session_bp, url_prefix="/session")
+    client = app.test_client()
+    answers, session_id = [], None
+    for method, path, body in SCRIPT:
+        response = client.open(path.format(sid=session_id), method=method, json=body)
+        payload = response.get_json()
+        session_id = session_id or (payload or {}).get("session_id")
+        answers.append((response.status_code, normalise(payload, session_id)))
+    return answers
+
+
+def run_async():
+    app = Quart(__name__)
+    app.register_blueprint(async_auth_routes.auth_bp, url_prefix="/auth")
+    app.register_blueprint(async_session_routes.session_bp, url_prefix="/session")
+
+    async def drive():
+        client = app.test_client()
+        answers, session_id = [], None
+        for method, path, body in SCRIPT:
+            response = await client.open(path.format(sid=session_id), method=method, json=body)
+            payload = await response.get_json()
+            session_id = session_id or (payload or {}).get("session_id")
+            answers.append((response.status_code, normalise(payload, session_id)))
+        return answers
+
+    return asyncio.run(drive())
+
+
+def test_sync_and_async_blueprints_answer_alike(fresh_databases):
+    fresh_databases()
+    sync_answers = run_sync()
+    fresh_databases()
+    async_answers = run_async()
+
+    for (method, path, _), sync_answer, async_answer in zip(SCRIPT, sync_answers, async_answers):
+        assert sync_answer == async_answer, f"{method} {path}"
+    assert [status for status, _ in sync_answers] == [
+        400, 201, 400, 400, 400, 200, 200, 404, 400, 400, 404, 400, 404, 200, 400, 400, 404, 400, 404, 200,
+        400, 200, 409, 400, 404, 200, 400, 404, 200,
+    ]
@@ -0,0 +1,18 @@
+import datetime
+
+from models.session_model import Session
+
+
+def summary(i):
+    return {"session_id": f"s{i}", "created_at": datetime.datetime(2024, 1, 1, i)}
+
+
+def test_listing_page_uses_the_extra_document_only_as_a_next_page_marker():
+    page = Session.listing_page([summary(3), summary(2), summary(1)], limit=2)
+    assert [s["session_id"] for s in page["sessions"]] == ["s3", "s2"]
+    assert Session.decode_cursor(page["next_cursor"]) == (summary(2)["created_at"], "s2")
+
+
+def test_last_page_has_no_cursor():
+    assert Session.listing_page([summary(1)], limit=2) == {"sessions": [summary(1)], "next_cursor": None}
+    assert Session.listing_page([], limit=2) == {"sessions": [], "next_cursor": None}
@@ -0,0 +1,181 @@
+import json
+
+import pytest
+
+jwt = pytest.importorskip("jwt")
+rsa = pytest.importorskip("cryptography.hazmat.primitives.asymmetric.rsa")
+
+from jwt.algorithms import RSAAlgorithm
+
+from utils.token_verifier import (
+    FirebaseTokenVerifier, TokenVerificationError, KeyFetchError, MIN_REFETCH_SECONDS, static_keys
+)
+
+PROJECT = "skincare-test"
+NOW = 1_700_000_000.0
+
+
+def make_key(kid):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update(kid=kid, alg="RS256", use="sig")
+    return private_key, jwk
+
+
+@pytest.fixture(scope="module")
+def keys():
+    return {kid: make_key(kid) for kid in ("k1", "k2")}
+
+
+class Clock:
+    def __init__(self, now=NOW):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class Fetcher:
+    """Counts fetches; serves `jwks` or raises while `failing`."""
+
+    def __init__(self, *jwks, max_age=3600):
+        self.jwks = {"keys": list(jwks)}
+        self.max_age = max_age
+        self.failing = False
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.failing:
+            raise KeyFetchError("offline")
+        return self.jwks, self.max_age
+
+
+def sign(private_key, kid="k1", now=NOW, **overrides):
+    claims = {
+        "iss": f"https://securetoken.google.com/{PROJECT}",
+        "aud": PROJECT,
+        "sub": "user-1",
+        "iat": int(now) - 10,
+        "auth_time": int(now) - 10,
+        "exp": int(now) + 3600,
+        "email": "user@example.com",
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+def test_valid_token(keys):
+    private_key, jwk = keys["k1"]
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=static_keys({"keys": [jwk]}), clock=Clock())
+
+    claims = verifier.verify(sign(private_key))
+    assert claims["uid"] == "user-1" and claims["email"] == "user@example.com"
+
+
+def test_repeat_verification_is_served_from_cache(keys):
+    private_key, jwk = keys["k1"]
+    fetcher = Fetcher(jwk)
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=fetcher, clock=Clock())
+    token = sign(private_key)
+
+    verifier.verify(token)
+    for _ in range(5):
+        assert verifier.verify(token)["uid"] == "user-1"
+    assert fetcher.calls == 1
+    assert verifier.stats()["hits"] == 5 and verifier.stats()["misses"] == 1
+
+
+def test_expired_token_is_rejected_even_when_cached(keys):
+    private_key, jwk = keys["k1"]
+    clock = Clock()
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=static_keys({"keys": [jwk]}), clock=clock)
+    token = sign(private_key, exp=int(NOW) + 60)
+    verifier.verify(token)
+
+    clock.now += 61
+    assert verifier.cached_claims(token) is None
+    with pytest.raises(TokenVerificationError, match="expired"):
+        verifier.verify(token)
+
+
+@pytest.mark.parametrize("overrides", [
+    {"aud": "another-project"},
+    {"iss": "https://securetoken.google.com/another-project"},
+    {"sub": ""},
+    {"iat": int(NOW) + 600},
+])
+def test_token_for_another_project_or_malformed_claims_is_rejected(keys, overrides):
+    private_key, jwk = keys["k1"]
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=static_keys({"keys": [jwk]}), clock=Clock())
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(sign(private_key, **overrides))
+
+
+def test_token_signed_by_another_key_is_rejected(keys):
+    (_, jwk), (other_private_key, _) = keys["k1"], keys["k2"]
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=static_keys({"keys": [jwk]}), clock=Clock())
+    with pytest.raises(TokenVerificationError):
+        verifier.verify(sign(other_private_key, kid="k1"))
+
+
+def test_unknown_kid_refetches_at_most_once_per_interval(keys):
+    (_, jwk1), (private_key2, jwk2) = keys["k1"], keys["k2"]
+    clock = Clock()
+    fetcher = Fetcher(jwk1)
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=fetcher, clock=clock)
+    token = sign(private_key2, kid="k2")
+
+    # First use fetches; the kid is unknown and the keys were just fetched, so no refetch storm
+    for _ in range(3):
+        with pytest.raises(TokenVerificationError, match="unknown key"):
+            verifier.verify(token)
+    assert fetcher.calls == 1
+
+    # Google rotates; after the throttle interval an unknown kid triggers one refetch
+    fetcher.jwks = {"keys": [jwk1, jwk2]}
+    clock.now += MIN_REFETCH_SECONDS
+    assert verifier.verify(token)["uid"] == "user-1"
+    assert fetcher.calls == 2
+
+
+def test_keys_are_refetched_after_max_age(keys):
+    private_key, jwk = keys["k1"]
+    clock = Clock()
+    fetcher = Fetcher(jwk, max_age=600)
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=fetcher, clock=clock)
+
+    verifier.verify(sign(private_key, sub="a"))
+    clock.now += 599
+    verifier.verify(sign(private_key, sub="b", now=clock.now))
+    assert fetcher.calls == 1
+
+    clock.now += 2
+    verifier.verify(sign(private_key, sub="c", now=clock.now))
+    assert fetcher.calls == 2
+
+
+def test_failed_refresh_keeps_serving_cached_keys(keys):
+    private_key, jwk = keys["k1"]
+    clock = Clock()
+    fetcher = Fetcher(jwk, max_age=600)
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=fetcher, clock=clock)
+    verifier.verify(sign(private_key, sub="a"))
+
+    fetcher.failing = True
+    clock.now += 601
+    assert verifier.verify(sign(private_key, sub="b", now=clock.now))["uid"] == "b"
+    assert fetcher.calls == 2
+
+    # The failed refresh is retried after MIN_REFETCH_SECONDS, not on every request
+    verifier.verify(sign(private_key, sub="c", now=clock.now))
+    assert fetcher.calls == 2
+
+
+def test_no_keys_at_all_raises_key_fetch_error(keys):
+    private_key, jwk = keys["k1"]
+    fetcher = Fetcher(jwk)
+    fetcher.failing = True
+    verifier = FirebaseTokenVerifier(PROJECT, fetch_keys=fetcher, clock=Clock())
+    with pytest.raises(KeyFetchError):
+        verifier.verify(sign(private_key))
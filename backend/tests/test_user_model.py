@@ -0,0 +1,51 @@
+import pytest
+
+mongomock = pytest.importorskip("mongomock")
+
+from config import database
+
+# init_db() returns the already-set database, so importing the models never dials MONGO_URI
+database.db = database.db or mongomock.MongoClient()["skincare_test"]
+
+from models import user_model
+from models.user_cache import user_cache
+from models.user_model import User, EmailInUse
+
+
+@pytest.fixture(autouse=True)
+def users(monkeypatch):
+    db = mongomock.MongoClient()["skincare_test"]
+    database.ensure_indexes(db)
+    monkeypatch.setattr(User, "collection", db["users"])
+    user_cache.clear()
+    yield db["users"]
+    user_cache.clear()
+
+
+def test_ensure_user_creates_once(users):
+    user, created = User.ensure_user("u1", "Ann", "ann@example.com")
+    assert created and user["uid"] == "u1"
+
+    user_cache.clear()
+    user, created = User.ensure_user("u1", "Other", "ann@example.com")
+    assert not created and user["name"] == "Ann"
+    assert users.count_documents({}) == 1
+
+
+def test_email_of_another_user_is_a_conflict(users):
+    User.ensure_user("u1", "Ann", "ann@example.com")
+
+    with pytest.raises(EmailInUse):
+        User.ensure_user("u2", "Bob", "ann@example.com")
+    # Nothing was written, so nothing may be served from the cache
+    assert user_cache.get("u2") is None
+    assert User.find_by_uid("u2") is None
+
+
+def test_concurrent_insert_of_same_uid_returns_winner(users, monkeypatch):
+    users.insert_one({"uid": "u1", "name": "Winner", "email": "w@example.com"})
+    error = user_model.DuplicateKeyError("E11000 duplicate key error index: uid_unique")
+    monkeypatch.setattr(users, "find_one_and_update", lambda *args, **kwargs: (_ for _ in ()).throw(error))
+
+    user, created = User.ensure_user("u1", "Loser", "l@example.com")
+    assert not created and user["name"] == "Winner"
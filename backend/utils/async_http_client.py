@@ -0,0 +1,118 @@
+import os
+import time
+from contextlib import asynccontextmanager
+from urllib.parse import urlparse
+
+import httpx
+
+from utils.http_client import (
+    CONNECT_TIMEOUT, READ_TIMEOUT, POOL_MAXSIZE, MAX_RETRIES,
+    CircuitBreaker, CircuitOpenError, UpstreamStats
+)
+from utils.logger import get_logger
+from utils.metrics import observe, UPSTREAM_SECONDS
+
+# httpx logs every request at INFO; upstream latency is already in /upstream-stats
+get_logger("httpx").setLevel("WARNING")
+
+# === Config ===
+# In-flight requests across all hosts; LLM calls hold a connection for their whole generation
+MAX_CONNECTIONS = int(os.getenv("ASYNC_HTTP_MAX_CONNECTIONS", "256"))
+
+
+def _timeout(timeout):
+    """Accept the same seconds / (connect, read) tuple as HttpClient."""
+    if timeout is None:
+        timeout = (CONNECT_TIMEOUT, READ_TIMEOUT)
+    if isinstance(timeout, tuple):
+        connect, read = timeout
+        return httpx.Timeout(read, connect=connect)
+    return httpx.Timeout(timeout)
+
+
+class AsyncHttpClient:
+    """
+    httpx counterpart of HttpClient for the ASGI app: one pooled AsyncClient,
+    the same timeouts, per-upstream circuit breakers and latency stats.
+    Connection failures are retried by the transport; 5xx responses are not.
+
+    Everything here runs on the event loop thread, so no locking is needed.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._breakers = {}
+        self._stats = {}
+
+    def client(self):
+        # Created on first use so it binds to the serving loop, not the importing one
+        if self._client is None:
+            transport = httpx.AsyncHTTPTransport(
+                retries=MAX_RETRIES,
+                limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=POOL_MAXSIZE),
+            )
+            self._client = httpx.AsyncClient(transport=transport, timeout=_timeout(None))
+        return self._client
+
+    async def request(self, method, url, upstream=None, timeout=None, **kwargs):
+        name, breaker = self._admit(url, upstream)
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = await self.client().request(method, url, timeout=_timeout(timeout), **kwargs)
+            failed = response.status_code >= 500
+            return response
+        finally:
+            self._record(name, breaker, started, failed)
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method, url, upstream=None, timeout=None, **kwargs):
+        """`async with client.stream("GET", url) as response: async for chunk in response.aiter_bytes(): ...`"""
+        name, breaker = self._admit(url, upstream)
+        started = time.perf_counter()
+        failed = True
+        try:
+            async with self.client().stream(method, url, timeout=_timeout(timeout), **kwargs) as response:
+                failed = response.status_code >= 500
+                yield response
+        finally:
+            self._record(name, breaker, started, failed)
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def stats(self):
+        return {
+            name: {**stats.to_dict(), "circuit": self._breakers[name].state}
+            for name, stats in self._stats.items()
+        }
+
+    def _admit(self, url, upstream):
+        name = upstream or urlparse(url).netloc or "unknown"
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            breaker = self._breakers[name] = CircuitBreaker()
+            self._stats[name] = UpstreamStats()
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for upstream '{name}'")
+        return name, breaker
+
+    def _record(self, name, breaker, started, failed):
+        if failed:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+        elapsed_ms = (time.perf_counter() - started) * 1000.0
+        self._stats[name].observe(elapsed_ms, failed)
+        observe(UPSTREAM_SECONDS, elapsed_ms / 1000.0, name, "error" if failed else "ok")
+
+
+async_http_client = AsyncHttpClient()
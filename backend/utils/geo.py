@@ -0,0 +1,55 @@
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash_encode(lat, lng, precision=5):
+    """Standard base32 geohash; precision 5 is a ~4.9 x 4.9 km cell, 6 is ~1.2 x 0.6 km."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        target, bounds = (lng, lng_range) if even else (lat, lat_range)
+        mid = (bounds[0] + bounds[1]) / 2
+        value <<= 1
+        if target >= mid:
+            value |= 1
+            bounds[0] = mid
+        else:
+            bounds[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def geohash_bounds(cell):
+    """(min_lat, min_lng, max_lat, max_lng) of a geohash cell."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in cell:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            bounds = lng_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if (value >> shift) & 1:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+    return lat_range[0], lng_range[0], lat_range[1], lng_range[1]
+
+
+def geohash_center(cell):
+    min_lat, min_lng, max_lat, max_lng = geohash_bounds(cell)
+    return (min_lat + max_lat) / 2, (min_lng + max_lng) / 2
+
+
+def haversine_km(lat, lng, lats, lngs):
+    """Great-circle distance in km from one point to arrays of points, in one vectorized pass."""
+    lat, lng = np.radians(lat), np.radians(lng)
+    lats, lngs = np.radians(np.asarray(lats, dtype=np.float64)), np.radians(np.asarray(lngs, dtype=np.float64))
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
@@ -0,0 +1,189 @@
+import os
+import time
+import threading
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from utils.metrics import observe, UPSTREAM_SECONDS
+
+# === Config ===
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3.05"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "15"))
+POOL_CONNECTIONS = int(os.getenv("HTTP_POOL_CONNECTIONS", "16"))   # number of per-host pools kept
+POOL_MAXSIZE = int(os.getenv("HTTP_POOL_MAXSIZE", "32"))           # keep-alive connections per host
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "2"))
+RETRY_BACKOFF = float(os.getenv("HTTP_RETRY_BACKOFF", "0.3"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("HTTP_BREAKER_FAILURES", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("HTTP_BREAKER_RESET_SECONDS", "30"))
+
+# Upper bounds (ms) of the per-upstream latency histogram buckets
+LATENCY_BUCKETS_MS = [10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised without touching the network while an upstream's breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures; after `reset_seconds`
+    a single trial request is let through (half-open) to decide whether to close again.
+    `clock` is only swapped out by tests.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_seconds=BREAKER_RESET_SECONDS,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+
+class UpstreamStats:
+    """Request/error counts and a latency histogram for one upstream (HttpClient and AsyncHttpClient)."""
+
+    __slots__ = ("requests", "errors", "total_ms", "buckets")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, elapsed_ms, failed):
+        self.requests += 1
+        self.errors += int(failed)
+        self.total_ms += elapsed_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if elapsed_ms <= bound:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+    def to_dict(self):
+        labels = [str(b) for b in LATENCY_BUCKETS_MS] + ["inf"]
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "avg_ms": round(self.total_ms / self.requests, 2) if self.requests else 0.0,
+            "latency_ms_histogram": dict(zip(labels, self.buckets)),
+        }
+
+
+class HttpClient:
+    """
+    Shared outbound HTTP layer: one keep-alive connection pool per host,
+    connect/read timeouts on every call, bounded retries with backoff for
+    connection errors and 502/503/504 on idempotent methods, a circuit
+    breaker and latency stats per upstream.
+    """
+
+    def __init__(self):
+        retry = Retry(
+            total=MAX_RETRIES,
+            connect=MAX_RETRIES,
+            read=0,
+            status=MAX_RETRIES,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._breakers = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def request(self, method, url, upstream=None, timeout=None, **kwargs):
+        """
+        `upstream` names the breaker/metrics bucket (defaults to the URL's host);
+        `timeout` is seconds or a (connect, read) tuple.
+        """
+        name = upstream or urlparse(url).netloc or "unknown"
+        breaker = self._breaker(name)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuit open for upstream '{name}'")
+
+        started = time.perf_counter()
+        failed = True
+        try:
+            response = self._session.request(
+                method, url, timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT), **kwargs
+            )
+            failed = response.status_code >= 500
+            return response
+        finally:
+            if failed:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            self._observe(name, (time.perf_counter() - started) * 1000.0, failed)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {**stats.to_dict(), "circuit": self._breakers[name].state}
+                for name, stats in self._stats.items()
+            }
+
+    def _breaker(self, name):
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker()
+                self._stats[name] = UpstreamStats()
+            return breaker
+
+    def _observe(self, name, elapsed_ms, failed):
+        with self._lock:
+            self._stats[name].observe(elapsed_ms, failed)
+        observe(UPSTREAM_SECONDS, elapsed_ms / 1000.0, name, "error" if failed else "ok")
+
+
+http_client = HttpClient()
@@ -0,0 +1,146 @@
+import os
+import sys
+import uuid
+import queue
+import atexit
+import random
+import logging
+import contextvars
+from logging.handlers import QueueHandler, QueueListener
+
+# === Config ===
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of requests whose full payloads are logged at DEBUG level
+PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", "0.01"))
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(request_id)s] %(name)s: %(message)s"
+
+_request_id = contextvars.ContextVar("request_id", default="-")
+# Per-request payload sampling decision; None outside a request
+_payload_sampled = contextvars.ContextVar("payload_sampled", default=None)
+_listener = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamps every record with the correlation id of the request (or job) that produced it."""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+def setup_logging(level=LOG_LEVEL):
+    """
+    Route all logging through a queue so request threads never block on stdout;
+    a single listener thread does the formatting and I/O. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [queue_handler]
+    root.setLevel(level)
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def get_logger(name):
+    return logging.getLogger(name)
+
+
+# === Correlation ids ===
+def get_request_id():
+    return _request_id.get()
+
+
+def set_request_id(request_id=None):
+    """Bind a correlation id to the current thread/context; returns the id and a token for reset."""
+    request_id = request_id or uuid.uuid4().hex[:16]
+    return request_id, _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    try:
+        _request_id.reset(token)
+    except ValueError:
+        # Token came from another context (e.g. a streamed response finishing elsewhere)
+        _request_id.set("-")
+
+
+def init_request_logging(app):
+    """Give every request a correlation id (honouring an incoming X-Request-ID) and echo it back."""
+    from flask import g, request
+
+    @app.before_request
+    def _bind_request_id():
+        g.request_id, g.request_id_token = set_request_id(request.headers.get("X-Request-ID"))
+        g.payload_sampled_token = _payload_sampled.set(random.random() < PAYLOAD_SAMPLE_RATE)
+
+    @app.after_request
+    def _echo_request_id(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-ID"] = request_id
+        return response
+
+    @app.teardown_request
+    def _unbind_request_id(exc):
+        _unbind(g)
+
+
+def init_async_request_logging(app):
+    """Quart version of init_request_logging; the hooks must be coroutines so the ids bind in the request's task."""
+    from quart import g, request
+
+    @app.before_request
+    async def _bind_request_id():
+        g.request_id, g.request_id_token = set_request_id(request.headers.get("X-Request-ID"))
+        g.payload_sampled_token = _payload_sampled.set(random.random() < PAYLOAD_SAMPLE_RATE)
+
+    @app.after_request
+    async def _echo_request_id(response):
+        request_id = g.get("request_id")
+        if request_id:
+            response.headers["X-Request-ID"] = request_id
+        return response
+
+    @app.teardown_request
+    async def _unbind_request_id(exc):
+        _unbind(g)
+
+
+def _unbind(g):
+    token = g.pop("request_id_token", None)
+    if token is not None:
+        reset_request_id(token)
+    token = g.pop("payload_sampled_token", None)
+    if token is not None:
+        try:
+            _payload_sampled.reset(token)
+        except ValueError:
+            _payload_sampled.set(None)
+
+
+# === Payload logging ===
+def log_payload(logger, message, payload):
+    """
+    DEBUG-log a (possibly large) payload for a sampled subset of requests.
+    Costs one level check when DEBUG is off; the payload repr is only built if emitted.
+    """
+    if not logger.isEnabledFor(logging.DEBUG):
+        return
+    sampled = _payload_sampled.get()
+    if sampled is None:
+        # Outside a request (background jobs, startup): sample per call
+        sampled = random.random() < PAYLOAD_SAMPLE_RATE
+    if sampled:
+        logger.debug("%s: %r", message, payload)
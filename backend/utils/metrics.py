@@ -0,0 +1,211 @@
+import os
+import time
+import bisect
+import threading
+from contextlib import nullcontext
+
+from pymongo import monitoring
+
+# === Config ===
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+
+# Seconds; wide enough for both Mongo point reads and multi-second LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_NULL_SPAN = nullcontext()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Histogram:
+    """Prometheus-style cumulative histogram with a fixed label set."""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', repr(float(bound))))} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._histograms = []
+        self._collectors = []
+
+    def histogram(self, *args, **kwargs):
+        histogram = Histogram(*args, **kwargs)
+        self._histograms.append(histogram)
+        return histogram
+
+    def register_collector(self, collector):
+        """`collector()` returns extra exposition lines (gauges/counters read from existing stats)."""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for histogram in self._histograms:
+            lines.extend(histogram.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(collector())
+            except Exception as e:
+                lines.append(f"# collector {getattr(collector, '__name__', 'collector')} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_SECONDS = registry.histogram(
+    "skincare_stage_duration_seconds", "Time spent in each hot-path stage.", ["stage"])
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "skincare_http_request_duration_seconds", "Flask request latency.", ["endpoint", "method", "status"])
+MONGO_COMMAND_SECONDS = registry.histogram(
+    "skincare_mongo_command_duration_seconds", "MongoDB command latency.", ["command", "outcome"])
+UPSTREAM_SECONDS = registry.histogram(
+    "skincare_upstream_request_duration_seconds", "Outbound HTTP latency per upstream.", ["upstream", "outcome"])
+BATCH_SIZE = registry.histogram(
+    "skincare_inference_batch_size", "Images per model.predict call.", buckets=(1, 2, 4, 8, 16, 32, 64))
+
+
+# === Spans ===
+class _Span:
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, self.stage)
+        return False
+
+
+def span(stage):
+    """`with span("predict"): ...` records the block's duration; a shared no-op when metrics are disabled."""
+    if not METRICS_ENABLED:
+        return _NULL_SPAN
+    return _Span(stage)
+
+
+def observe(histogram, value, *labelvalues):
+    if METRICS_ENABLED:
+        histogram.observe(value, *labelvalues)
+
+
+# === MongoDB ===
+class MongoCommandTimer(monitoring.CommandListener):
+    """Feeds pymongo's own per-command durations into MONGO_COMMAND_SECONDS."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, "ok")
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, "error")
+
+
+def mongo_event_listeners():
+    """Listeners to pass to MongoClient; empty when metrics are off so pymongo skips event publishing."""
+    return [MongoCommandTimer()] if METRICS_ENABLED else []
+
+
+# === Flask ===
+def _observe_request(started, request, status_code):
+    HTTP_REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        request.url_rule.rule if request.url_rule else "unmatched",
+        request.method,
+        str(status_code)
+    )
+
+
+def _metrics_disabled():
+    return {"error": "Metrics are disabled (set METRICS_ENABLED=true)"}, 404
+
+
+def init_request_metrics(app):
+    """Time every request and serve the exposition text on GET /metrics."""
+    from flask import Response, g, request
+
+    if METRICS_ENABLED:
+        @app.before_request
+        def _start_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        def _record_request(response):
+            started = g.pop("metrics_started", None)
+            if started is not None:
+                _observe_request(started, request, response.status_code)
+            return response
+
+    @app.route("/metrics", methods=["GET"])
+    def metrics():
+        if not METRICS_ENABLED:
+            return _metrics_disabled()
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_async_request_metrics(app):
+    """Quart version of init_request_metrics (async hooks, so nothing is pushed to a thread)."""
+    from quart import Response, g, request
+
+    if METRICS_ENABLED:
+        @app.before_request
+        async def _start_timer():
+            g.metrics_started = time.perf_counter()
+
+        @app.after_request
+        async def _record_request(response):
+            started = g.pop("metrics_started", None)
+            if started is not None:
+                _observe_request(started, request, response.status_code)
+            return response
+
+    @app.route("/metrics", methods=["GET"])
+    async def metrics():
+        if not METRICS_ENABLED:
+            return _metrics_disabled()
+        return Response(registry.render(), mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,201 @@
+"""
+Firebase ID-token verification without a network round trip per request.
+
+firebase_admin.auth.verify_id_token checks the signature against Google's
+public keys, which it may re-fetch on every call. Here the key set is
+cached for its Cache-Control max-age, signatures are checked locally with
+PyJWT, and a verified token's claims are cached (by token hash) until it
+expires, so repeat requests in a session cost a dict lookup.
+
+The key fetcher is injectable: pass `fetch_keys=static_keys(jwks)` to verify
+against a local key set with no network at all.
+"""
+import os
+import re
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import jwt
+
+from utils.http_client import http_client
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# === Config ===
+FIREBASE_JWKS_URL = "https://www.googleapis.com/service_accounts/v1/jwk/securetoken@system.gserviceaccount.com"
+TOKEN_CACHE_MAX_ENTRIES = int(os.getenv("TOKEN_CACHE_MAX_ENTRIES", "10000"))
+# Allowed clock difference when checking iat/exp (firebase_admin's default is 0)
+TOKEN_CLOCK_SKEW_SECONDS = int(os.getenv("TOKEN_CLOCK_SKEW_SECONDS", "0"))
+# Used when the key response carries no max-age
+DEFAULT_KEYS_MAX_AGE = 3600
+# An unknown `kid` triggers a refetch (key rotation), at most this often
+MIN_REFETCH_SECONDS = 60
+
+_MAX_AGE = re.compile(r"max-age=(\d+)")
+
+
+class TokenVerificationError(ValueError):
+    """The token is malformed, expired, for another project or not signed by Google."""
+
+
+class KeyFetchError(RuntimeError):
+    """Google's signing keys could not be fetched (and none are cached)."""
+
+
+def fetch_google_keys():
+    """Default fetcher: (JWKS dict, max-age seconds) from Google's securetoken endpoint."""
+    try:
+        response = http_client.get(FIREBASE_JWKS_URL, upstream="google-securetoken")
+        response.raise_for_status()
+        match = _MAX_AGE.search(response.headers.get("Cache-Control", ""))
+        return response.json(), int(match.group(1)) if match else DEFAULT_KEYS_MAX_AGE
+    except Exception as e:
+        raise KeyFetchError(f"Could not fetch Firebase signing keys: {e}")
+
+
+def static_keys(jwks, max_age=DEFAULT_KEYS_MAX_AGE):
+    """Fetcher for a fixed, local key set (tests, emulators, offline runs)."""
+    return lambda: (jwks, max_age)
+
+
+class FirebaseTokenVerifier:
+    def __init__(self, project_id, fetch_keys=fetch_google_keys, clock=time.time,
+                 max_entries=TOKEN_CACHE_MAX_ENTRIES, clock_skew=TOKEN_CLOCK_SKEW_SECONDS):
+        self.project_id = project_id
+        self.issuer = f"https://securetoken.google.com/{project_id}"
+        self.fetch_keys = fetch_keys
+        self.clock = clock
+        self.max_entries = max_entries
+        self.clock_skew = clock_skew
+
+        self._keys = {}
+        self._keys_expire_at = 0.0
+        self._keys_fetched_at = 0.0
+        self._keys_lock = threading.Lock()
+
+        self._tokens = OrderedDict()
+        self._tokens_lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "key_fetches": 0, "rejected": 0}
+
+    def verify(self, token, check_cache=True):
+        """
+        Decoded claims (plus `uid`) of a valid Firebase ID token; raises
+        TokenVerificationError. Pass check_cache=False when cached_claims()
+        has just missed.
+        """
+        if check_cache:
+            claims = self.cached_claims(token)
+            if claims is not None:
+                return claims
+
+        try:
+            claims = self._decode(token)
+        except TokenVerificationError:
+            with self._tokens_lock:
+                self.counters["rejected"] += 1
+            raise
+        self._remember(token, claims)
+        return dict(claims)
+
+    def cached_claims(self, token):
+        """Claims of an already verified, unexpired token, or None (never touches the network)."""
+        key = _token_key(token)
+        now = self.clock()
+        with self._tokens_lock:
+            entry = self._tokens.get(key)
+            if entry is not None:
+                if entry["exp"] > now - self.clock_skew:
+                    self._tokens.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return dict(entry)
+                del self._tokens[key]
+            self.counters["misses"] += 1
+        return None
+
+    def stats(self):
+        with self._tokens_lock:
+            return {**self.counters, "cached_tokens": len(self._tokens), "keys": len(self._keys)}
+
+    # === Verification ===
+    def _decode(self, token):
+        if not isinstance(token, str) or not token:
+            raise TokenVerificationError("Token must be a non-empty string")
+        try:
+            header = jwt.get_unverified_header(token)
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Malformed token: {e}")
+        if header.get("alg") != "RS256":
+            raise TokenVerificationError("Token must be signed with RS256")
+        if not header.get("kid"):
+            raise TokenVerificationError("Token has no 'kid' header")
+
+        key = self._signing_key(header["kid"])
+        now = self.clock()
+        try:
+            claims = jwt.decode(
+                token,
+                key=key,
+                algorithms=["RS256"],
+                audience=self.project_id,
+                issuer=self.issuer,
+                leeway=self.clock_skew,
+                # PyJWT reads the wall clock; exp/iat are checked below against self.clock
+                options={"require": ["exp", "iat", "sub"], "verify_exp": False, "verify_iat": False}
+            )
+        except jwt.PyJWTError as e:
+            raise TokenVerificationError(f"Invalid token: {e}")
+
+        if claims["exp"] <= now - self.clock_skew:
+            raise TokenVerificationError("Token has expired")
+        if claims["iat"] > now + self.clock_skew or claims.get("auth_time", 0) > now + self.clock_skew:
+            raise TokenVerificationError("Token used before it was issued")
+        if not isinstance(claims["sub"], str) or not claims["sub"] or len(claims["sub"]) > 128:
+            raise TokenVerificationError("Token has an invalid 'sub' claim")
+
+        claims["uid"] = claims["sub"]
+        return claims
+
+    def _signing_key(self, kid):
+        with self._keys_lock:
+            now = self.clock()
+            stale = now >= self._keys_expire_at
+            # Unknown kid with fresh keys: Google may have rotated early; refetch, but not in a loop
+            rotated = kid not in self._keys and now - self._keys_fetched_at >= MIN_REFETCH_SECONDS
+            if stale or rotated:
+                self._refresh_keys(now)
+            key = self._keys.get(kid)
+        if key is None:
+            raise TokenVerificationError(f"Token signed with unknown key '{kid}'")
+        return key
+
+    def _refresh_keys(self, now):
+        """Caller holds `_keys_lock`. Keeps serving the old keys if a refetch fails."""
+        try:
+            jwks, max_age = self.fetch_keys()
+        except KeyFetchError:
+            if not self._keys:
+                raise
+            logger.warning("Signing key refresh failed; keeping %d cached keys", len(self._keys), exc_info=True)
+            self._keys_expire_at = now + MIN_REFETCH_SECONDS
+            return
+
+        self._keys = {jwk.key_id: jwk.key for jwk in jwt.PyJWKSet.from_dict(jwks).keys if jwk.key_id}
+        self._keys_fetched_at = now
+        self._keys_expire_at = now + max_age
+        with self._tokens_lock:
+            self.counters["key_fetches"] += 1
+        logger.debug("Fetched %d Firebase signing keys (max-age %ss)", len(self._keys), max_age)
+
+    def _remember(self, token, claims):
+        with self._tokens_lock:
+            self._tokens[_token_key(token)] = claims
+            while len(self._tokens) > self.max_entries:
+                self._tokens.popitem(last=False)
+
+
+def _token_key(token):
+    # Hash rather than the raw token, so the cache never holds usable credentials
+    return hashlib.sha256(token.encode() if isinstance(token, str) else b"").hexdigest()